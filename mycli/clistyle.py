@@ -1,13 +1,16 @@
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING
 
-from prompt_toolkit.styles import Style, merge_styles
-from prompt_toolkit.styles.pygments import style_from_pygments_cls
-from prompt_toolkit.styles.style import _MergedStyle
 from pygments.style import Style as PygmentsStyle
 import pygments.styles
 from pygments.token import Token, string_to_tokentype
 from pygments.util import ClassNotFound
 
+if TYPE_CHECKING:
+    from prompt_toolkit.styles.style import _MergedStyle
+
 logger = logging.getLogger(__name__)
 
 # map Pygments tokens (ptk 1.0) to class names (ptk 2.0).
@@ -97,6 +100,10 @@ def parse_pygments_style(
 
 
 def style_factory(name: str, cli_style: dict[str, str]) -> _MergedStyle:
+    # Only the prompt needs prompt_toolkit, which is slow to import.
+    from prompt_toolkit.styles import Style, merge_styles
+    from prompt_toolkit.styles.pygments import style_from_pygments_cls
+
     try:
         style: PygmentsStyle = pygments.styles.get_style_by_name(name)
     except ClassNotFound:
@@ -34,6 +34,10 @@ def create_toolbar_tokens_func(mycli, show_fish_help: Callable) -> Callable:
         if show_fish_help():
             result.append(("class:bottom-toolbar", "  Right-arrow to complete suggestion"))
 
+        progress = mycli.sqlexecute.progress if mycli.sqlexecute else None
+        if progress is not None and progress.finished:
+            result.append(("class:bottom-toolbar", f"  Last query: {progress}"))
+
         if mycli.completion_refresher.is_refreshing():
             result.append(("class:bottom-toolbar", "     Refreshing completions..."))
 
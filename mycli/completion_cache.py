@@ -0,0 +1,97 @@
+"""Keep the metadata read by the completion refresher on disk, so that a new
+session has completions before its first prompt."""
+
+import hashlib
+import json
+import logging
+import os
+from typing import Any
+
+_logger = logging.getLogger(__name__)
+
+# The SQLExecute methods whose results are cached.
+CACHED_QUERIES = ("databases", "tables", "table_columns", "users", "functions", "show_candidates")
+
+
+class CompletionCache:
+    """One JSON file per server, user and database, holding the results of
+    the metadata queries along with the schema fingerprint they were read at."""
+
+    version = 1
+
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.expanduser(directory)
+
+    def path(self, executor: Any) -> str:
+        key = json.dumps([
+            executor.host,
+            executor.port,
+            executor.socket,
+            executor.user,
+            executor.dbname,
+            executor.ssh_host,
+            executor.ssh_port,
+        ])
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, executor: Any) -> tuple[str, dict[str, list]] | None:
+        """Returns the (fingerprint, results) cached for *executor*'s
+        database, or None."""
+        try:
+            with open(self.path(executor), encoding="utf-8") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            _logger.error("Unable to read the completion cache: %r", e)
+            return None
+
+        if not isinstance(cached, dict) or cached.get("version") != self.version:
+            return None
+        results = cached.get("results")
+        # Which queries are cached depends on lazy_columns; a missing one
+        # fails the replay of the refreshers.
+        if not isinstance(results, dict):
+            return None
+        return cached["fingerprint"], results
+
+    def save(self, executor: Any, fingerprint: str, results: dict[str, list]) -> None:
+        path = self.path(executor)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # The cache lists users and schema names; keep it private.
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": self.version, "fingerprint": fingerprint, "results": results},
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            _logger.error("Unable to write the completion cache: %r", e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+class ReplayingExecutor:
+    """Stands in for a SQLExecute, answering the cached queries from
+    *results* and everything else from *executor*."""
+
+    def __init__(self, executor: Any, results: dict[str, list]) -> None:
+        self._executor = executor
+        self._results = results
+
+    def __getattr__(self, name: str) -> Any:
+        if name not in CACHED_QUERIES:
+            return getattr(self._executor, name)
+        rows = self._results[name]
+
+        def replay() -> list:
+            # JSON has no tuples.
+            return [tuple(row) if isinstance(row, list) else row for row in rows]
+
+        return replay
@@ -1,17 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
 import threading
 from typing import Callable
 
+import pymysql
+
+from mycli.completion_cache import CompletionCache, ReplayingExecutor
 from mycli.packages.special.main import COMMANDS
 from mycli.sqlcompleter import SQLCompleter
 from mycli.sqlexecute import ServerSpecies, SQLExecute
 
+_logger = logging.getLogger(__name__)
+
 
 class CompletionRefresher:
     refreshers: dict = {}
+    # The queries read by each refresher, see refresher().
+    refresher_queries: dict[str, tuple[str, ...] | Callable[[SQLCompleter], tuple[str, ...]]] = {}
+    # Connections reading the metadata at once.
+    max_connections = 3
 
-    def __init__(self) -> None:
+    def __init__(self, cache: CompletionCache | None = None) -> None:
         self._completer_thread: threading.Thread | None = None
         self._restart_refresh = threading.Event()
+        self.cache = cache
+        # The completer loaded from the cache, and the fingerprint it was
+        # read at, until the next refresh has validated it.
+        self._cached: tuple[SQLCompleter, str] | None = None
+
+    def load_cache(self, executor: SQLExecute, completer_options: dict | None = None) -> SQLCompleter | None:
+        """Creates a SQLCompleter object from the cached metadata of
+        *executor*'s database, if there is any.
+
+        The next refresh only reads the metadata again if the cached
+        metadata has changed since.
+
+        """
+        if self.cache is None:
+            return None
+        cached = self.cache.load(executor)
+        if cached is None:
+            return None
+
+        fingerprint, results = cached
+        completer = SQLCompleter(**(completer_options or {}))
+        replaying = ReplayingExecutor(executor, results)
+        try:
+            for refresher in self.refreshers.values():
+                refresher(completer, replaying)
+        except Exception as e:
+            _logger.error("Unable to load the completion cache: %r", e)
+            return None
+
+        self._cached = (completer, fingerprint)
+        return completer
 
     def refresh(
         self,
@@ -53,63 +95,144 @@ class CompletionRefresher:
         callbacks: Callable | list[Callable],
         completer_options: dict,
     ) -> None:
-        completer = SQLCompleter(**completer_options)
-
-        # Create a new sqlexecute method to populate the completions.
-        e = sqlexecute
-        executor = SQLExecute(
-            e.dbname,
-            e.user,
-            e.password,
-            e.host,
-            e.port,
-            e.socket,
-            e.charset,
-            e.local_infile,
-            e.ssl,
-            e.ssh_user,
-            e.ssh_host,
-            e.ssh_port,
-            e.ssh_password,
-            e.ssh_key_filename,
-        )
-
+        # Populate the completions on a spare connection of sqlexecute.
+        try:
+            with sqlexecute.borrow() as executor:
+                self._refresh(executor, callbacks, completer_options)
+        except pymysql.err.Error as e:
+            # E.g. connected to another server meanwhile.
+            _logger.error("Unable to refresh the completions: %r", e)
+
+    def _refresh(
+        self,
+        executor: SQLExecute,
+        callbacks: Callable | list[Callable],
+        completer_options: dict,
+    ) -> None:
         # If callbacks is a single function then push it into a list.
         if callable(callbacks):
             callbacks = [callbacks]
 
-        while 1:
-            for refresher in self.refreshers.values():
-                refresher(completer, executor)
-                if self._restart_refresh.is_set():
-                    self._restart_refresh.clear()
-                    break
-            else:
-                # Break out of while loop if the for loop finishes natually
-                # without hitting the break statement.
+        fingerprint = None
+        if self.cache is not None:
+            try:
+                fingerprint = executor.schema_fingerprint()
+            except Exception as e:
+                _logger.error("No completion cache due to %r", e)
+
+        cached, self._cached = self._cached, None
+        if cached is not None and (cached[0].dbname, cached[1]) == (executor.dbname, fingerprint) and not self._restart_refresh.is_set():
+            cached[0].save_schema()
+            for callback in callbacks:
+                callback(cached[0])
+            return
+
+        while True:
+            completer = SQLCompleter(**completer_options)
+            results = self._populate(completer, executor, callbacks)
+            if results is not None:
                 break
+            # Start over the refresh from the beginning.
+            self._restart_refresh.clear()
 
-            # Start over the refresh from the beginning if the for loop hit the
-            # break statement.
-            continue
+        if results.keys() == self._queries(completer):
+            completer.save_schema()
+            if self.cache is not None and fingerprint is not None:
+                self.cache.save(executor, fingerprint, results)
 
         for callback in callbacks:
             callback(completer)
 
+    def _populate(self, completer: SQLCompleter, executor: SQLExecute, callbacks: list[Callable]) -> dict[str, list] | None:
+        """Run the refreshers on *completer*.
+
+        The queries they read run concurrently, on connections borrowed from
+        *executor*'s pool, and each refresher runs as soon as its queries are
+        answered. Meanwhile *completer* is passed to *callbacks* whenever
+        some refreshers have run, so that it is useful early.
 
-def refresher(name: str, refreshers: dict = CompletionRefresher.refreshers) -> Callable:
+        Returns the results of the queries, or None if the refresh has been
+        restarted.
+
+        """
+        pending = list(self.refreshers)
+        needed = self._queries(completer)
+        results: dict[str, list] = {}
+        failed: set[str] = set()
+
+        def run_ready_refreshers() -> bool:
+            ready = [name for name in pending if results.keys() | failed >= set(self._queries(completer, name))]
+            replaying = ReplayingExecutor(executor, results)
+            for name in ready:
+                pending.remove(name)
+                if failed.intersection(self._queries(completer, name)):
+                    continue
+                with completer.lock:
+                    self.refreshers[name](completer, replaying)
+            return bool(ready)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="completion_refresh")
+        try:
+            # The columns take the longest to read.
+            queries = sorted(needed, key=lambda query: query != "table_columns")
+            futures = {pool.submit(self._query, executor, query): query for query in queries}
+            run_ready_refreshers()
+            for future in as_completed(futures):
+                if self._restart_refresh.is_set():
+                    return None
+                query = futures[future]
+                try:
+                    results[query] = future.result()
+                except Exception as e:
+                    _logger.error("No %s completions due to %r", query, e)
+                    failed.add(query)
+                if run_ready_refreshers() and pending:
+                    for callback in callbacks:
+                        callback(completer)
+            if self._restart_refresh.is_set():
+                return None
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def _queries(self, completer: SQLCompleter, name: str | None = None) -> set[str]:
+        """The queries read by the refresher *name*, or by all of them, to
+        populate *completer*."""
+        queries: set[str] = set()
+        for refresher_name in [name] if name else self.refreshers:
+            refresher_queries = self.refresher_queries.get(refresher_name, ())
+            queries.update(refresher_queries(completer) if callable(refresher_queries) else refresher_queries)
+        return queries
+
+    @staticmethod
+    def _query(executor: SQLExecute, query: str) -> list:
+        with executor.borrow() as borrowed:
+            return list(getattr(borrowed, query)())
+
+
+def refresher(
+    name: str,
+    refreshers: dict = CompletionRefresher.refreshers,
+    queries: tuple[str, ...] | Callable[[SQLCompleter], tuple[str, ...]] = (),
+) -> Callable:
     """Decorator to add the decorated function to the dictionary of
     refreshers. Any function decorated with a @refresher will be executed as
-    part of the completion refresh routine."""
+    part of the completion refresh routine.
+
+    *queries* are the SQLExecute methods of CACHED_QUERIES that it calls,
+    or a function returning them for the completer being populated.
+
+    """
 
     def wrapper(wrapped):
         refreshers[name] = wrapped
+        CompletionRefresher.refresher_queries[name] = queries
         return wrapped
 
     return wrapper
 
 
-@refresher("databases")
+@refresher("databases", queries=("databases",))
 def refresh_databases(completer: SQLCompleter, executor: SQLExecute) -> None:
     completer.extend_database_names(executor.databases())
 
@@ -120,16 +243,45 @@ def refresh_schemata(completer: SQLCompleter, executor: SQLExecute) -> None:
     # schemata will be the name of the current database.
     completer.extend_schemata(executor.dbname)
     completer.set_dbname(executor.dbname)
+    completer.set_schema_loader(schema_loader(executor))
 
 
-@refresher("tables")
+@refresher("tables", queries=lambda completer: ("tables",) if completer.lazy_columns else ("table_columns",))
 def refresh_tables(completer: SQLCompleter, executor: SQLExecute) -> None:
+    if completer.lazy_columns:
+        # The columns are loaded once a statement refers to their table.
+        completer.extend_relations(list(executor.tables()), kind="tables")
+        completer.set_column_loader(column_loader(executor))
+        return
     table_columns_dbresult = list(executor.table_columns())
     completer.extend_relations(table_columns_dbresult, kind="tables")
     completer.extend_columns(table_columns_dbresult, kind="tables")
 
 
-@refresher("users")
+def column_loader(executor: SQLExecute) -> Callable[[str, list[str]], list[tuple[str, str]]]:
+    """Return a function reading the columns of some tables of a database on
+    a spare connection of *executor*."""
+
+    def load(schema: str, relnames: list[str]) -> list[tuple[str, str]]:
+        with executor.borrow() as borrowed:
+            return list(borrowed.relation_columns(relnames, schema))
+
+    return load
+
+
+def schema_loader(executor: SQLExecute) -> Callable[[str, bool], tuple[list, list]]:
+    """Return a function reading the tables, with their columns or not, and
+    the functions of another database on a spare connection of *executor*."""
+
+    def load(schema: str, columns: bool) -> tuple[list, list]:
+        with executor.borrow() as borrowed:
+            relations = list(borrowed.table_columns(schema) if columns else borrowed.tables(schema))
+            return relations, list(borrowed.functions(schema))
+
+    return load
+
+
+@refresher("users", queries=("users",))
 def refresh_users(completer: SQLCompleter, executor: SQLExecute) -> None:
     completer.extend_users(executor.users())
 
@@ -140,7 +292,7 @@ def refresh_users(completer: SQLCompleter, executor: SQLExecute) -> None:
 #     completer.extend_columns(executor.view_columns(), kind='views')
 
 
-@refresher("functions")
+@refresher("functions", queries=("functions",))
 def refresh_functions(completer: SQLCompleter, executor: SQLExecute) -> None:
     completer.extend_functions(executor.functions())
     if executor.server_info and executor.server_info.species == ServerSpecies.TiDB:
@@ -152,7 +304,7 @@ def refresh_special(completer: SQLCompleter, executor: SQLExecute) -> None:
     completer.extend_special_commands(list(COMMANDS.keys()))
 
 
-@refresher("show_commands")
+@refresher("show_commands", queries=("show_candidates",))
 def refresh_show_commands(completer: SQLCompleter, executor: SQLExecute) -> None:
     completer.extend_show_items(executor.show_candidates())
 
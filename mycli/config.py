@@ -9,7 +9,6 @@ import sys
 from typing import IO, BinaryIO, Literal, TextIO
 
 from configobj import ConfigObj, ConfigObjError
-from Cryptodome.Cipher import AES
 
 logger = logging.getLogger(__name__)
 
@@ -166,6 +165,8 @@ def encrypt_mylogin_cnf(plaintext: IO[str]) -> BytesIO:
     https://github.com/isotopp/mysql-config-coder
 
     """
+    # Slow to import, and only needed for login paths.
+    from Cryptodome.Cipher import AES
 
     def realkey(key: bytes) -> bytes:
         """Create the AES key from the login key."""
@@ -221,6 +222,8 @@ def read_and_decrypt_mylogin_cnf(f: BinaryIO) -> BytesIO | None:
     :return: the decrypted login path file
     :rtype: io.BytesIO or None
     """
+    # Slow to import, and only needed for login paths.
+    from Cryptodome.Cipher import AES
 
     # Number of bytes used to store the length of ciphertext.
     MAX_CIPHER_STORE_LEN = 4
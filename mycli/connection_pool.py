@@ -0,0 +1,132 @@
+"""Keep connections to the server open for reuse, so that auxiliary work, e.g.
+the completion refresh, does not pay for TCP, TLS, authentication and the
+SSH tunnel every time."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import logging
+import threading
+from time import time
+from typing import Callable, Iterator
+
+import pymysql
+from pymysql.connections import Connection
+
+_logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Idle connections made by *connect*, which are all to the same server,
+    as the same user, with the same settings; only their current database
+    differs.
+
+    A connection is pinged before it is handed out again, and closed once it
+    has been idle for idle_timeout seconds.
+
+    """
+
+    # Enough for the connections of a completion refresh.
+    max_idle = 4
+    idle_timeout = 300.0
+
+    def __init__(self, connect: Callable[[str | None], Connection]) -> None:
+        self._connect = connect
+        # (connection, its current database, when it was returned)
+        self._idle: list[tuple[Connection, str | None, float]] = []
+        self._lock = threading.Lock()
+        self.closed = False
+        self.created = 0
+        self.reused = 0
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    def __str__(self) -> str:
+        return f"{len(self)} idle, {self.created} created, {self.reused} reused"
+
+    def get(self, database: str | None) -> Connection:
+        """Return an idle connection which is still alive, switched to
+        *database*, or else a new one, unless the pool has been closed."""
+        if self.closed:
+            raise pymysql.err.InterfaceError(0, "The connection pool is closed.")
+        while (idle := self._take(database)) is not None:
+            conn, conn_database = idle
+            try:
+                conn.ping()
+                if database is not None and database != conn_database:
+                    conn.select_db(database)
+            except pymysql.err.Error as e:
+                _logger.debug("Dropping a pooled connection: %r", e)
+                _close(conn)
+                continue
+            self.reused += 1
+            return conn
+
+        conn = self._connect(database)
+        self.created += 1
+        return conn
+
+    def put(self, conn: Connection, database: str | None) -> None:
+        """Return *conn*, whose current database is *database*, for reuse."""
+        with self._lock:
+            expired = self._evict()
+            kept = not self.closed and conn.open and len(self._idle) < self.max_idle
+            if kept:
+                self._idle.append((conn, database, time()))
+        if not kept:
+            expired.append(conn)
+        for expired_conn in expired:
+            _close(expired_conn)
+
+    @contextmanager
+    def connection(self, database: str | None) -> Iterator[Connection]:
+        """Borrow a connection for the duration of the with block. It is not
+        reused if the block fails."""
+        conn = self.get(database)
+        try:
+            yield conn
+        except BaseException:
+            _close(conn)
+            raise
+        self.put(conn, database)
+
+    def clear(self) -> None:
+        """Close the idle connections, and those returned from now on."""
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+        for conn, _database, _since in idle:
+            _close(conn)
+
+    def _take(self, database: str | None) -> tuple[Connection, str | None] | None:
+        with self._lock:
+            expired = self._evict()
+            taken = None
+            # The most recently used connection is the most likely to be alive.
+            for i in reversed(range(len(self._idle))):
+                conn, conn_database, _since = self._idle[i]
+                # A connection cannot leave its current database for none.
+                if database is not None or conn_database is None:
+                    del self._idle[i]
+                    taken = (conn, conn_database)
+                    break
+        for conn in expired:
+            _close(conn)
+        return taken
+
+    def _evict(self) -> list[Connection]:
+        """Remove the connections idle for too long, which the caller closes
+        once the lock is released."""
+        deadline = time() - self.idle_timeout
+        expired = [conn for conn, _database, since in self._idle if since < deadline]
+        if expired:
+            self._idle = [idle for idle in self._idle if idle[2] >= deadline]
+        return expired
+
+
+def _close(conn: Connection) -> None:
+    try:
+        conn.close()
+    except pymysql.err.Error:
+        pass
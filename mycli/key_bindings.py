@@ -6,7 +6,6 @@ from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.key_binding.key_processor import KeyPressEvent
 
 from mycli.packages import shortcuts
-from mycli.packages.toolkit.fzf import search_history
 
 _logger = logging.getLogger(__name__)
 
@@ -144,6 +143,9 @@ def mycli_bindings(mycli) -> KeyBindings:
     def _(event: KeyPressEvent) -> None:
         """Search history using fzf or reverse incremental search."""
         _logger.debug("Detected <C-r> key.")
+        # pyfzf is only imported once the history is searched.
+        from mycli.packages.toolkit.fzf import search_history
+
         mode = mycli.config.get('keys', {}).get('control_r', 'auto')
         if mode == 'reverse_isearch':
             search_history(event, incremental=True)
@@ -154,6 +156,8 @@ def mycli_bindings(mycli) -> KeyBindings:
     def _(event: KeyPressEvent) -> None:
         """Search history using fzf when available."""
         _logger.debug("Detected <alt-r> key.")
+        from mycli.packages.toolkit.fzf import search_history
+
         search_history(event)
 
     @kb.add("enter", filter=completion_is_selected)
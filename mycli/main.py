@@ -1,15 +1,20 @@
 from __future__ import annotations
 
 from collections import defaultdict, namedtuple
+from contextlib import contextmanager
 from io import TextIOWrapper
+import json
 import logging
 import os
 import re
 import shutil
+import signal
 import sys
+import tempfile
 import threading
 import traceback
-from typing import Any, Generator, Iterable, Literal
+from types import FrameType
+from typing import IO, TYPE_CHECKING, Any, Callable, Generator, Iterable, Iterator, Literal
 
 try:
     from pwd import getpwuid
@@ -19,68 +24,84 @@ from datetime import datetime
 from importlib import resources
 import itertools
 from random import choice
-from time import time
+from time import perf_counter, time
 from urllib.parse import parse_qs, unquote, urlparse
 
 from cli_helpers.tabular_output import TabularOutputFormatter, preprocessors
 from cli_helpers.utils import strip_ansi
 import click
 from configobj import ConfigObj
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.completion import Completion, DynamicCompleter
-from prompt_toolkit.document import Document
-from prompt_toolkit.enums import DEFAULT_BUFFER, EditingMode
-from prompt_toolkit.filters import HasFocus, IsDone
-from prompt_toolkit.formatted_text import ANSI, AnyFormattedText
-from prompt_toolkit.key_binding.bindings.named_commands import register as prompt_register
-from prompt_toolkit.key_binding.key_processor import KeyPressEvent
-from prompt_toolkit.layout.processors import ConditionalProcessor, HighlightMatchingBracketProcessor
-from prompt_toolkit.lexers import PygmentsLexer
-from prompt_toolkit.shortcuts import CompleteStyle, PromptSession
 from pymysql import OperationalError, err
-from pymysql.cursors import Cursor
-import sqlglot
+from pymysql.constants import ER, FIELD_TYPE
+from pymysql.cursors import Cursor, SSCursor
 import sqlparse
 
 from mycli import __version__
-from mycli.clibuffer import cli_is_multiline
-from mycli.clistyle import style_factory, style_factory_output
-from mycli.clitoolbar import create_toolbar_tokens_func
+from mycli.clistyle import style_factory_output
 from mycli.compat import WIN
-from mycli.completion_refresher import CompletionRefresher
 from mycli.config import get_mylogin_cnf_path, open_mylogin_cnf, read_config_files, str_to_bool, strip_matching_quotes, write_default_config
-from mycli.key_bindings import mycli_bindings
-from mycli.lexer import MyCliLexer
 from mycli.packages import special
 from mycli.packages.filepaths import dir_path_exists, guess_socket_location
-from mycli.packages.hybrid_redirection import get_redirect_components, is_redirect_command
-from mycli.packages.parseutils import is_destructive, is_dropping_database
+from mycli.packages.metrics_log import MetricsLog
+from mycli.packages.output_sink import OutputSink
+from mycli.packages.parseutils import extract_altered_tables, is_destructive_statement, is_dropping_database
+from mycli.packages.phase_timer import PhaseTimer, startup
 from mycli.packages.prompt_utils import confirm, confirm_destructive_query
 from mycli.packages.special.favoritequeries import FavoriteQueries
 from mycli.packages.special.main import ArgType
-from mycli.packages.tabular_output import sql_format
-from mycli.packages.toolkit.history import FileHistoryWithTimestamp
-from mycli.sqlcompleter import SQLCompleter
-from mycli.sqlexecute import ERROR_CODE_ACCESS_DENIED, FIELD_TYPES, SQLExecute
+from mycli.packages.tabular_output import batch, sql_format, streaming
+from mycli.query_stats import QueryStats
+from mycli.schema_metadata import SchemaMetadata
+from mycli.sqlexecute import ERROR_CODE_ACCESS_DENIED, FIELD_TYPES, PrefetchSSCursor, QueryProgress, SQLExecute
 
-try:
-    import paramiko
-except ImportError:
-    from mycli.packages.paramiko_stub import paramiko  # type: ignore[no-redef]
+# Batch mode does without the interactive session, so prompt_toolkit, the
+# completion and the styling of the prompt, which are slow to import, are only
+# imported by run_cli(), or once needed.
+if TYPE_CHECKING:
+    from prompt_toolkit.completion import Completion
+    from prompt_toolkit.formatted_text import ANSI, AnyFormattedText
+    from prompt_toolkit.key_binding.key_processor import KeyPressEvent
+    from prompt_toolkit.shortcuts import PromptSession
+
+    from mycli.completion_refresher import CompletionRefresher
+    from mycli.sqlcompleter import SQLCompleter
 
 
 # Query tuples are used for maintaining history
 Query = namedtuple("Query", ["query", "successful", "mutating"])
 
+FIXED_WIDTH_FIELD_TYPES = {
+    FIELD_TYPE.TINY,
+    FIELD_TYPE.SHORT,
+    FIELD_TYPE.LONG,
+    FIELD_TYPE.INT24,
+    FIELD_TYPE.LONGLONG,
+    FIELD_TYPE.YEAR,
+    FIELD_TYPE.DECIMAL,
+    FIELD_TYPE.NEWDECIMAL,
+    FIELD_TYPE.DATE,
+    FIELD_TYPE.DATETIME,
+    FIELD_TYPE.TIMESTAMP,
+    FIELD_TYPE.TIME,
+}
+
 SUPPORT_INFO = "Home: http://mycli.net\nBug tracker: https://github.com/dbcli/mycli/issues"
 DEFAULT_WIDTH = 80
 DEFAULT_HEIGHT = 25
+# Characters of SQL piped on stdin kept in memory while looking for destructive
+# statements, beyond which it is written to a temporary file.
+STDIN_SPOOL_SIZE = 16 * 1024 * 1024
 
 
 class MyCli:
     default_prompt = "\\t \\u@\\h:\\d> "
     default_prompt_splitln = "\\u@\\h\\n(\\t):\\d>"
     max_len_prompt = 45
+    # Rows looked at to decide whether auto_vertical_output switches to the
+    # vertical layout.
+    auto_vertical_sample_size = 1000
+    # Seconds a statement executes before its progress is shown.
+    progress_delay = 0.5
     defaults_suffix = None
 
     # In order of being loaded. Files lower in list override earlier ones.
@@ -111,9 +132,16 @@ class MyCli:
         auto_vertical_output: bool = False,
         warn: bool | None = None,
         myclirc: str = "~/.myclirc",
+        streaming: bool = False,
     ) -> None:
         self.sqlexecute = sqlexecute
+        # Whether Ctrl-C killed the statement which is running, see cancel_on_interrupt().
+        self.query_cancelled = False
+        self.progress_shown = False
+        # "text" or "json" to report the phases of the startup before the first prompt.
+        self.profile_startup: str | None = None
         self.logfile = logfile
+        self._audit_log: OutputSink | None = None
         self.defaults_suffix = defaults_suffix
         self.login_path = login_path
         self.toolbar_error_message: str | None = None
@@ -128,10 +156,13 @@ class MyCli:
 
         # Load config.
         config_files: list[str | TextIOWrapper] = self.system_config_files + [myclirc] + [self.pwd_config_file]
-        c = self.config = read_config_files(config_files)
+        with startup.phase("config"):
+            c = self.config = read_config_files(config_files)
         self.multi_line = c["main"].as_bool("multi_line")
         self.key_bindings = c["main"]["key_bindings"]
         special.set_timing_enabled(c["main"].as_bool("timing"))
+        special.set_streaming_enabled(streaming or c["main"].as_bool("streaming"))
+        self.prefetch_depth = c["main"].as_int("prefetch_depth")
         self.beep_after_seconds = float(c["main"]["beep_after_seconds"] or 0)
 
         FavoriteQueries.instance = FavoriteQueries.from_config(self.config)
@@ -168,20 +199,29 @@ class MyCli:
                 self.echo("Error: Unable to open the audit log file. Your queries will not be logged.", err=True, fg="red")
                 self.logfile = False
 
-        self.completion_refresher = CompletionRefresher()
+        # metrics log and query stats, see log_metrics()
+        self.metrics_log: MetricsLog | None = None
+        if "metrics_log" in c["main"]:
+            self.metrics_log = MetricsLog(c["main"]["metrics_log"])
+        query_stats_file = c["main"].get("query_stats_file")
+        self.query_stats = QueryStats(query_stats_file) if query_stats_file else None
+
+        self.completion_cache_dir = c["main"].get("completion_cache_dir")
+        self._completion_refresher: CompletionRefresher | None = None
 
         self.logger = logging.getLogger(__name__)
         self.initialize_logging()
 
-        keyword_casing = c["main"].get("keyword_casing", "auto")
+        self.keyword_casing = c["main"].get("keyword_casing", "auto")
 
         self.query_history: list[Query] = []
 
         # Initialize completer.
         self.smart_completion = c["main"].as_bool("smart_completion")
-        self.completer = SQLCompleter(
-            self.smart_completion, supported_formats=self.main_formatter.supported_formats, keyword_casing=keyword_casing
-        )
+        self.lazy_columns = c["main"].as_bool("lazy_columns")
+        self.lazy_columns_limit = c["main"].as_int("lazy_columns_limit")
+        self.schema_metadata = SchemaMetadata(c["main"].as_int("completion_schemas_size") * 1024 * 1024)
+        self._completer: SQLCompleter | None = None
         self._completer_lock = threading.Lock()
 
         # Register custom special commands.
@@ -190,7 +230,8 @@ class MyCli:
         # Load .mylogin.cnf if it exists.
         mylogin_cnf_path = get_mylogin_cnf_path()
         if mylogin_cnf_path:
-            mylogin_cnf = open_mylogin_cnf(mylogin_cnf_path)
+            with startup.phase("login path"):
+                mylogin_cnf = open_mylogin_cnf(mylogin_cnf_path)
             if mylogin_cnf_path and mylogin_cnf:
                 # .mylogin.cnf gets read last, even if defaults_file is specified.
                 self.cnf_files.append(mylogin_cnf)
@@ -198,12 +239,48 @@ class MyCli:
                 # There was an error reading the login path file.
                 print("Error: Unable to read login path file.")
 
-        self.my_cnf = read_config_files(self.cnf_files, list_values=False)
+        with startup.phase("my.cnf"):
+            self.my_cnf = read_config_files(self.cnf_files, list_values=False)
         prompt_cnf = self.read_my_cnf(self.my_cnf, ["prompt"])["prompt"]
         self.prompt_format = prompt or prompt_cnf or c["main"]["prompt"] or self.default_prompt
         self.multiline_continuation_char = c["main"]["prompt_continuation"]
         self.prompt_app = None
 
+    @property
+    def completer(self) -> SQLCompleter:
+        """The completer, created once first needed."""
+        if self._completer is None:
+            from mycli.sqlcompleter import SQLCompleter
+
+            self._completer = SQLCompleter(
+                self.smart_completion,
+                supported_formats=self.main_formatter.supported_formats,
+                keyword_casing=self.keyword_casing,
+                lazy_columns=self.lazy_columns,
+                lazy_columns_limit=self.lazy_columns_limit,
+                schemas=self.schema_metadata,
+            )
+        return self._completer
+
+    @completer.setter
+    def completer(self, completer: SQLCompleter) -> None:
+        self._completer = completer
+
+    @property
+    def completion_refresher(self) -> CompletionRefresher:
+        """The completion refresher, created once first needed."""
+        if self._completion_refresher is None:
+            from mycli.completion_cache import CompletionCache
+            from mycli.completion_refresher import CompletionRefresher
+
+            cache = CompletionCache(self.completion_cache_dir) if self.completion_cache_dir else None
+            self._completion_refresher = CompletionRefresher(cache)
+        return self._completion_refresher
+
+    @completion_refresher.setter
+    def completion_refresher(self, completion_refresher: CompletionRefresher) -> None:
+        self._completion_refresher = completion_refresher
+
     def register_special_commands(self) -> None:
         special.register_special_command(self.change_db, "use", "\\u", "Change to a new database.", aliases=["\\u"])
         special.register_special_command(
@@ -237,6 +314,28 @@ class MyCli:
         special.register_special_command(
             self.change_prompt_format, "prompt", "\\R", "Change prompt format.", aliases=["\\R"], case_sensitive=True
         )
+        special.register_special_command(
+            self.show_query_stats,
+            "\\stats",
+            "\\stats [slow|frequent] [n]",
+            "Show the slowest and most frequent queries.",
+            case_sensitive=True,
+        )
+
+    def show_query_stats(self, arg: str, **_) -> list[tuple]:
+        """The n (10 by default) slowest queries on average, and the most
+        frequent ones, or only those asked for, run from mycli so far."""
+        if self.query_stats is None:
+            return [(None, None, None, "Query stats are disabled, see query_stats_file in myclirc.")]
+        words = arg.split()
+        limit = 10
+        if words and words[-1].isdigit():
+            limit = int(words.pop())
+        orders = words or ["slow", "frequent"]
+        if any(order not in ("slow", "frequent") for order in orders) or len(orders) > 2:
+            return [(None, None, None, "Usage: \\stats [slow|frequent] [n]")]
+        titles = {"slow": "Slowest queries, on average:", "frequent": "Most frequent queries:"}
+        return [(titles[order], self.query_stats.top(order, limit), QueryStats.headers, None) for order in orders]
 
     def change_table_format(self, arg: str, **_) -> Generator[tuple, None, None]:
         try:
@@ -281,18 +380,30 @@ class MyCli:
         if not arg:
             message = "Missing required argument: filename."
             return [(None, None, None, message)]
-        try:
-            with open(os.path.expanduser(arg)) as f:
-                query = f.read()
-        except IOError as e:
-            return [(None, None, None, str(e))]
 
-        if self.destructive_warning and confirm_destructive_query(query) is False:
-            message = "Wise choice. Command execution stopped."
-            return [(None, None, None, message)]
+        return self._execute_file(os.path.expanduser(arg))
 
+    def _execute_file(self, path: str) -> Generator[tuple, None, None]:
+        """Run the statements read from the file at *path* as soon as each one
+        is complete, so that large files are never held in memory."""
         assert isinstance(self.sqlexecute, SQLExecute)
-        return self.sqlexecute.run(query)
+        try:
+            f = open(path)
+        except IOError as e:
+            yield (None, None, None, str(e))
+            return
+
+        with f:
+            if self.destructive_warning:
+                # Confirmed before any statement is run, then read again.
+                query = first_destructive_statement(f)
+                if query is not None and confirm_destructive_query(query) is False:
+                    message = "Wise choice. Command execution stopped."
+                    yield (None, None, None, message)
+                    return
+                f.seek(0)
+            for query in special.split_queries_from_lines(f):
+                yield from self.sqlexecute.run_queries([query])
 
     def change_prompt_format(self, arg: str, **_) -> list[tuple]:
         """
@@ -519,6 +630,8 @@ class MyCli:
                     )
                 else:
                     raise e
+            self.sqlexecute.prefetch_depth = self.prefetch_depth
+            self.sqlexecute.measure_phases = self.metrics_log is not None or self.query_stats is not None
 
         try:
             if not WIN and socket:
@@ -603,7 +716,7 @@ class MyCli:
                 raise RuntimeError(message)
             while True:
                 try:
-                    assert isinstance(self.prompt_app, PromptSession)
+                    assert self.prompt_app is not None
                     text = self.prompt_app.prompt(default=sql)
                     break
                 except KeyboardInterrupt:
@@ -630,6 +743,8 @@ class MyCli:
         return False
 
     def handle_prettify_binding(self, text: str) -> str:
+        import sqlglot
+
         try:
             statements = sqlglot.parse(text, read="mysql")
         except Exception:
@@ -644,6 +759,8 @@ class MyCli:
         return pretty_text
 
     def handle_unprettify_binding(self, text: str) -> str:
+        import sqlglot
+
         try:
             statements = sqlglot.parse(text, read="mysql")
         except Exception:
@@ -658,6 +775,27 @@ class MyCli:
         return unpretty_text
 
     def run_cli(self) -> None:
+        with startup.phase("imports"):
+            from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+            from prompt_toolkit.completion import DynamicCompleter
+            from prompt_toolkit.enums import DEFAULT_BUFFER, EditingMode
+            from prompt_toolkit.filters import HasFocus, IsDone
+            from prompt_toolkit.formatted_text import ANSI
+            from prompt_toolkit.key_binding.bindings.named_commands import register as prompt_register
+            from prompt_toolkit.layout.processors import ConditionalProcessor, HighlightMatchingBracketProcessor
+            from prompt_toolkit.lexers import PygmentsLexer
+            from prompt_toolkit.shortcuts import CompleteStyle, PromptSession
+
+            from mycli.clibuffer import cli_is_multiline
+            from mycli.clistyle import style_factory
+            from mycli.clitoolbar import create_toolbar_tokens_func
+            from mycli.key_bindings import mycli_bindings
+            from mycli.lexer import MyCliLexer
+            from mycli.packages.hybrid_redirection import get_redirect_components, is_redirect_command
+            from mycli.packages.toolkit.history import FileHistoryWithTimestamp
+
+        prompt_register("edit-and-execute-command")(edit_and_execute)
+
         iterations = 0
         sqlexecute = self.sqlexecute
         assert isinstance(sqlexecute, SQLExecute)
@@ -665,11 +803,14 @@ class MyCli:
         self.configure_pager()
 
         if self.smart_completion:
+            with startup.phase("completion cache"):
+                self.load_cached_completions()
             self.refresh_completions()
 
         history_file = os.path.expanduser(os.environ.get("MYCLI_HISTFILE", "~/.mycli-history"))
         if dir_path_exists(history_file):
-            history = FileHistoryWithTimestamp(history_file)
+            with startup.phase("history"):
+                history = FileHistoryWithTimestamp(history_file)
         else:
             history = None
             self.echo(
@@ -678,7 +819,9 @@ class MyCli:
                 fg="red",
             )
 
-        key_bindings = mycli_bindings(self)
+        with startup.phase("key bindings"):
+            key_bindings = mycli_bindings(self)
+        sqlexecute.progress_callback = self.show_query_progress
 
         if not self.less_chatty:
             print(sqlexecute.server_info)
@@ -714,6 +857,7 @@ class MyCli:
         def output_res(res: Generator[tuple], start: float) -> None:
             nonlocal mutating
             result_count = 0
+            received = sqlexecute.bytes_received()
             for title, cur, headers, status in res:
                 logger.debug("headers: %r", headers)
                 logger.debug("rows: %r", cur)
@@ -736,6 +880,9 @@ class MyCli:
                 else:
                     max_width = None
 
+                timing = sqlexecute.timing
+                transfer = sqlexecute.network_seconds()[1]
+                format_started = perf_counter()
                 formatted = self.format_output(
                     title,
                     cur,
@@ -744,23 +891,50 @@ class MyCli:
                     special.is_redirected(),
                     max_width,
                 )
+                if timing is not None:
+                    timing.add("format", perf_counter() - format_started)
 
                 t = time() - start
                 try:
                     if result_count > 0:
                         self.echo("")
                     try:
-                        self.output(formatted, status)
+                        if not self.output(formatted, status, timing) and isinstance(cur, PrefetchSSCursor):
+                            # Nothing reads the rest of the rows.
+                            sqlexecute.stop_result(cur)
+                        elif status is None and isinstance(cur, SSCursor):
+                            # An unbuffered result knows its row count only
+                            # after the last row has been read.
+                            self.echo(SQLExecute.rows_in_set_status(cur.rownumber))
+                        if isinstance(cur, PrefetchSSCursor):
+                            logger.debug(
+                                "prefetch: %d rows in %d batches, %s",
+                                cur.prefetch_stats.rows,
+                                cur.prefetch_stats.batches,
+                                cur.prefetch_stats,
+                            )
                     except KeyboardInterrupt:
                         pass
+                    if isinstance(cur, Cursor) and sqlexecute.progress is not None:
+                        sqlexecute.progress.rows += cur.rownumber if isinstance(cur, SSCursor) else cur.rowcount
                     if self.beep_after_seconds > 0 and t >= self.beep_after_seconds:
                         self.bell()
                     if special.is_timing_enabled():
                         self.echo(f"Time: {t:0.03f}s")
+                        if isinstance(cur, PrefetchSSCursor) and cur.prefetch_stats.batches:
+                            self.echo(f"Prefetch: {cur.prefetch_stats}")
+                    if timing is not None:
+                        self.add_late_transfer(timing, transfer)
+                        if special.is_timing_verbose():
+                            self.echo(f"Phases: {timing.summary()}")
+                        else:
+                            self.log_output(f"Phases: {timing.summary()}")
+                    self.log_metrics(cur, headers, timing, sqlexecute.bytes_received() - received)
                 except KeyboardInterrupt:
                     pass
 
                 start = time()
+                received = sqlexecute.bytes_received()
                 result_count += 1
                 mutating = mutating or is_mutating(status)
 
@@ -857,11 +1031,12 @@ class MyCli:
 
                 successful = False
                 start = time()
-                res = sqlexecute.run(text)
-                self.main_formatter.query = text
-                self.redirect_formatter.query = text
-                successful = True
-                output_res(res, start)
+                with self.cancel_on_interrupt():
+                    res = sqlexecute.run(text)
+                    self.main_formatter.query = text
+                    self.redirect_formatter.query = text
+                    successful = True
+                    output_res(res, start)
                 special.unset_once_if_written(self.post_redirect_command)
                 special.flush_pipe_once_if_written(self.post_redirect_command)
             except err.InterfaceError:
@@ -880,28 +1055,21 @@ class MyCli:
             except EOFError as e:
                 raise e
             except KeyboardInterrupt:
-                # get last connection id
+                # Interrupted while the client, not the server, was busy,
+                # possibly in the middle of reading a result: the connection
+                # cannot be trusted anymore.
                 connection_id_to_kill = sqlexecute.connection_id or 0
                 # some mysql compatible databases may not implemente connection_id()
                 if connection_id_to_kill > 0:
                     logger.debug("connection id to kill: %r", connection_id_to_kill)
-                    # Restart connection to the database
-                    sqlexecute.connect()
                     try:
-                        for _title, _cur, _headers, status in sqlexecute.run(f"kill {connection_id_to_kill}"):
-                            status_str = str(status).lower()
-                            if status_str.find("ok") > -1:
-                                logger.debug("cancelled query, connection id: %r, sql: %r", connection_id_to_kill, text)
-                                self.echo(f"Cancelled query id: {connection_id_to_kill}", err=True, fg="blue")
-                            else:
-                                logger.debug(
-                                    "Failed to confirm query cancellation, connection id: %r, sql: %r",
-                                    connection_id_to_kill,
-                                    text,
-                                )
-                                self.echo(f"Failed to confirm query cancellation, id: {connection_id_to_kill}", err=True, fg="red")
+                        sqlexecute.kill(connection_id_to_kill, query_only=False)
+                        logger.debug("cancelled query, connection id: %r, sql: %r", connection_id_to_kill, text)
+                        self.echo(f"Cancelled query id: {connection_id_to_kill}", err=True, fg="blue")
                     except Exception as e:
                         self.echo(f"Encountered error while cancelling query: {e}", err=True, fg="red")
+                    # Restart connection to the database
+                    sqlexecute.connect()
                 else:
                     logger.debug("Did not get a connection id, skip cancelling query")
                     self.echo("Did not get a connection id, skip cancelling query", err=True, fg="red")
@@ -922,6 +1090,8 @@ class MyCli:
                         self.echo(str(e2), err=True, fg="red")
                         # If reconnection failed, don't proceed further.
                         return
+                elif e1.args[0] == ER.QUERY_INTERRUPTED and self.query_cancelled:
+                    logger.debug("cancelled query, sql: %r", text)
                 else:
                     logger.error("sql: %r, error: %r", text, e1)
                     logger.error("traceback: %r", traceback.format_exc())
@@ -932,12 +1102,17 @@ class MyCli:
                 self.echo(str(e), err=True, fg="red")
             else:
                 if is_dropping_database(text, sqlexecute.dbname):
+                    # The server has already left the dropped database.
                     sqlexecute.dbname = None
-                    sqlexecute.connect()
 
                 # Refresh the table names and column names if necessary.
                 if need_completion_refresh(text):
-                    self.refresh_completions(reset=need_completion_reset(text))
+                    reset = need_completion_reset(text)
+                    altered_tables = None if reset else extract_altered_tables(text)
+                    if altered_tables is None:
+                        self.refresh_completions(reset=reset)
+                    else:
+                        self.refresh_table_completions(altered_tables)
             finally:
                 if self.logfile is False:
                     self.echo("Warning: This query was not logged.", err=True, fg="red")
@@ -950,7 +1125,7 @@ class MyCli:
         else:
             complete_style = CompleteStyle.COLUMN
 
-        with self._completer_lock:
+        with self._completer_lock, startup.phase("prompt session"):
             if self.key_bindings == "vi":
                 editing_mode = EditingMode.VI
             else:
@@ -984,19 +1159,81 @@ class MyCli:
                 search_ignore_case=True,
             )
 
+        report_startup_profile(self.profile_startup)
         try:
             while True:
                 one_iteration()
                 iterations += 1
         except EOFError:
             special.close_tee()
+            sqlexecute.close_control_connection()
+            sqlexecute.close_pool()
             if not self.less_chatty:
                 self.echo("Goodbye!")
 
+    @contextmanager
+    def cancel_on_interrupt(self) -> Generator[None, None, None]:
+        """While a statement executes on the server, make Ctrl-C kill the
+        statement through the control connection. The server then fails it
+        with ER_QUERY_INTERRUPTED and the session carries on.
+
+        Otherwise Ctrl-C raises KeyboardInterrupt as usual.
+
+        """
+        self.query_cancelled = False
+        if threading.current_thread() is not threading.main_thread():
+            yield
+            return
+
+        def cancel(signum: int, frame: FrameType | None) -> None:
+            sqlexecute = self.sqlexecute
+            connection_id = sqlexecute.connection_id if sqlexecute else None
+            if sqlexecute is None or not sqlexecute.query_running or not connection_id or connection_id < 0:
+                raise KeyboardInterrupt
+            try:
+                sqlexecute.kill(connection_id)
+            except Exception as e:
+                self.echo(f"Encountered error while cancelling query: {e}", err=True, fg="red")
+                raise KeyboardInterrupt from e
+            self.query_cancelled = True
+            self.logger.debug("cancelled query, connection id: %r", connection_id)
+            self.echo(f"Cancelled query id: {connection_id}", err=True, fg="blue")
+
+        previous = signal.signal(signal.SIGINT, cancel)
+        try:
+            yield
+        finally:
+            signal.signal(signal.SIGINT, previous)
+
+    def show_query_progress(self, progress: QueryProgress) -> None:
+        """Keep a status line on the terminal while the server executes a
+        statement, see SQLExecute.progress_callback."""
+        if not sys.stderr.isatty():
+            return
+        if progress.executing and progress.elapsed >= self.progress_delay:
+            click.secho(f"\rExecuting: {progress}\x1b[K", nl=False, err=True, fg="yellow")
+            self.progress_shown = True
+        elif not progress.executing and self.progress_shown:
+            click.echo("\r\x1b[K", nl=False, err=True)
+            self.progress_shown = False
+
     def log_output(self, output: str) -> None:
         """Log the output in the audit log, if it's enabled."""
-        if isinstance(self.logfile, TextIOWrapper):
-            click.echo(output, file=self.logfile)
+        if audit_log := self.audit_log():
+            audit_log.write_line(output)
+            audit_log.flush()
+
+    def audit_log(self) -> OutputSink | None:
+        if not isinstance(self.logfile, TextIOWrapper):
+            return None
+        if self._audit_log is None or self._audit_log.file is not self.logfile:
+            self._audit_log = OutputSink("audit log", self.logfile)
+        return self._audit_log
+
+    def output_sinks(self) -> list[OutputSink]:
+        """Every destination the results are copied to."""
+        audit_log = self.audit_log()
+        return ([audit_log] if audit_log else []) + special.output_sinks()
 
     def echo(self, s: str, **kwargs) -> None:
         """Print a message to stdout.
@@ -1018,13 +1255,13 @@ class MyCli:
         timing message."""
         margin = self.get_reserved_space() + self.get_prompt(self.prompt_format).count("\n") + 1
         if special.is_timing_enabled():
-            margin += 1
+            margin += 2 if special.is_timing_verbose() else 1
         if status:
             margin += 1 + status.count("\n")
 
         return margin
 
-    def output(self, output: itertools.chain[str], status: str | None = None) -> None:
+    def output(self, output: itertools.chain[str], status: str | None = None, timing: PhaseTimer | None = None) -> bool:
         """Output text to stdout or a pager command.
 
         The status text is not outputted to pager or files.
@@ -1033,61 +1270,113 @@ class MyCli:
         message will be written to the tee file, if enabled. The
         message will be written to the output file, if enabled.
 
+        The time spent producing the lines, and the rest, are added to
+        *timing* as the format and render phases.
+
+        Returns False if the pager quit before the last line, which was then
+        not produced as nothing else needed it.
+
         """
-        if output:
-            if self.prompt_app is not None:
-                size = self.prompt_app.output.get_size()
-                size_columns = size.columns
-                size_rows = size.rows
-            else:
-                size_columns = DEFAULT_WIDTH
-                size_rows = DEFAULT_HEIGHT
+        complete = True
+        with rendering(timing):
+            if output:
+                if self.prompt_app is not None:
+                    size = self.prompt_app.output.get_size()
+                    size_columns = size.columns
+                    size_rows = size.rows
+                else:
+                    size_columns = DEFAULT_WIDTH
+                    size_rows = DEFAULT_HEIGHT
 
-            margin = self.get_output_margin(status)
+                margin = self.get_output_margin(status)
 
-            fits = True
-            buf = []
-            output_via_pager = self.explicit_pager and special.is_pager_enabled()
-            for i, line in enumerate(output, 1):
-                self.log_output(line)
-                special.write_tee(line)
-                special.write_once(line)
-                special.write_pipe_once(line)
+                sinks = self.output_sinks()
+                lines = iter(timed_lines(timing, output))
+
+                def copy_output(line: str) -> None:
+                    for sink in sinks:
+                        sink.write_line(line)
+
+                fits = True
+                buf = []
+                output_via_pager = self.explicit_pager and special.is_pager_enabled()
+                for i, line in enumerate(lines, 1):
+                    copy_output(line)
+
+                    if special.is_redirected():
+                        pass
+                    elif output_via_pager:
+                        buf.append(line)
+                        break
+                    elif fits:
+                        # buffering
+                        buf.append(line)
+                        if len(line) > size_columns or i > (size_rows - margin):
+                            fits = False
+                            if special.is_pager_enabled():
+                                # doesn't fit, use pager
+                                output_via_pager = True
+                                break
 
-                if special.is_redirected():
-                    pass
-                elif fits or output_via_pager:
-                    # buffering
-                    buf.append(line)
-                    if len(line) > size_columns or i > (size_rows - margin):
-                        fits = False
-                        if not self.explicit_pager and special.is_pager_enabled():
-                            # doesn't fit, use pager
-                            output_via_pager = True
-
-                        if not output_via_pager:
                             # doesn't fit, flush buffer
                             for buf_line in buf:
                                 click.secho(buf_line)
                             buf = []
-                else:
-                    click.secho(line)
-
-            if buf:
-                if output_via_pager:
-
-                    def newlinewrapper(text: list[str]) -> Generator[str, None, None]:
-                        for line in text:
-                            yield line + "\n"
-
-                    click.echo_via_pager(newlinewrapper(buf))
-                else:
-                    for line in buf:
+                    else:
                         click.secho(line)
 
-        if status:
-            self.log_output(status)
-            click.secho(status)
+                if buf:
+                    if output_via_pager:
+                        self.output_via_pager(buf, lines, copy_output)
+                        if sinks:
+                            # The pager may quit before reading everything;
+                            # the log and tee file still get all of the output.
+                            for line in lines:
+                                copy_output(line)
+                        elif next(lines, None) is not None:
+                            complete = False
+                            if hasattr(lines, "close"):
+                                lines.close()
+                    else:
+                        for line in buf:
+                            click.secho(line)
+
+                # Written in large blocks, once per result.
+                for sink in sinks:
+                    sink.flush()
+                    self.logger.debug("Output sink %s", sink)
+
+            if status:
+                self.log_output(status)
+                click.secho(status)
+        return complete
+
+    def output_via_pager(self, buf: list[str], lines: Iterator[str], copy_output: Callable[[str], None]) -> None:
+        """Page the lines in *buf*, then the rest of *lines* as they are
+        produced and copied with *copy_output*, so the pager shows the first
+        screen without waiting for the whole result."""
+        error: BaseException | None = None
+
+        def pager_lines() -> Generator[str, None, None]:
+            nonlocal error
+            yield from (line + "\n" for line in buf)
+            try:
+                for line in lines:
+                    copy_output(line)
+                    yield line + "\n"
+            except GeneratorExit:
+                # The pager quit.
+                raise
+            except BaseException as e:
+                # echo_via_pager() would swallow a KeyboardInterrupt, and
+                # leave the pager running on anything else.
+                error = e
+
+        # The pager blocks the writes while it is not reading, so lines are
+        # only produced as fast as they are paged.
+        click.echo_via_pager(pager_lines())
+        if error is not None:
+            raise error
 
     def configure_pager(self) -> None:
         # Provide sane defaults for less if they are empty.
@@ -1111,24 +1400,73 @@ class MyCli:
             special.disable_pager()
 
     def refresh_completions(self, reset: bool = False) -> list[tuple]:
+        assert self.sqlexecute is not None
         if reset:
             with self._completer_lock:
+                # Switching back to a recently used database needs no refresh.
+                if not self.completion_refresher.is_refreshing() and self.completer.use_schema(self.sqlexecute.dbname):
+                    return [(None, None, None, "Auto-completions of the database reused.")]
                 self.completer.reset_completions()
-        assert self.sqlexecute is not None
+        else:
+            # The other databases may have changed too.
+            self.schema_metadata.clear()
         self.completion_refresher.refresh(
             self.sqlexecute,
             self._on_completions_refreshed,
-            {
-                "smart_completion": self.smart_completion,
-                "supported_formats": self.main_formatter.supported_formats,
-                "keyword_casing": self.completer.keyword_casing,
-            },
+            self._completer_options(),
         )
 
         return [(None, None, None, "Auto-completion refresh started in the background.")]
 
+    def _completer_options(self) -> dict:
+        return {
+            "smart_completion": self.smart_completion,
+            "supported_formats": self.main_formatter.supported_formats,
+            "keyword_casing": self.completer.keyword_casing,
+            "lazy_columns": self.lazy_columns,
+            "lazy_columns_limit": self.lazy_columns_limit,
+            "schemas": self.schema_metadata,
+        }
+
+    def load_cached_completions(self) -> None:
+        assert self.sqlexecute is not None
+        completer = self.completion_refresher.load_cache(
+            self.sqlexecute,
+            self._completer_options(),
+        )
+        if completer is not None:
+            with self._completer_lock:
+                self.completer = completer
+
+    def refresh_table_completions(self, tables: list[tuple[str | None, str]]) -> None:
+        """Reload the columns of *tables* into the current completer instead
+        of refreshing all of the completion metadata."""
+        if self.completion_refresher.is_refreshing():
+            # The refresh in progress may already have read the old columns.
+            self.refresh_completions()
+            return
+
+        assert self.sqlexecute is not None
+        dbname = self.sqlexecute.dbname
+        for schema, _table in tables:
+            if schema is not None and schema != dbname:
+                # Read again when next used.
+                self.schema_metadata.discard(schema)
+        relnames = sorted({table for schema, table in tables if schema is None or schema == dbname})
+        if not relnames:
+            return
+        try:
+            column_data = list(self.sqlexecute.relation_columns(relnames))
+        except Exception as e:
+            self.logger.error("Failed to reload the columns of %r: %r", relnames, e)
+            self.refresh_completions()
+            return
+        with self._completer_lock:
+            self.completer.refresh_relations(relnames, column_data, kind="tables")
+
     def _on_completions_refreshed(self, new_completer: SQLCompleter) -> None:
         """Swap the completer object in cli with the newly created completer."""
+        new_completer.loaded_callback = self._on_completions_loaded
         with self._completer_lock:
             self.completer = new_completer
 
@@ -1137,7 +1475,24 @@ class MyCli:
             # "Refreshing completions..." indicator
             self.prompt_app.app.invalidate()
 
+    def _on_completions_loaded(self) -> None:
+        """Complete again, with the metadata which the completer has just
+        loaded in the background, if the completion menu is open."""
+        if self.prompt_app is None:
+            return
+        app = self.prompt_app.app
+        if app.loop is None:
+            return
+
+        def complete_again() -> None:
+            if app.current_buffer.complete_state is not None:
+                app.current_buffer.start_completion(select_first=False)
+
+        app.loop.call_soon_threadsafe(complete_again)
+
     def get_completions(self, text: str, cursor_position: int) -> Iterable[Completion]:
+        from prompt_toolkit.document import Document
+
         with self._completer_lock:
             return self.completer.get_completions(Document(text=text, cursor_position=cursor_position), None)
 
@@ -1167,20 +1522,104 @@ class MyCli:
     def run_query(self, query: str, new_line: bool = True) -> None:
         """Runs *query*."""
         assert self.sqlexecute is not None
-        results = self.sqlexecute.run(query)
+        self._echo_results(query, self.sqlexecute.run(query), new_line)
+
+    def run_queries(self, queries: Iterable[str], new_line: bool = True) -> None:
+        """Runs each of the already split *queries* as it is iterated over."""
+        assert self.sqlexecute is not None
+        for query in queries:
+            self._echo_results(query, self.sqlexecute.run_queries([query]), new_line)
+
+    def _echo_results(self, query: str, results: Iterable[tuple], new_line: bool) -> None:
+        sqlexecute = self.sqlexecute
+        assert sqlexecute is not None
+        received = sqlexecute.bytes_received()
         for result in results:
             title, cur, headers, status = result
             self.main_formatter.query = query
             self.redirect_formatter.query = query
-            output = self.format_output(
-                title,
-                cur,
-                headers,
-                special.is_expanded_output(),
-                special.is_redirected(),
-            )
-            for line in output:
-                click.echo(line, nl=new_line)
+            timing = sqlexecute.timing
+            transfer = sqlexecute.network_seconds()[1]
+            with rendering(timing):
+                if (
+                    new_line
+                    and isinstance(cur, Cursor)
+                    and headers
+                    and batch.is_supported(self.main_formatter.format_name)
+                    and not special.is_expanded_output()
+                    and not special.is_redirected()
+                ):
+                    if title:
+                        click.echo(title)
+                    # Exports may run to millions of rows: write them in blocks
+                    # rather than a line at a time.
+                    for block in timed_lines(timing, self.format_batch_output(cur, headers)):
+                        click.echo(block, nl=False)
+                else:
+                    output = self.format_output(
+                        title,
+                        cur,
+                        headers,
+                        special.is_expanded_output(),
+                        special.is_redirected(),
+                    )
+                    for line in timed_lines(timing, output):
+                        click.echo(line, nl=new_line)
+            if timing is not None:
+                self.add_late_transfer(timing, transfer)
+            self.log_metrics(cur, headers, timing, sqlexecute.bytes_received() - received)
+            received = sqlexecute.bytes_received()
+
+    def add_late_transfer(self, timing: PhaseTimer, transfer: float) -> None:
+        """An unbuffered result is read while it is formatted: move the time
+        spent on the network since *transfer* seconds, as counted by
+        SQLExecute.network_seconds(), from the format to the transfer
+        phase."""
+        assert self.sqlexecute is not None
+        late_transfer = self.sqlexecute.network_seconds()[1] - transfer
+        timing.add("transfer", late_transfer)
+        timing.add("format", -late_transfer)
+
+    def log_metrics(self, cur: Cursor | list[tuple] | None, headers: list[str] | None, timing: PhaseTimer | None, received: int) -> None:
+        """Write a record about the result *cur* of the last statement, which
+        took *received* bytes, to the metrics log, and its duration to the
+        query stats, if they are enabled."""
+        sqlexecute = self.sqlexecute
+        if (self.metrics_log is None and self.query_stats is None) or sqlexecute is None:
+            return
+        if isinstance(cur, SSCursor):
+            rows: int | None = cur.rownumber
+        elif isinstance(cur, Cursor):
+            rows = cur.rowcount
+        elif isinstance(cur, list):
+            rows = len(cur)
+        else:
+            rows = None
+
+        if self.query_stats is not None and timing is not None and sqlexecute.statement and not sqlexecute.is_special_command:
+            # Without the time spent writing the output, e.g. waiting for a
+            # pager, which says nothing about the query.
+            milliseconds = sum(seconds for phase, seconds in timing.phases.items() if phase != "render") * 1000
+            self.query_stats.record(sqlexecute.statement, milliseconds, rows)
+        if self.metrics_log is None:
+            return
+
+        formatter = self.redirect_formatter if special.is_redirected() else self.main_formatter
+        phases = timing.milliseconds() if timing is not None else {}
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "duration_ms": round(sum(phases.values()), 3),
+            "phases": phases,
+            "rows": rows,
+            "bytes": received,
+            "columns": len(headers) if headers else 0,
+            "format": "vertical" if special.is_expanded_output() else formatter.format_name,
+            "redirect": [sink.name for sink in special.output_sinks()],
+            "server": sqlexecute.socket or f"{sqlexecute.host}:{sqlexecute.port}",
+            "connection_id": sqlexecute.connection_id,
+            "database": sqlexecute.dbname,
+        }
+        self.metrics_log.write(record, sqlexecute.statement)
 
     def format_output(
         self,
@@ -1210,47 +1649,76 @@ class MyCli:
         if cur:
             column_types = None
             if isinstance(cur, Cursor):
-
-                def get_col_type(col) -> type:
-                    col_type = FIELD_TYPES.get(col[1], str)
-                    return col_type if type(col_type) is type else str
-
-                column_types = [get_col_type(tup) for tup in cur.description]
-
-            if max_width is not None:
-                cur = list(cur)
-
-            formatted = use_formatter.format_output(
-                cur,
-                headers,
-                format_name="vertical" if expanded else None,
-                column_types=column_types,
-                **output_kwargs,
-            )
-
-            if isinstance(formatted, str):
-                formatted = formatted.splitlines()
-            formatted = iter(formatted)
-
-            if not expanded and max_width and headers and cur:
-                first_line = next(formatted)
-                if len(strip_ansi(first_line)) > max_width:
-                    formatted = use_formatter.format_output(
-                        cur,
+                column_types = cursor_column_types(cur.description)
+
+            rows: Iterable = iter(cur)
+            formatted: Iterable[str] | None = None
+            if not expanded and max_width and headers:
+                # Decide on the layout from the leading rows only, so that the
+                # result is neither held in memory nor rendered twice.
+                sample = list(itertools.islice(rows, self.auto_vertical_sample_size))
+                if sample:
+                    sample_output = use_formatter.format_output(sample, headers, column_types=column_types, **output_kwargs)
+                    if isinstance(sample_output, str):
+                        sample_output = sample_output.splitlines()
+                    sample_lines = list(sample_output)
+                    width = len(strip_ansi(sample_lines[0])) if sample_lines else 0
+                    exhausted = len(sample) < self.auto_vertical_sample_size
+                    if not exhausted and isinstance(cur, Cursor):
+                        width += unsampled_width(cur.description, headers, sample)
+                    expanded = width > max_width
+                    if exhausted and not expanded:
+                        # The sample is the whole result, reuse its rendering.
+                        formatted = sample_lines
+                rows = itertools.chain(sample, rows)
+
+            if formatted is None:
+                format_name = "vertical" if expanded else None
+                if isinstance(cur, SSCursor):
+                    # An unbuffered cursor can be read only once, so format
+                    # its rows as they arrive.
+                    if streaming.is_supported(format_name or use_formatter.format_name):
+                        # align_decimals would need every row up front.
+                        output_kwargs.pop("preprocessors", None)
+                    formatted = streaming.format_output(
+                        use_formatter,
+                        rows,
                         headers,
-                        format_name="vertical",
+                        format_name=format_name,
                         column_types=column_types,
                         **output_kwargs,
                     )
-                    if isinstance(formatted, str):
-                        formatted = iter(formatted.splitlines())
                 else:
-                    formatted = itertools.chain([first_line], formatted)
+                    formatted = use_formatter.format_output(
+                        rows,
+                        headers,
+                        format_name=format_name,
+                        column_types=column_types,
+                        **output_kwargs,
+                    )
+
+            if isinstance(formatted, str):
+                formatted = formatted.splitlines()
 
             output = itertools.chain(output, formatted)
 
         return output
 
+    def format_batch_output(self, cur: Cursor, headers: list[str]) -> Iterator[str]:
+        """Format the rows of *cur* in the main tsv or csv format, as blocks
+        of lines identical to the output of format_output()."""
+        return batch.format_output(
+            self.main_formatter,
+            cur,
+            headers,
+            cursor_column_types(cur.description),
+            dialect="unix",
+            style=self.output_style,
+            # Like format_output(), which can only align the decimals of
+            # buffered results.
+            align_decimals=not isinstance(cur, SSCursor),
+        )
+
     def get_reserved_space(self) -> int:
         """Get the number of lines to reserve for the completion menu."""
         reserved_space_ratio = 0.45
@@ -1311,6 +1779,13 @@ class MyCli:
     is_flag=True,
     help="Automatically switch to vertical output mode if the result is wider than the terminal width.",
 )
+@click.option(
+    "--streaming",
+    "--quick",
+    "streaming",
+    is_flag=True,
+    help="Stream results row by row from the server instead of buffering them in memory.",
+)
 @click.option("-t", "--table", is_flag=True, help="Display batch output in table format.")
 @click.option("--csv", is_flag=True, help="Display batch output in CSV format.")
 @click.option("--warn/--no-warn", default=None, help="Warn before running a destructive query.")
@@ -1322,6 +1797,14 @@ class MyCli:
 @click.option(
     "--password-file", type=click.Path(), help="File or FIFO path containing the password to connect to the db if not specified otherwise."
 )
+@click.option("--profile-startup", is_flag=True, help="Report the time spent in each phase of the startup, to stderr.")
+@click.option(
+    "--profile-startup-format",
+    type=click.Choice(["text", "json"]),
+    default="text",
+    show_default=True,
+    help="Format of the --profile-startup report.",
+)
 @click.argument("database", default="", nargs=1)
 def cli(
     database: str,
@@ -1338,6 +1821,7 @@ def cli(
     defaults_file: str | None,
     login_path: str | None,
     auto_vertical_output: bool,
+    streaming: bool,
     local_infile: bool,
     ssl_enable: bool,
     ssl_ca: str | None,
@@ -1365,6 +1849,8 @@ def cli(
     init_command: str | None,
     charset: str | None,
     password_file: str | None,
+    profile_startup: bool,
+    profile_startup_format: str,
 ) -> None:
     """A MySQL terminal client with auto-completion and syntax highlighting.
 
@@ -1375,16 +1861,23 @@ def cli(
       - mycli mysql://my_user@my_host.com:3306/my_database
 
     """
-    mycli = MyCli(
-        prompt=prompt,
-        logfile=logfile,
-        defaults_suffix=defaults_group_suffix,
-        defaults_file=defaults_file,
-        login_path=login_path,
-        auto_vertical_output=auto_vertical_output,
-        warn=warn,
-        myclirc=myclirc,
-    )
+    # The format of the startup report, if any.
+    startup_report = profile_startup_format if profile_startup else None
+    if startup_report:
+        startup.enable()
+    with startup.phase("init"):
+        mycli = MyCli(
+            prompt=prompt,
+            logfile=logfile,
+            defaults_suffix=defaults_group_suffix,
+            defaults_file=defaults_file,
+            login_path=login_path,
+            auto_vertical_output=auto_vertical_output,
+            warn=warn,
+            myclirc=myclirc,
+            streaming=streaming,
+        )
+    mycli.profile_startup = startup_report
     if list_dsn:
         try:
             alias_dsn = mycli.config["alias_dsn"]
@@ -1529,24 +2022,25 @@ def cli(
 
     combined_init_cmd = "; ".join(cmd.strip() for cmd in init_cmds if cmd)
 
-    mycli.connect(
-        database=database,
-        user=user,
-        passwd=password,
-        host=host,
-        port=port,
-        socket=socket,
-        local_infile=local_infile,
-        ssl=ssl,
-        ssh_user=ssh_user,
-        ssh_host=ssh_host,
-        ssh_port=ssh_port,
-        ssh_password=ssh_password,
-        ssh_key_filename=ssh_key_filename,
-        init_command=combined_init_cmd,
-        charset=charset,
-        password_file=password_file,
-    )
+    with startup.phase("connect"):
+        mycli.connect(
+            database=database,
+            user=user,
+            passwd=password,
+            host=host,
+            port=port,
+            socket=socket,
+            local_infile=local_infile,
+            ssl=ssl,
+            ssh_user=ssh_user,
+            ssh_host=ssh_host,
+            ssh_port=ssh_port,
+            ssh_password=ssh_password,
+            ssh_key_filename=ssh_key_filename,
+            init_command=combined_init_cmd,
+            charset=charset,
+            password_file=password_file,
+        )
 
     if combined_init_cmd:
         click.echo(f"Executing init-command: {combined_init_cmd}", err=True)
@@ -1566,6 +2060,7 @@ def cli(
             else:
                 mycli.main_formatter.format_name = "tsv"
 
+            report_startup_profile(startup_report)
             mycli.run_query(execute)
             sys.exit(0)
         except Exception as e:
@@ -1576,22 +2071,27 @@ def cli(
         mycli.run_cli()
     else:
         stdin = click.get_text_stream("stdin")
-        try:
-            stdin_text = stdin.read()
-        except MemoryError:
-            click.secho("Failed! Ran out of memory.", err=True, fg="red")
-            click.secho("You might want to try the official mysql client.", err=True, fg="red")
-            click.secho("Sorry... :(", err=True, fg="red")
-            sys.exit(1)
 
-        if mycli.destructive_warning and is_destructive(stdin_text):
-            try:
-                sys.stdin = open("/dev/tty")
-                warn_confirmed = confirm_destructive_query(stdin_text)
-            except (IOError, OSError):
-                mycli.logger.warning("Unable to open TTY as stdin.")
-            if not warn_confirmed:
-                sys.exit(0)
+        def confirmed_queries() -> Generator[str, None, None]:
+            lines: IO[str] = stdin
+            if mycli.destructive_warning:
+                # Confirmed before any statement is run, so the input is read
+                # to the end first, and kept on disk unless it is small.
+                lines = spool = tempfile.SpooledTemporaryFile(max_size=STDIN_SPOOL_SIZE, mode="w+")
+                query = first_destructive_statement(spooled(stdin, spool))
+                spool.writelines(stdin)
+                spool.seek(0)
+                if query is not None:
+                    warn_confirmed = None
+                    try:
+                        sys.stdin = open("/dev/tty")
+                        warn_confirmed = confirm_destructive_query(query)
+                    except (IOError, OSError):
+                        mycli.logger.warning("Unable to open TTY as stdin.")
+                    if not warn_confirmed:
+                        sys.exit(0)
+            with lines:
+                yield from special.split_queries_from_lines(lines)
 
         try:
             new_line = True
@@ -1601,13 +2101,65 @@ def cli(
             elif not table:
                 mycli.main_formatter.format_name = "tsv"
 
-            mycli.run_query(stdin_text, new_line=new_line)
+            report_startup_profile(startup_report)
+            mycli.run_queries(confirmed_queries(), new_line=new_line)
             sys.exit(0)
         except Exception as e:
             click.secho(str(e), err=True, fg="red")
             sys.exit(1)
 
 
+def first_destructive_statement(lines: Iterable[str]) -> str | None:
+    """The first destructive statement of those read from *lines*, which are
+    read up to its end."""
+    for query in special.split_queries_from_lines(lines):
+        if is_destructive_statement(query):
+            return query
+    return None
+
+
+def spooled(lines: Iterable[str], spool: IO[str]) -> Generator[str, None, None]:
+    """The *lines*, each written to *spool* as it is read."""
+    for line in lines:
+        spool.write(line)
+        yield line
+
+
+def timed_lines(timing: PhaseTimer | None, lines: Iterable[str]) -> Iterable[str]:
+    """The *lines*, with the time spent producing them added to *timing* as
+    the format phase."""
+    return lines if timing is None else timing.iterate("format", lines)
+
+
+@contextmanager
+def rendering(timing: PhaseTimer | None) -> Generator[None, None, None]:
+    """Add the time spent in the with block, apart from that added to the
+    format phase meanwhile, to *timing* as the render phase."""
+    if timing is None:
+        yield
+        return
+    started = perf_counter()
+    formatting = timing.phases.get("format", 0.0)
+    try:
+        yield
+    finally:
+        formatted = timing.phases.get("format", 0.0) - formatting
+        timing.add("render", perf_counter() - started - formatted)
+
+
+def report_startup_profile(profile_startup: str | None) -> None:
+    """Print the time spent in each phase of the startup to stderr, as text
+    or JSON, once the startup is over."""
+    if not profile_startup or not startup.enabled:
+        return
+    if profile_startup == "json":
+        click.echo(json.dumps(startup.as_dict()), err=True)
+    else:
+        click.echo("Startup phases:", err=True)
+        click.echo(startup.report(), err=True)
+    startup.disable()
+
+
 def need_completion_refresh(queries: str) -> bool:
     """Determines if the completion needs a refresh by checking if the sql
     statement is an alter, create, drop or change db."""
@@ -1636,6 +2188,34 @@ def need_completion_reset(queries: str) -> bool:
     return False
 
 
+def cursor_column_types(description: Iterable[tuple]) -> list[type]:
+    """The Python types of the columns in a cursor *description*."""
+
+    def get_col_type(col) -> type:
+        col_type = FIELD_TYPES.get(col[1], str)
+        return col_type if type(col_type) is type else str
+
+    return [get_col_type(col) for col in description]
+
+
+def unsampled_width(description: Iterable[tuple], headers: list[str], sample: list[tuple]) -> int:
+    """Estimate how many characters wider than *sample* the rest of a result
+    may render, from the declared sizes of its fixed-width columns.
+
+    String columns are left to the sample: their declared sizes (e.g. 1020
+    bytes for a utf8mb4 VARCHAR(255)) are far wider than typical values.
+
+    """
+    extra = 0
+    for i, col in enumerate(description):
+        declared = col[3]
+        if col[1] not in FIXED_WIDTH_FIELD_TYPES or not declared:
+            continue
+        seen = max([len(headers[i])] + [len(str(row[i])) for row in sample if row[i] is not None])
+        extra += max(declared - seen, 0)
+    return extra
+
+
 def is_mutating(status: str | None) -> bool:
     """Determines if the statement is mutating based on the status."""
     if not status:
@@ -1664,7 +2244,6 @@ def thanks_picker() -> str:
     return choice(contents) if contents else 'our sponsors'
 
 
-@prompt_register("edit-and-execute-command")
 def edit_and_execute(event: KeyPressEvent) -> None:
     """Different from the prompt-toolkit default, we want to have a choice not
     to execute a query after editing, hence validate_and_handle=False."""
@@ -1673,6 +2252,11 @@ def edit_and_execute(event: KeyPressEvent) -> None:
 
 
 def read_ssh_config(ssh_config_path: str):
+    try:
+        import paramiko
+    except ImportError:
+        from mycli.packages.paramiko_stub import paramiko  # type: ignore[no-redef]
+
     ssh_config = paramiko.config.SSHConfig()
     try:
         with open(ssh_config_path) as f:
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+import re
 from typing import Any
 
 import sqlparse
@@ -6,6 +8,16 @@ from sqlparse.sql import Comparison, Identifier, Token, Where
 from mycli.packages.parseutils import extract_tables, find_prev_keyword, last_word
 from mycli.packages.special.main import parse_special_command
 
+# Suggestions for recent (text before the word being typed, that word, text
+# after the cursor) keys, most recent last.
+_suggestions: OrderedDict[tuple[str, str, str], list[dict[str, Any]]] = OrderedDict()
+_suggestions_size = 32
+
+# A word that more identifier characters can be typed onto without changing
+# what is suggested: an identifier, possibly qualified, or nothing yet.
+_growable_word = re.compile(r"(?:[\w.]*\w)?")
+_identifier_chars = re.compile(r"\w+")
+
 
 def suggest_type(full_text: str, text_before_cursor: str) -> list[dict[str, Any]]:
     """Takes the full_text that is typed so far and also the text before the
@@ -13,8 +25,38 @@ def suggest_type(full_text: str, text_before_cursor: str) -> list[dict[str, Any]
 
     Returns a tuple with a type of entity ('table', 'column' etc) and a scope.
     A scope for a column category will be a list of tables.
-    """
 
+    Suggestions are remembered, and reused while the word before the cursor
+    only grows by identifier characters, since neither the statement before
+    the word nor its scope change.
+    """
+    word_before_cursor = last_word(text_before_cursor, include="many_punctuations")
+    prefix = text_before_cursor[: len(text_before_cursor) - len(word_before_cursor)]
+    suffix = full_text[len(text_before_cursor) :] if full_text.startswith(text_before_cursor) else full_text
+    key = (prefix, word_before_cursor, suffix)
+
+    suggestions = _suggestions.get(key)
+    if suggestions is None and _suggestions:
+        (last_prefix, last_word_before_cursor, last_suffix), last_suggestions = next(reversed(_suggestions.items()))
+        if (
+            (last_prefix, last_suffix) == (prefix, suffix)
+            and word_before_cursor.startswith(last_word_before_cursor)
+            and _growable_word.fullmatch(last_word_before_cursor)
+            and _identifier_chars.fullmatch(word_before_cursor[len(last_word_before_cursor) :])
+        ):
+            suggestions = last_suggestions
+    if suggestions is None:
+        suggestions = _suggest_type(full_text, text_before_cursor)
+
+    _suggestions[key] = suggestions
+    _suggestions.move_to_end(key)
+    if len(_suggestions) > _suggestions_size:
+        _suggestions.popitem(last=False)
+
+    return [dict(suggestion) for suggestion in suggestions]
+
+
+def _suggest_type(full_text: str, text_before_cursor: str) -> list[dict[str, Any]]:
     word_before_cursor = last_word(text_before_cursor, include="many_punctuations")
 
     identifier: Identifier | None = None
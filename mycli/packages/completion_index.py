@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, Iterator
+
+# Each entry of CompletionIndex.text is NAME_START, the lower-cased name,
+# POSITION_START, then the position of the item in the collection in hex,
+# spelled with the capital letters A-P. Lower-cased text never contains
+# capital letters, so searching for it can only match inside a name.
+NAME_START = "\x00"
+POSITION_START = "\x01"
+_encode_position = str.maketrans("0123456789abcdef", "ABCDEFGHIJKLMNOP")
+_decode_position = str.maketrans("ABCDEFGHIJKLMNOP", "0123456789abcdef")
+
+
+class CompletionIndex:
+    """A collection of completion candidates, prepared so that matching the
+    word before the cursor does not lower-case and test every candidate in
+    Python.
+
+    All the candidates are joined into a single string, which is searched
+    with str.find() and compiled regular expressions instead. Matches are
+    returned in the order of the original collection, exactly as a linear
+    scan would find them.
+
+    """
+
+    def __init__(self, items: Iterable[str]) -> None:
+        self.items = list(items)
+        # Names containing the markers would break up the text, and the
+        # fuzzy regex of a linear scan does not match across newlines, so
+        # those are tested one by one.
+        self.unindexed: list[int] = []
+        entries = []
+        for i, item in enumerate(self.items):
+            if NAME_START in item or POSITION_START in item or "\n" in item:
+                self.unindexed.append(i)
+            else:
+                entries.append(f"{NAME_START}{item.lower()}{POSITION_START}{format(i, 'x').translate(_encode_position)}")
+        self.text = "".join(entries) + NAME_START
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.items)
+
+    def matches(self, text: str, start_only: bool = False, fuzzy: bool = True) -> list[str]:
+        """Return the items matching the lower-cased *text*, like
+        SQLCompleter.find_matches() would for a plain collection."""
+        if not text:
+            return list(self.items)
+
+        test: Callable[[str], object]
+        if fuzzy:
+            # 'abc' matches a name containing a, then b, then c. Negated
+            # character classes keep the regex from backtracking.
+            pattern = "".join(f"[^{NAME_START}{POSITION_START}{re.escape(char)}]*{re.escape(char)}" for char in text)
+            positions = self._find_pattern(NAME_START + pattern)
+            test = re.compile(".*?".join(map(re.escape, text))).search
+        elif start_only:
+            positions = self._find_pattern(NAME_START + re.escape(text))
+            test = re.compile(re.escape(text)).match
+        else:
+            positions = self._find_text(text)
+            test = re.compile(re.escape(text)).search
+
+        if NAME_START in text or POSITION_START in text:
+            positions = []
+        if self.unindexed:
+            positions = sorted(positions + [i for i in self.unindexed if test(self.items[i].lower())])
+        return [self.items[i] for i in positions]
+
+    def _find_pattern(self, pattern: str) -> list[int]:
+        """Return the positions of the items matching *pattern* at the start
+        of their entry."""
+        found = re.findall(f"{pattern}[^{POSITION_START}]*{POSITION_START}([A-P]+)", self.text)
+        return [int(position.translate(_decode_position), 16) for position in found]
+
+    def _find_text(self, text: str) -> list[int]:
+        """Return the positions of the items containing *text*."""
+        positions = []
+        find = self.text.find
+        start = find(text)
+        while start >= 0:
+            position_start = find(POSITION_START, start)
+            end = find(NAME_START, position_start)
+            positions.append(int(self.text[position_start + 1 : end].translate(_decode_position), 16))
+            start = find(text, end)
+        return positions
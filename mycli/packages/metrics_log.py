@@ -0,0 +1,127 @@
+"""A log of metrics about each statement, one JSON object per line, for
+tools rather than people, unlike the audit log."""
+
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from time import monotonic
+from typing import Any
+
+from mycli.packages.parseutils import query_fingerprint
+
+_logger = logging.getLogger(__name__)
+
+
+class MetricsLog:
+    """Appends records to the file at *path*, one JSON object per line, with
+    the fingerprint of the statement they are about.
+
+    The records are written by a background thread, in batches of up to
+    batch_size records, gathered for at most flush_interval seconds, so that
+    the interactive loop does not wait for the file. Once max_queued records
+    are waiting, new ones are dropped.
+
+    """
+
+    batch_size = 256
+    flush_interval = 1.0
+    max_queued = 10000
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        # (record, statement), or None to stop the writer.
+        self._queue: queue.Queue[tuple[dict[str, Any], str | None] | None] = queue.Queue(self.max_queued)
+        self._writer: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._close_at_exit = False
+        self.broken = False
+        self.written = 0
+        self.dropped = 0
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.written} written, {self.dropped} dropped"
+
+    def write(self, record: dict[str, Any], statement: str | None = None) -> None:
+        """Queue *record*, to which the fingerprint of *statement* is added
+        when it is written."""
+        if self.broken:
+            return
+        self._start()
+        try:
+            self._queue.put_nowait((record, statement))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Write the queued records, and stop the writer."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is None:
+            return
+        # A writer which gave up, see broken, no longer takes from the queue.
+        if writer.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            writer.join(timeout)
+        _logger.debug("Metrics log %s", self)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_batches, name="metrics log", daemon=True)
+            self._writer.start()
+            if not self._close_at_exit:
+                atexit.register(self.close)
+                self._close_at_exit = True
+
+    def _write_batches(self) -> None:
+        try:
+            file = open(os.path.expanduser(self.path), "a", encoding="utf-8")
+        except OSError as e:
+            _logger.error("Unable to open the metrics log %r: %r", self.path, e)
+            self.broken = True
+            return
+        with file:
+            stopped = False
+            while not stopped:
+                batch = self._next_batch()
+                stopped = batch[-1] is None
+                lines = [_line(*entry) for entry in batch if entry is not None]
+                try:
+                    file.write("".join(lines))
+                    file.flush()
+                except OSError as e:
+                    _logger.error("Unable to write to the metrics log %r: %r", self.path, e)
+                    self.broken = True
+                    return
+                self.written += len(lines)
+
+    def _next_batch(self) -> list[tuple[dict[str, Any], str | None] | None]:
+        """Wait for a record, then gather those queued meanwhile or arriving
+        within flush_interval seconds, up to batch_size, or until the writer
+        is stopped."""
+        batch = [self._queue.get()]
+        deadline = monotonic() + self.flush_interval
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+
+def _line(record: dict[str, Any], statement: str | None) -> str:
+    if statement is not None:
+        record["fingerprint"] = query_fingerprint(statement)
+    return json.dumps(record, default=str) + "\n"
@@ -0,0 +1,90 @@
+"""Buffered writers for the copies of the results: the audit log, tee, once
+and pipe_once."""
+
+from __future__ import annotations
+
+from time import perf_counter
+from typing import IO, Any, Callable
+
+import click
+
+
+class OutputSink:
+    """Collects the lines written to *file* and writes them out in blocks of
+    at least *buffer_size* characters, or when flushed.
+
+    Lines are written like click.echo() would write them, one at a time.
+    Errors in *ignored_errors* stop the writes to *file*, e.g. when the
+    command behind a pipe quits reading.
+
+    """
+
+    buffer_size = 256 * 1024
+
+    def __init__(
+        self,
+        name: str,
+        file: IO[str],
+        skip_empty: bool = False,
+        ignored_errors: tuple[type[Exception], ...] = (),
+    ) -> None:
+        self.name = name
+        self.file = file
+        self.skip_empty = skip_empty
+        self.ignored_errors = ignored_errors
+        # click.echo() strips the styles, unless writing to a terminal.
+        self.strip_styles = not file.isatty()
+        self.broken = False
+        self._pending: list[str] = []
+        self._pending_size = 0
+        self.lines = 0
+        self.chars = 0
+        self.seconds = 0.0
+
+    def __str__(self) -> str:
+        return f"{self.name}: {self.lines} lines, {self.chars} characters in {self.seconds:0.03f}s ({self.throughput / 1e6:0.01f}M/s)"
+
+    @property
+    def throughput(self) -> float:
+        """Characters written per second."""
+        return self.chars / self.seconds if self.seconds else 0.0
+
+    def write_line(self, line: str) -> None:
+        if self.skip_empty and not line:
+            return
+        if self.strip_styles and "\x1b" in line:
+            line = click.unstyle(line)
+        self._pending.append(line)
+        self._pending.append("\n")
+        self._pending_size += len(line) + 1
+        self.lines += 1
+        if self._pending_size >= self.buffer_size:
+            self._write()
+
+    def flush(self) -> None:
+        self._write()
+        self._call(self.file.flush)
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+    def _write(self) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        self.chars += len(text)
+        self._call(self.file.write, text)
+
+    def _call(self, method: Callable[..., Any], *args: Any) -> None:
+        if self.broken:
+            return
+        start = perf_counter()
+        try:
+            method(*args)
+        except self.ignored_errors:
+            self.broken = True
+        finally:
+            self.seconds += perf_counter() - start
@@ -3,7 +3,6 @@ from __future__ import annotations
 import re
 from typing import Generator
 
-import sqlglot
 import sqlparse
 from sqlparse.sql import Function, Identifier, IdentifierList, Token, TokenList
 from sqlparse.tokens import DML, Keyword, Punctuation
@@ -182,6 +181,9 @@ def extract_tables_from_complete_statements(sql: str) -> list[tuple[str | None,
     # but is much better at extracting table names from complete statements.
     # sqlparse can extract the series of statements, though it also doesn't
     # understand "\T".
+    # sqlglot is slow to import, and only needed here.
+    import sqlglot
+
     roughly_parsed = sqlparse.parse(sql)
     if not roughly_parsed:
         return []
@@ -274,6 +276,20 @@ def is_destructive(queries: str) -> bool:
     return False
 
 
+# Whitespace and comments, then one of the keywords is_destructive() looks
+# for. Much cheaper than parsing a statement that cannot be destructive.
+destructive_start_regex = re.compile(
+    r"(?:\s+|--[^\n]*(?:\n|$)|\#[^\n]*(?:\n|$)|/\*.*?\*/)*(?:drop|shutdown|delete|truncate|alter|update)\b",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def is_destructive_statement(statement: str) -> bool:
+    """Returns if the single *statement* is destructive, without parsing
+    statements that do not start with a destructive keyword."""
+    return bool(destructive_start_regex.match(statement)) and is_destructive(statement)
+
+
 def is_dropping_database(queries: str, dbname: str | None) -> bool:
     """Determine if the query is dropping a specific database."""
     result = False
@@ -299,6 +315,112 @@ def is_dropping_database(queries: str, dbname: str | None) -> bool:
     return result
 
 
+_identifier = r"(?:`(?:[^`]|``)+`|[\w$]+)"
+_qualified_name = rf"{_identifier}(?:\s*\.\s*{_identifier})?"
+_view_options = r"(?:or\s+replace\s+)?(?:algorithm\s*=\s*\w+\s+)?(?:definer\s*=\s*\S+\s+)?(?:sql\s+security\s+\w+\s+)?"
+
+altered_table_regex: dict[str, re.Pattern] = {
+    "create_table": re.compile(rf"^create\s+(?:temporary\s+)?table\s+(?:if\s+not\s+exists\s+)?({_qualified_name})", re.I),
+    "create_view": re.compile(rf"^(?:create|alter)\s+{_view_options}view\s+({_qualified_name})", re.I),
+    "alter_table": re.compile(rf"^alter\s+(?:online\s+|ignore\s+)*table\s+({_qualified_name})", re.I),
+    "index": re.compile(rf"^(?:create|drop)\s+(?:unique\s+|fulltext\s+|spatial\s+)?index\s+{_identifier}\s+on\s+({_qualified_name})", re.I),
+    "drop": re.compile(r"^drop\s+(?:temporary\s+)?(?:table|view)\s+(?:if\s+exists\s+)?(.+?)(?:\s+(?:restrict|cascade))?$", re.I | re.S),
+    "rename_table": re.compile(r"^rename\s+table\s+(.+)$", re.I | re.S),
+    # ALTER TABLE ... RENAME [TO|AS] new_name, but not RENAME COLUMN/INDEX/KEY.
+    "alter_rename": re.compile(rf"\brename\s+(?!column\b|index\b|key\b)(?:to\s+|as\s+)?({_qualified_name})", re.I),
+}
+
+
+def _split_qualified_name(name: str) -> tuple[str | None, str]:
+    parts = [part.strip().strip("`").replace("``", "`") for part in re.findall(_identifier, name)]
+    if len(parts) == 2:
+        return parts[0], parts[1]
+    return None, parts[0]
+
+
+def extract_altered_tables(queries: str) -> list[tuple[str | None, str]] | None:
+    """Find the (schema, table) pairs whose columns may have been changed by
+    the DDL statements in *queries*.
+
+    Returns None when a statement changes more than individual tables or
+    views (a database switch, a new function, a user...) or cannot be
+    understood, in which case all of the completion metadata must be reloaded.
+
+    >>> extract_altered_tables('alter table foo add column bar int')
+    [(None, 'foo')]
+    >>> extract_altered_tables('rename table a to db.b')
+    [(None, 'a'), ('db', 'b')]
+    >>> extract_altered_tables('use foo') is None
+    True
+
+    """
+    tables: list[tuple[str | None, str]] = []
+    for query in sqlparse.split(queries):
+        query = sqlparse.format(query, strip_comments=True).strip().rstrip(";").strip()
+        if not query:
+            continue
+        first_word = query.split()[0].lower()
+        if first_word not in ("alter", "create", "drop", "rename", "use", "connect", "\\r", "\\u"):
+            continue
+
+        if match := altered_table_regex["drop"].match(query):
+            names = match.group(1).split(",")
+        elif match := altered_table_regex["rename_table"].match(query):
+            names = [name for pair in match.group(1).split(",") for name in re.split(r"\s+to\s+", pair, flags=re.I)]
+        elif match := altered_table_regex["alter_table"].match(query):
+            names = [match.group(1)]
+            if rename := altered_table_regex["alter_rename"].search(query, match.end()):
+                names.append(rename.group(1))
+        else:
+            for kind in ("create_table", "create_view", "index"):
+                if match := altered_table_regex[kind].match(query):
+                    names = [match.group(1)]
+                    break
+            else:
+                return None
+
+        for name in names:
+            if not re.fullmatch(rf"\s*{_qualified_name}\s*", name):
+                return None
+            tables.append(_split_qualified_name(name))
+
+    return tables
+
+
+fingerprint_regex: list[tuple[re.Pattern, str]] = [
+    # Quoted strings, before the comments, which they may contain.
+    (re.compile(r"""'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*\""""), "?"),
+    (re.compile(r"/\*.*?\*/|(?:--\s|#)[^\n]*", re.DOTALL), " "),
+    (re.compile(r"\b0x[0-9a-f]+\b|\b\d+(?:\.\d*)?(?:e[+-]?\d+)?\b|\B\.\d+\b", re.IGNORECASE), "?"),
+    (re.compile(r"\bnull\b", re.IGNORECASE), "?"),
+    (re.compile(r"\s+"), " "),
+    # The same spacing around comparisons and assignments, commas and within
+    # parentheses, however the statement was written.
+    (re.compile(r" ?(->>|->|<=>|<=|>=|<>|!=|:=|=|<|>) ?"), r" \1 "),
+    (re.compile(r" ?, ?"), ", "),
+    (re.compile(r"\( "), "("),
+    (re.compile(r" \)"), ")"),
+    # IN lists, and the rows of VALUES.
+    (re.compile(r"\bin ?\( ?\?(?: ?, ?\?)* ?\)", re.IGNORECASE), "in (?+)"),
+    (re.compile(r"\bvalues ?(?:\( ?\?(?: ?, ?\?)* ?\)(?: ?, ?)?)+", re.IGNORECASE), "values (?+)"),
+]
+
+
+def query_fingerprint(sql: str) -> str:
+    """Normalize the statement *sql*, so that the statements which differ
+    only by their values, comments and spacing have the same fingerprint.
+
+    >>> query_fingerprint("SELECT * FROM t WHERE id IN ( 1, 2,3) AND name='x' -- test")
+    'select * from t where id in (?+) and name = ?'
+    >>> query_fingerprint("insert into t values (1, 'a'), (2, NULL);")
+    'insert into t values (?+)'
+
+    """
+    for regex, replacement in fingerprint_regex:
+        sql = regex.sub(replacement, sql)
+    return sql.strip().rstrip(";").strip().lower()
+
+
 if __name__ == "__main__":
     sql = "select * from (select t. from tabl t"
     print(extract_tables(sql))
@@ -0,0 +1,126 @@
+"""Time spent in each phase of some work, e.g. of the startup, to find out
+where it goes."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import threading
+from time import perf_counter
+from typing import Any, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class PhaseTimer:
+    """The seconds spent in each named phase, in the order the phases
+    started.
+
+    A phase which runs within another one is recorded as "outer/inner", and
+    counts towards the outer one as well. Only the phases run by the thread
+    which enabled the timer are recorded, and only while it is enabled.
+
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.phases: dict[str, float] = {}
+        self.started = perf_counter()
+        self._stack: list[str] = []
+        self._thread = threading.get_ident()
+
+    def enable(self) -> None:
+        """Start recording again, from now, the phases of the calling
+        thread."""
+        self.enabled = True
+        self.phases.clear()
+        self.started = perf_counter()
+        self._stack.clear()
+        self._thread = threading.get_ident()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    @property
+    def recording(self) -> bool:
+        return self.enabled and threading.get_ident() == self._thread
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Record the time spent in the with block as the phase *name*."""
+        if not self.recording:
+            yield
+            return
+        self._stack.append(name)
+        path = "/".join(self._stack)
+        # Listed before the phases within it.
+        self.phases.setdefault(path, 0.0)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[path] += perf_counter() - start
+            self._stack.pop()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Record *seconds* spent in the phase *name*, within the current
+        one."""
+        if self.recording:
+            path = "/".join(self._stack + [name])
+            self.phases[path] = self.phases.get(path, 0.0) + seconds
+
+    def iterate(self, name: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield the *items*, recording the time spent producing them, e.g.
+        by a generator, as the phase *name*."""
+        items = iter(items)
+        spent = 0.0
+        try:
+            while True:
+                started = perf_counter()
+                try:
+                    item = next(items)
+                finally:
+                    spent += perf_counter() - started
+                yield item
+        except StopIteration:
+            return
+        finally:
+            self.add(name, spent)
+
+    @property
+    def elapsed(self) -> float:
+        return perf_counter() - self.started
+
+    def other(self, elapsed: float) -> float:
+        """The part of *elapsed* seconds spent outside of any phase."""
+        return elapsed - sum(seconds for path, seconds in self.phases.items() if "/" not in path)
+
+    def report(self) -> str:
+        """The milliseconds spent in each phase, one per line, those within
+        another one indented."""
+        elapsed = self.elapsed
+        rows = [("  " * path.count("/") + path.rsplit("/", 1)[-1], seconds) for path, seconds in self.phases.items()]
+        rows += [("other", self.other(elapsed)), ("total", elapsed)]
+        width = max(len(name) for name, _seconds in rows)
+        return "\n".join(f"{name:<{width}}  {seconds * 1000:9.1f} ms" for name, seconds in rows)
+
+    def summary(self) -> str:
+        """The milliseconds spent in each phase, on one line."""
+        return ", ".join(f"{path} {seconds * 1000:0.1f} ms" for path, seconds in self.phases.items())
+
+    def milliseconds(self) -> dict[str, float]:
+        """The milliseconds spent in each phase, by path."""
+        return {path: round(seconds * 1000, 3) for path, seconds in self.phases.items()}
+
+    def as_dict(self) -> dict[str, Any]:
+        """The milliseconds spent in each phase, by path, and in total, for
+        JSON."""
+        elapsed = self.elapsed
+        return {
+            "phases": self.milliseconds(),
+            "other_ms": round(self.other(elapsed) * 1000, 3),
+            "total_ms": round(elapsed * 1000, 3),
+        }
+
+
+# The phases of the startup, recorded with --profile-startup.
+startup = PhaseTimer(enabled=False)
@@ -18,8 +18,11 @@ from mycli.packages.special.iocommands import (
     is_expanded_output,
     is_pager_enabled,
     is_redirected,
+    is_streaming_enabled,
     is_timing_enabled,
+    is_timing_verbose,
     open_external_editor,
+    output_sinks,
     set_delimiter,
     set_expanded_output,
     set_favorite_queries,
@@ -27,8 +30,10 @@ from mycli.packages.special.iocommands import (
     set_pager,
     set_pager_enabled,
     set_redirect,
+    set_streaming_enabled,
     set_timing_enabled,
     split_queries,
+    split_queries_from_lines,
     unset_once_if_written,
     write_once,
     write_pipe_once,
@@ -68,10 +73,13 @@ __all__: list[str] = [
     'is_llm_command',
     'is_pager_enabled',
     'is_redirected',
+    'is_streaming_enabled',
     'is_timing_enabled',
+    'is_timing_verbose',
     'list_databases',
     'list_tables',
     'open_external_editor',
+    'output_sinks',
     'parse_special_command',
     'register_special_command',
     'set_delimiter',
@@ -81,9 +89,11 @@ __all__: list[str] = [
     'set_pager',
     'set_pager_enabled',
     'set_redirect',
+    'set_streaming_enabled',
     'set_timing_enabled',
     'special_command',
     'split_queries',
+    'split_queries_from_lines',
     'sql_using_llm',
     'status',
     'unset_once_if_written',
@@ -1,10 +1,106 @@
 from __future__ import annotations
 
 import re
-from typing import Generator
+from typing import Generator, Iterable
 
 import sqlparse
 
+# A DELIMITER command at the start of a statement, and its argument.
+delimiter_line_regex = re.compile(r"\s*delimiter\s+(\S+)", re.IGNORECASE)
+
+# Closes a quoted string or identifier, or a comment.
+closing_regex: dict[str, re.Pattern] = {
+    "'": re.compile(r"(?:[^'\\]|\\.)*'", re.DOTALL),
+    '"': re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL),
+    "`": re.compile(r"[^`]*`"),
+    "/*": re.compile(r".*?\*/", re.DOTALL),
+}
+
+
+class StatementSplitter:
+    """Splits SQL fed to it a line at a time into statements.
+
+    Unlike DelimiterCommand._split(), only the statement being read is kept
+    in memory, so that files of any size can be executed as they are read.
+    Delimiters inside strings, quoted identifiers and comments are ignored,
+    and DELIMITER commands at the start of a statement change the delimiter
+    from the next line on.
+
+    """
+
+    def __init__(self, delimiter: str = ";") -> None:
+        self.delimiter = delimiter
+        self._lines: list[str] = []
+        # The quote or comment the last line ended in.
+        self._open: str | None = None
+        # Whether the statement has anything but whitespace and comments.
+        self._has_content = False
+
+    def _tokens(self) -> re.Pattern:
+        # Anything that starts a string, a quoted identifier or a comment, or
+        # ends a statement. A "--" comment needs whitespace after it.
+        return re.compile(rf"""{re.escape(self.delimiter)}|['"`]|--(?=\s|$)|\#|/\*""")
+
+    def feed(self, line: str) -> Generator[str, None, None]:
+        """Yield the statements completed by *line*."""
+        tokens = self._tokens()
+        start = pos = 0
+        while True:
+            if self._open is not None:
+                match = closing_regex[self._open].match(line, pos)
+                if match is None:
+                    break
+                self._open = None
+                pos = match.end()
+                continue
+
+            if not self._has_content:
+                match = delimiter_line_regex.match(line, pos)
+                if match:
+                    # Like the mysql client, the command takes the rest of
+                    # the line.
+                    self.delimiter = match.group(1)
+                    tokens = self._tokens()
+                    self._lines = []
+                    start = pos = match.end()
+                    yield match.group().strip()
+
+            match = tokens.search(line, pos)
+            if not self._has_content and line[pos : match.start() if match else None].strip():
+                self._has_content = True
+            if match is None:
+                break
+
+            token = match.group()
+            pos = match.end()
+            if token == self.delimiter:
+                self._lines.append(line[start : match.start()])
+                if self._has_content:
+                    yield "".join(self._lines).strip()
+                self._lines = []
+                self._has_content = False
+                start = pos
+            elif token in ("--", "#"):
+                # The comment runs to the end of the line.
+                break
+            else:
+                self._open = token
+                # Strings are content, so are /*! ... */ and /*+ ... */
+                # comments, which the server executes.
+                if token != "/*" or line[pos : pos + 1] in ("!", "+"):
+                    self._has_content = True
+
+        self._lines.append(line[start:])
+
+    def close(self) -> Generator[str, None, None]:
+        """Yield the last statement, which had no delimiter after it."""
+        statement = "".join(self._lines).strip()
+        if self._has_content:
+            yield statement
+        self._lines = []
+        self._has_content = False
+        self._open = None
+
 
 class DelimiterCommand:
     def __init__(self) -> None:
@@ -55,6 +151,13 @@ class DelimiterCommand:
                         combined_statement += delimiter
                     queries = self._split(combined_statement)[1:]
 
+    def queries_from_lines(self, lines: Iterable[str]) -> Generator[str, None, None]:
+        """Iterate over the queries in *lines*, as they are read."""
+        splitter = StatementSplitter(self._delimiter)
+        for line in lines:
+            yield from splitter.feed(line)
+        yield from splitter.close()
+
     def set(self, arg: str, **_) -> list[tuple[None, None, None, str]]:
         """Change delimiter.
 
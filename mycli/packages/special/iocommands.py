@@ -5,17 +5,20 @@ import logging
 import os
 import re
 import shlex
+import shutil
 import subprocess
+import tempfile
+import threading
 from time import sleep
-from typing import Any, Generator
+from typing import IO, Any, Generator, Iterable
 
 import click
 from configobj import ConfigObj
 from pymysql.cursors import Cursor
-import pyperclip
 import sqlparse
 
 from mycli.compat import WIN
+from mycli.packages.output_sink import OutputSink
 from mycli.packages.prompt_utils import confirm_destructive_query
 from mycli.packages.special.delimitercommand import DelimiterCommand
 from mycli.packages.special.favoritequeries import FavoriteQueries
@@ -23,18 +26,26 @@ from mycli.packages.special.main import ArgType, special_command
 from mycli.packages.special.utils import handle_cd_command
 
 TIMING_ENABLED = False
+# Whether the timing shows the phases of each query, see toggle_timing().
+TIMING_VERBOSE = False
+STREAMING_ENABLED = False
 use_expanded_output = False
 force_horizontal_output = False
 PAGER_ENABLED = True
-tee_file = None
-once_file = None
-written_to_once_file = False
+tee_file: OutputSink | None = None
+once_file: OutputSink | None = None
 PIPE_ONCE: dict[str, Any] = {
     'process': None,
-    'stdin': [],
+    'sink': None,
+    'readers': [],
+    'stdout': None,
+    'stderr': None,
     'stdout_file': None,
     'stdout_mode': None,
 }
+# The output of a \pipe_once command is kept in memory up to this size, and
+# in a temporary file beyond it.
+PIPE_ONCE_SPOOL_SIZE = 1024 * 1024
 delimiter_command = DelimiterCommand()
 favoritequeries = FavoriteQueries(ConfigObj())
 
@@ -44,9 +55,10 @@ def set_favorite_queries(config):
     favoritequeries = FavoriteQueries(config)
 
 
-def set_timing_enabled(val: bool) -> None:
-    global TIMING_ENABLED
+def set_timing_enabled(val: bool, verbose: bool = False) -> None:
+    global TIMING_ENABLED, TIMING_VERBOSE
     TIMING_ENABLED = val
+    TIMING_VERBOSE = val and verbose
 
 
 def set_pager_enabled(val: bool) -> None:
@@ -88,10 +100,16 @@ def disable_pager() -> list[tuple]:
     return [(None, None, None, "Pager disabled.")]
 
 
-@special_command("\\timing", "\\t", "Toggle timing of commands.", arg_type=ArgType.NO_QUERY, aliases=["\\t"], case_sensitive=True)
-def toggle_timing() -> list[tuple]:
-    global TIMING_ENABLED
-    TIMING_ENABLED = not TIMING_ENABLED
+@special_command("\\timing", "\\t[+]", "Toggle timing of commands.", arg_type=ArgType.PARSED_QUERY, aliases=["\\t"], case_sensitive=True)
+def toggle_timing(arg: str = "", verbose: bool = False, **_) -> list[tuple]:
+    """Toggle timing, or with \\timing+ turn it on along with the time spent
+    on the server, on the network, converting, formatting and rendering."""
+    if arg.strip():
+        return [(None, None, None, "Syntax: \\timing[+].")]
+    if verbose:
+        set_timing_enabled(True, verbose=True)
+        return [(None, None, None, "Timing is on, with the phases of each query.")]
+    set_timing_enabled(not TIMING_ENABLED)
     message = "Timing is "
     message += "on." if TIMING_ENABLED else "off."
     return [(None, None, None, message)]
@@ -101,6 +119,34 @@ def is_timing_enabled() -> bool:
     return TIMING_ENABLED
 
 
+def is_timing_verbose() -> bool:
+    return TIMING_VERBOSE
+
+
+def set_streaming_enabled(val: bool) -> None:
+    global STREAMING_ENABLED
+    STREAMING_ENABLED = val
+
+
+@special_command(
+    "\\streaming",
+    "\\streaming",
+    "Toggle streaming of results without buffering them.",
+    arg_type=ArgType.NO_QUERY,
+    case_sensitive=True,
+)
+def toggle_streaming() -> list[tuple]:
+    global STREAMING_ENABLED
+    STREAMING_ENABLED = not STREAMING_ENABLED
+    message = "Streaming is "
+    message += "on." if STREAMING_ENABLED else "off."
+    return [(None, None, None, message)]
+
+
+def is_streaming_enabled() -> bool:
+    return STREAMING_ENABLED
+
+
 def set_expanded_output(val: bool) -> None:
     global use_expanded_output
     use_expanded_output = val
@@ -215,6 +261,9 @@ def get_clip_query(sql: str) -> str:
 def copy_query_to_clipboard(sql: str | None = None) -> str | None:
     """Send query to the clipboard."""
 
+    # Imported here, as it probes the clipboard tools of the platform.
+    import pyperclip
+
     sql = sql or ""
     message = None
 
@@ -378,7 +427,7 @@ def set_tee(arg: str, **_) -> list[tuple]:
     global tee_file
 
     try:
-        tee_file = open(*parseargfile(arg))
+        tee_file = OutputSink("tee", open(*parseargfile(arg)))
     except (IOError, OSError) as e:
         raise OSError(f"Cannot write to file '{e.filename}': {e.strerror}") from e
 
@@ -399,22 +448,19 @@ def no_tee(arg: str, **_) -> list[tuple]:
 
 
 def write_tee(output: str) -> None:
-    global tee_file
     if tee_file:
-        click.echo(output, file=tee_file, nl=False)
-        click.echo("\n", file=tee_file, nl=False)
+        tee_file.write_line(output)
         tee_file.flush()
 
 
 @special_command("\\once", "\\o [-o] filename", "Append next result to an output file (overwrite using -o).", aliases=["\\o"])
 def set_once(arg: str, **_) -> list[tuple]:
-    global once_file, written_to_once_file
+    global once_file
 
     try:
-        once_file = open(*parseargfile(arg))
+        once_file = OutputSink("once", open(*parseargfile(arg)), skip_empty=True)
     except (IOError, OSError) as e:
         raise OSError(f"Cannot write to file '{e.filename}': {e.strerror}") from e
-    written_to_once_file = False
 
     return [(None, None, None, "")]
 
@@ -424,19 +470,25 @@ def is_redirected() -> bool:
 
 
 def write_once(output: str) -> None:
-    global once_file, written_to_once_file
-    if output and once_file:
-        click.echo(output, file=once_file, nl=False)
-        click.echo("\n", file=once_file, nl=False)
+    if once_file:
+        once_file.write_line(output)
         once_file.flush()
-        written_to_once_file = True
+
+
+def output_sinks() -> list[OutputSink]:
+    """The tee, once and pipe_once destinations results are copied to.
+
+    Lines written to them are buffered until they are flushed.
+
+    """
+    return [sink for sink in (tee_file, once_file, PIPE_ONCE['sink']) if sink]
 
 
 def unset_once_if_written(post_redirect_command: str) -> None:
     """Unset the once file, if it has been written to."""
-    global once_file, written_to_once_file
-    if written_to_once_file and once_file:
-        once_filename = once_file.name
+    global once_file
+    if once_file and once_file.lines:
+        once_filename = once_file.file.name
         once_file.close()
         once_file = None
         _run_post_redirect_hook(post_redirect_command, once_filename)
@@ -469,7 +521,6 @@ def set_pipe_once(arg: str, **_) -> list[tuple]:
     else:
         # to support chaining
         pipe_once_cmd = ['sh', '-c', arg]
-    PIPE_ONCE['stdin'] = []
     PIPE_ONCE['process'] = subprocess.Popen(
         pipe_once_cmd,
         stdin=subprocess.PIPE,
@@ -478,44 +529,93 @@ def set_pipe_once(arg: str, **_) -> list[tuple]:
         encoding="UTF-8",
         universal_newlines=True,
     )
+    # Read the output of the command while the result is written to it, so
+    # that neither side blocks on a full pipe.
+    PIPE_ONCE['sink'] = OutputSink(
+        "pipe_once",
+        PIPE_ONCE['process'].stdin,
+        skip_empty=True,
+        # The command has stopped reading, like head does; the rest of the
+        # result is dropped.
+        ignored_errors=(BrokenPipeError, ValueError),
+    )
+    PIPE_ONCE['stdout'] = _spooled_file()
+    PIPE_ONCE['stderr'] = _spooled_file()
+    PIPE_ONCE['readers'] = [
+        _start_reader(PIPE_ONCE['process'].stdout, PIPE_ONCE['stdout']),
+        _start_reader(PIPE_ONCE['process'].stderr, PIPE_ONCE['stderr']),
+    ]
     return [(None, None, None, "")]
 
 
+def _spooled_file() -> IO[str]:
+    return tempfile.SpooledTemporaryFile(max_size=PIPE_ONCE_SPOOL_SIZE, mode="w+", encoding="UTF-8")
+
+
+def _start_reader(stream: IO[str], spool: IO[str]) -> threading.Thread:
+    reader = threading.Thread(target=shutil.copyfileobj, args=(stream, spool), name="pipe_once_reader", daemon=True)
+    reader.start()
+    return reader
+
+
 def write_pipe_once(line: str) -> None:
-    if line and PIPE_ONCE['process']:
-        PIPE_ONCE['stdin'].append(line)
+    if PIPE_ONCE['sink']:
+        PIPE_ONCE['sink'].write_line(line)
 
 
 def flush_pipe_once_if_written(post_redirect_command: str) -> None:
     """Flush the pipe_once cmd, if lines have been written."""
     if not PIPE_ONCE['process']:
         return
-    if not PIPE_ONCE['stdin']:
+    if not PIPE_ONCE['sink'].lines:
         return
+    process = PIPE_ONCE['process']
+    PIPE_ONCE['sink'].flush()
     try:
-        (stdout_data, stderr_data) = PIPE_ONCE['process'].communicate(input='\n'.join(PIPE_ONCE['stdin']) + '\n', timeout=60)
-    except subprocess.TimeoutExpired:
-        PIPE_ONCE['process'].kill()
-        (stdout_data, stderr_data) = PIPE_ONCE['process'].communicate()
-    if stdout_data:
-        if PIPE_ONCE['stdout_file']:
-            with open(PIPE_ONCE['stdout_file'], PIPE_ONCE['stdout_mode']) as f:
-                print(stdout_data, file=f)
-            _run_post_redirect_hook(post_redirect_command, PIPE_ONCE['stdout_file'])
-        else:
-            click.secho(stdout_data.rstrip('\n'))
-    if stderr_data:
-        click.secho(stderr_data.rstrip('\n'), err=True, fg='red')
-    if returncode := PIPE_ONCE['process'].returncode:
+        process.stdin.close()
+    except BrokenPipeError:
+        pass
+    process.wait()
+    for reader in PIPE_ONCE['readers']:
+        reader.join()
+    stdout, stderr = PIPE_ONCE['stdout'], PIPE_ONCE['stderr']
+    try:
+        if stdout.tell():
+            stdout.seek(0)
+            if PIPE_ONCE['stdout_file']:
+                with open(PIPE_ONCE['stdout_file'], PIPE_ONCE['stdout_mode']) as f:
+                    shutil.copyfileobj(stdout, f)
+                    f.write('\n')
+                _run_post_redirect_hook(post_redirect_command, PIPE_ONCE['stdout_file'])
+            else:
+                _echo_stripped(stdout)
+        if stderr.tell():
+            stderr.seek(0)
+            click.secho(stderr.read().rstrip('\n'), err=True, fg='red')
+    finally:
+        stdout.close()
+        stderr.close()
         PIPE_ONCE['process'] = None
-        PIPE_ONCE['stdin'] = []
+        PIPE_ONCE['sink'] = None
+        PIPE_ONCE['readers'] = []
+        PIPE_ONCE['stdout'] = None
+        PIPE_ONCE['stderr'] = None
         PIPE_ONCE['stdout_file'] = None
         PIPE_ONCE['stdout_mode'] = None
+    if returncode := process.returncode:
         raise OSError(f'process exited with nonzero code {returncode}')
-    PIPE_ONCE['process'] = None
-    PIPE_ONCE['stdin'] = []
-    PIPE_ONCE['stdout_file'] = None
-    PIPE_ONCE['stdout_mode'] = None
+
+
+def _echo_stripped(stream: IO[str], chunk_size: int = 64 * 1024) -> None:
+    """Echo *stream* in chunks, without its trailing newlines."""
+    newlines = ''
+    while chunk := stream.read(chunk_size):
+        stripped = chunk.rstrip('\n')
+        if stripped:
+            click.echo(newlines + stripped, nl=False)
+            newlines = ''
+        newlines += chunk[len(stripped) :]
+    click.echo()
 
 
 @special_command("watch", "watch [seconds] [-c] query", "Executes the query every [seconds] seconds (by default 5).")
@@ -593,3 +693,9 @@ def get_current_delimiter() -> str:
 def split_queries(input_str: str) -> Generator[str, None, None]:
     for query in delimiter_command.queries_iter(input_str):
         yield query
+
+
+def split_queries_from_lines(lines: Iterable[str]) -> Generator[str, None, None]:
+    """Split SQL into queries as it is read, a line at a time."""
+    for query in delimiter_command.queries_from_lines(lines):
+        yield query
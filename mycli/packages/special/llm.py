@@ -11,28 +11,9 @@ from time import time
 from typing import Any
 
 import click
-
-try:
-    if not os.environ.get('MYCLI_LLM_OFF'):
-        import llm
-
-        LLM_IMPORTED = True
-    else:
-        LLM_IMPORTED = False
-except ImportError:
-    LLM_IMPORTED = False
-try:
-    if not os.environ.get('MYCLI_LLM_OFF'):
-        from llm.cli import cli
-
-        LLM_CLI_IMPORTED = True
-    else:
-        LLM_CLI_IMPORTED = False
-except ImportError:
-    LLM_CLI_IMPORTED = False
 from pymysql.cursors import Cursor
 
-from mycli.packages.special.main import Verbosity, parse_special_command
+from mycli.packages.special.main import LLM_IMPORTED, Verbosity, parse_special_command
 
 log = logging.getLogger(__name__)
 
@@ -84,12 +65,23 @@ def run_external_cmd(
         sys.argv = original_args
 
 
+def __getattr__(name: str) -> Any:
+    # llm is slow to import, and only imported once used.
+    if name == "llm" and LLM_IMPORTED:
+        import llm
+
+        return llm
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def _build_command_tree(cmd) -> dict[str, Any] | None:
     tree: dict[str, Any] | None = {}
     assert isinstance(tree, dict)
     if isinstance(cmd, click.Group):
         for name, subcmd in cmd.commands.items():
             if cmd.name == "models" and name == "default":
+                import llm
+
                 tree[name] = {x.model_id: None for x in llm.get_models()}
             else:
                 tree[name] = _build_command_tree(subcmd)
@@ -102,15 +94,23 @@ def build_command_tree(cmd) -> dict[str, Any]:
     return _build_command_tree(cmd) or {}
 
 
-# Generate the command tree for autocompletion
-COMMAND_TREE = build_command_tree(cli) if LLM_CLI_IMPORTED is True else {}
+@functools.cache
+def command_tree() -> dict[str, Any]:
+    """The command tree for autocompletion, generated when first needed."""
+    if not LLM_IMPORTED:
+        return {}
+    try:
+        from llm.cli import cli
+    except ImportError:
+        return {}
+    return build_command_tree(cli)
 
 
 def get_completions(
     tokens: list[str],
     tree: dict[str, Any] | None = None,
 ) -> list[str]:
-    tree = tree or COMMAND_TREE
+    tree = tree or command_tree()
     for token in tokens:
         if token.startswith("-"):
             continue
@@ -209,6 +209,8 @@ def ensure_mycli_template(replace: bool = False) -> None:
 
 @functools.cache
 def cli_commands() -> list[str]:
+    from llm.cli import cli
+
     return list(cli.commands.keys())
 
 
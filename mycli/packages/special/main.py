@@ -1,20 +1,15 @@
 from collections import namedtuple
 from enum import Enum
+from importlib.util import find_spec
 import logging
 import os
 from typing import Callable
 
-try:
-    if not os.environ.get('MYCLI_LLM_OFF'):
-        import llm  # noqa: F401
-
-        LLM_IMPORTED = True
-    else:
-        LLM_IMPORTED = False
-except ImportError:
-    LLM_IMPORTED = False
 from pymysql.cursors import Cursor
 
+# llm is slow to import, so it is only looked up here, and imported once used.
+LLM_IMPORTED = not os.environ.get('MYCLI_LLM_OFF') and find_spec("llm") is not None
+
 logger = logging.getLogger(__name__)
 
 COMMANDS = {}
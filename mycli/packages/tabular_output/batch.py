@@ -0,0 +1,152 @@
+"""Block-at-a-time formatting of the delimited formats used in batch mode."""
+
+from __future__ import annotations
+
+import csv
+import itertools
+from typing import Any, Iterable, Iterator, Sequence
+
+from cli_helpers.compat import HAS_PYGMENTS, Token, float_types
+from cli_helpers.tabular_output import TabularOutputFormatter
+from cli_helpers.utils import bytes_to_string, filter_dict_by_key, style_field
+
+supported_formats = (
+    "csv",
+    "csv-tab",
+    "csv-noheader",
+    "csv-tab-noheader",
+    "tsv",
+    "tsv_noheader",
+)
+
+# The arguments the csv adapter passes on to csv.writer().
+csv_keys = (
+    "dialect",
+    "delimiter",
+    "doublequote",
+    "escapechar",
+    "quotechar",
+    "quoting",
+    "skipinitialspace",
+    "strict",
+)
+
+
+def is_supported(format_name: str) -> bool:
+    return format_name in supported_formats
+
+
+class _Lines(list):
+    """A file for csv.writer() which keeps each row written as a line."""
+
+    write = list.append
+
+
+def format_output(
+    formatter: TabularOutputFormatter,
+    rows: Iterable,
+    headers: list[str],
+    column_types: list[type],
+    format_name: str | None = None,
+    align_decimals: bool = False,
+    chunk_size: int = 1000,
+    **kwargs,
+) -> Iterator[str]:
+    """Format *rows* like TabularOutputFormatter.format_output() would, but
+    yield blocks of *chunk_size* lines, each line ending in a newline.
+
+    The adapters and their preprocessors handle one value at a time. Here
+    the rows of a block are turned into columns, and each column is only
+    converted as far as the types of its values require. *align_decimals*
+    stands for the preprocessor of the same name, which needs every row up
+    front.
+
+    """
+    format_name = format_name or formatter.format_name
+    (_, _, _, format_kwargs) = formatter._output_formats[format_name]
+    fkwargs: dict[str, Any] = {**format_kwargs, **kwargs}
+
+    missing_value = fkwargs.get("missing_value", "")
+    style = fkwargs.get("style")
+    if style and HAS_PYGMENTS:
+        missing_value = style_field(fkwargs.get("missing_value_token", Token.Output.Null), missing_value, style)
+
+    widths: list[int] = []
+    if align_decimals and float in column_types:
+        rows = list(rows)
+        widths = _decimal_points(rows, column_types)
+
+    tsv = format_name.startswith("tsv")
+    if tsv:
+
+        def format_lines(rows: Iterable) -> list[str]:
+            return list(map("\t".join, rows))
+
+    else:
+        ckwargs: dict[str, Any] = {"delimiter": "\t" if format_name.startswith("csv-tab") else ",", "lineterminator": ""}
+        ckwargs.update(filter_dict_by_key(fkwargs, csv_keys))
+        lines = _Lines()
+        writer = csv.writer(lines, **ckwargs)
+
+        def format_lines(rows: Iterable) -> list[str]:
+            lines.clear()
+            writer.writerows(rows)
+            return lines
+
+    if "noheader" not in format_name:
+        header = [_convert_column([h], missing_value, tsv)[0] for h in headers]
+        yield format_lines([header])[0] + "\n"
+
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, chunk_size)):
+        columns: list[Sequence] = list(zip(*chunk))
+        for i, width in enumerate(widths):
+            if width:
+                columns[i] = _align_column(columns[i], width)
+        columns = [_convert_column(column, missing_value, tsv) for column in columns]
+        yield "\n".join(format_lines(zip(*columns))) + "\n"
+
+
+def _convert_column(column: Sequence, missing_value: str, tsv: bool) -> Sequence:
+    """Apply override_missing_value(), bytes_to_string() and, for tsv, the
+    string conversion and escaping of the adapter to *column*."""
+    types = set(map(type, column))
+    if type(None) in types:
+        column = [missing_value if v is None else v for v in column]
+    if bytes in types:
+        column = [bytes_to_string(v) if isinstance(v, bytes) else v for v in column]
+    if tsv:
+        if types - {str}:
+            column = list(map(str, column))
+        text = "".join(column)
+        if "\n" in text or "\t" in text:
+            column = [v.replace("\n", r"\n").replace("\t", r"\t") for v in column]
+    return column
+
+
+def _intlen(value: str) -> int:
+    # cli_helpers.utils.intlen(), which is called for every value.
+    pos = value.find(".")
+    return len(value) if pos < 0 else pos
+
+
+def _decimal_points(rows: list, column_types: list[type]) -> list[int]:
+    """The widths of the integer parts in each column, as align_decimals()
+    computes them."""
+    widths = [0] * len(column_types)
+    for i, column_type in enumerate(column_types):
+        if column_type is float:
+            widths[i] = max(map(_intlen, [str(row[i]) for row in rows if type(row[i]) in float_types]), default=0)
+    return widths
+
+
+def _align_column(column: Sequence, width: int) -> list:
+    aligned = []
+    for v in column:
+        if type(v) in float_types:
+            v = str(v)
+            pos = v.find(".")
+            aligned.append((width - (len(v) if pos < 0 else pos)) * " " + v)
+        else:
+            aligned.append(v)
+    return aligned
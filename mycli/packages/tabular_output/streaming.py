@@ -0,0 +1,82 @@
+"""Row-by-row formatting for results that must not be held in memory."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+from cli_helpers.tabular_output import TabularOutputFormatter
+from cli_helpers.utils import unique_items
+
+from mycli.packages.tabular_output import sql_format
+
+# Formats whose adapters produce output one row at a time. Table formats
+# such as ascii need every row up front to compute the column widths.
+supported_formats = (
+    "csv",
+    "csv-tab",
+    "csv-noheader",
+    "csv-tab-noheader",
+    "tsv",
+    "tsv_noheader",
+    "jsonl",
+    "jsonl_escaped",
+    "vertical",
+) + sql_format.supported_formats
+
+
+def is_supported(format_name: str) -> bool:
+    return format_name in supported_formats
+
+
+def format_output(
+    formatter: TabularOutputFormatter,
+    data: Iterable,
+    headers: list[str] | None,
+    format_name: str | None = None,
+    preprocessors: tuple = (),
+    column_types: list[type] | None = None,
+    **kwargs,
+) -> Iterable[str]:
+    """Format *data* like TabularOutputFormatter.format_output(), without
+    turning it into a list first.
+
+    Formats that cannot be streamed, or calls without *column_types*, fall
+    back to the regular formatter.
+
+    """
+    format_name = format_name or formatter.format_name
+    if not is_supported(format_name) or column_types is None:
+        return formatter.format_output(
+            data,
+            headers,
+            format_name=format_name,
+            preprocessors=preprocessors,
+            column_types=column_types,
+            **kwargs,
+        )
+
+    (_, format_preprocessors, handler, format_kwargs) = formatter._output_formats[format_name]
+    fkwargs: dict[str, Any] = {**format_kwargs, **kwargs}
+
+    rows: Iterable = iter(data)
+    for f in unique_items(preprocessors + format_preprocessors):
+        rows, headers = f(rows, headers, column_types=column_types, **fkwargs)
+
+    if format_name == "vertical":
+        return _vertical_rows(handler, rows, headers, column_types, fkwargs)
+
+    return handler(rows, headers, column_types=column_types, **fkwargs)
+
+
+def _vertical_rows(
+    handler: Any,
+    rows: Iterable,
+    headers: list[str] | None,
+    column_types: list[type],
+    fkwargs: dict[str, Any],
+) -> Iterator[str]:
+    # The vertical adapter builds every row before yielding the first one,
+    # so feed it a single row at a time and number the rows ourselves.
+    sep_title = fkwargs.pop("sep_title", "{n}. row")
+    for n, row in enumerate(rows, 1):
+        yield from handler([row], headers, column_types=column_types, sep_title=sep_title.replace("{n}", str(n)), **fkwargs)
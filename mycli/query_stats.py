@@ -0,0 +1,206 @@
+"""The latency of the statements run from mycli, by fingerprint, kept in a
+SQLite database across sessions, to spot regressions without access to the
+performance_schema of the server."""
+
+from __future__ import annotations
+
+import atexit
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import logging
+import math
+import os
+import threading
+from typing import TYPE_CHECKING, Iterator
+
+from mycli.packages.parseutils import query_fingerprint
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_logger = logging.getLogger(__name__)
+
+# Ten histogram buckets per power of ten of milliseconds, each about 26%
+# wider than the previous one, from a microsecond on.
+_BUCKETS_PER_DECADE = 10
+_MIN_BUCKET = -3 * _BUCKETS_PER_DECADE
+
+_SCHEMA = """
+create table if not exists query_stats (
+    fingerprint text primary key,
+    count integer not null,
+    total_ms real not null,
+    max_ms real not null,
+    rows integer not null,
+    histogram text not null,
+    last_run text not null
+);
+create index if not exists query_stats_count on query_stats (count);
+create index if not exists query_stats_mean on query_stats (total_ms / count);
+"""
+
+
+class QueryStats:
+    """The count, total, maximum and histogram of the durations, and the
+    rows, of the statements with the same fingerprint, in the SQLite database
+    at *path*.
+
+    Durations are kept in memory until flush_size of them are waiting, and
+    then added to the database in one transaction by a background thread, or
+    until flush() is called, e.g. on exit. Other sessions may be writing to
+    the database as well.
+
+    """
+
+    # The columns of the rows returned by top().
+    headers = ["Query", "Count", "Mean (ms)", "P95 (ms)", "Max (ms)", "Total (ms)", "Mean rows", "Last run"]
+    flush_size = 100
+    # How long to wait for another session to finish writing.
+    timeout = 1.0
+
+    def __init__(self, path: str) -> None:
+        self.path = os.path.expanduser(path)
+        # (statement, milliseconds, rows, when it ran)
+        self._pending: list[tuple[str, float, int, datetime]] = []
+        self._lock = threading.Lock()
+        self._close_at_exit = False
+        self._flusher: threading.Thread | None = None
+
+    def record(self, statement: str, milliseconds: float, rows: int | None) -> None:
+        """Count a run of *statement* which took *milliseconds* and returned
+        *rows*."""
+        with self._lock:
+            self._pending.append((statement, milliseconds, rows or 0, datetime.now()))
+            if not self._close_at_exit:
+                atexit.register(self.close)
+                self._close_at_exit = True
+            if len(self._pending) < self.flush_size or (self._flusher is not None and self._flusher.is_alive()):
+                return
+            # Not waited for, nor for the lock of the database.
+            self._flusher = threading.Thread(target=self.flush, name="query stats", daemon=True)
+            self._flusher.start()
+
+    def flush(self) -> None:
+        """Add the durations recorded so far to the database."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        runs: dict[str, list[tuple[float, int, datetime]]] = {}
+        for statement, milliseconds, rows, ran in pending:
+            runs.setdefault(query_fingerprint(statement), []).append((milliseconds, rows, ran))
+        # Imported once needed, as it adds to the startup.
+        import sqlite3
+
+        try:
+            with self._connection() as conn:
+                # Read and written at once, as other sessions may write too.
+                conn.execute("begin immediate")
+                for fingerprint, durations in runs.items():
+                    self._add(conn, fingerprint, durations)
+                conn.execute("commit")
+        except (OSError, sqlite3.Error) as e:
+            _logger.error("Unable to write the query stats: %r", e)
+
+    def close(self) -> None:
+        """Wait for the background flush, if any, then flush the rest."""
+        flusher = self._flusher
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def top(self, order: str, limit: int) -> list[tuple]:
+        """The *limit* slowest, on average, or most frequent fingerprints,
+        for *order* "slow" or "frequent", as rows with the headers."""
+        self.flush()
+        order_by = "total_ms / count desc" if order == "slow" else "count desc, total_ms desc"
+        import sqlite3
+
+        try:
+            with self._connection() as conn:
+                found = conn.execute(
+                    f"select fingerprint, count, total_ms, max_ms, rows, histogram, last_run from query_stats order by {order_by} limit ?",
+                    (limit,),
+                ).fetchall()
+        except (OSError, sqlite3.Error) as e:
+            _logger.error("Unable to read the query stats: %r", e)
+            return []
+        return [
+            (
+                fingerprint,
+                count,
+                round(total_ms / count, 1),
+                round(min(percentile(json.loads(histogram), 0.95), max_ms), 1),
+                round(max_ms, 1),
+                round(total_ms, 1),
+                round(rows / count, 1),
+                last_run,
+            )
+            for fingerprint, count, total_ms, max_ms, rows, histogram, last_run in found
+        ]
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        import sqlite3
+
+        # Transactions are begun explicitly.
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        try:
+            conn.executescript(_SCHEMA)
+            yield conn
+        finally:
+            # Rolls back what was not committed.
+            conn.close()
+
+    @staticmethod
+    def _add(conn: sqlite3.Connection, fingerprint: str, durations: list[tuple[float, int, datetime]]) -> None:
+        found = conn.execute(
+            "select count, total_ms, max_ms, rows, histogram, last_run from query_stats where fingerprint = ?", (fingerprint,)
+        ).fetchone()
+        count, total_ms, max_ms, rows, histogram, last_run = found or (0, 0.0, 0.0, 0, "{}", "")
+        buckets = Counter(json.loads(histogram))
+        buckets.update(str(bucket(milliseconds)) for milliseconds, _rows, _ran in durations)
+        conn.execute(
+            "insert or replace into query_stats values (?, ?, ?, ?, ?, ?, ?)",
+            (
+                fingerprint,
+                count + len(durations),
+                total_ms + sum(milliseconds for milliseconds, _rows, _ran in durations),
+                max(max_ms, max(milliseconds for milliseconds, _rows, _ran in durations)),
+                rows + sum(run_rows for _milliseconds, run_rows, _ran in durations),
+                json.dumps(buckets, separators=(",", ":")),
+                # Another session may have run it since.
+                max(last_run, max(ran for _milliseconds, _rows, ran in durations).isoformat(timespec="seconds")),
+            ),
+        )
+
+
+def bucket(milliseconds: float) -> int:
+    """The histogram bucket of a duration, whose upper bound is
+    upper_bound() of it."""
+    if milliseconds <= 0:
+        return _MIN_BUCKET
+    return max(math.ceil(math.log10(milliseconds) * _BUCKETS_PER_DECADE), _MIN_BUCKET)
+
+
+def upper_bound(index: int) -> float:
+    return 10 ** (index / _BUCKETS_PER_DECADE)
+
+
+def percentile(histogram: dict[str, int], fraction: float) -> float:
+    """The upper bound of the bucket of *histogram* where the *fraction* of
+    the durations with the lowest ones ends."""
+    buckets = sorted((int(index), count) for index, count in histogram.items())
+    wanted = fraction * sum(count for _index, count in buckets)
+    seen = 0
+    for index, count in buckets:
+        seen += count
+        if seen >= wanted:
+            return upper_bound(index)
+    return 0.0
@@ -0,0 +1,97 @@
+"""The completion metadata of the schemas used recently, kept across
+completion refreshes, so that switching back to a schema or completing the
+objects of another one does not read it from the server again."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+import sys
+import threading
+
+_logger = logging.getLogger(__name__)
+
+# The kinds of objects of a schema, as in SQLCompleter.dbmetadata.
+KINDS = ("tables", "views", "functions")
+
+# The approximate size of an empty str, and of an entry of a dict or a list.
+_STR_SIZE = sys.getsizeof("")
+_ENTRY_SIZE = 32
+
+
+class SchemaMetadata:
+    """Metadata by schema name, least recently used first. Each schema maps
+    the KINDS to dicts of object names, as in SQLCompleter.dbmetadata.
+
+    The least recently used schemas are forgotten once the metadata takes more
+    than *budget* bytes, as estimated by metadata_size(), except for the one
+    used last.
+
+    """
+
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self._schemas: OrderedDict[str, dict[str, dict]] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._schemas)
+
+    def __contains__(self, schema: str) -> bool:
+        return schema in self._schemas
+
+    def __str__(self) -> str:
+        return f"{len(self)} schemas, {self.size} bytes, {self.hits} hits, {self.misses} misses"
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, schema: str) -> dict[str, dict] | None:
+        """Return the metadata of *schema*, if it is kept, as the most
+        recently used."""
+        with self._lock:
+            metadata = self._schemas.get(schema)
+            if metadata is None:
+                self.misses += 1
+                return None
+            self._schemas.move_to_end(schema)
+            self.hits += 1
+            return metadata
+
+    def put(self, schema: str, metadata: dict[str, dict]) -> None:
+        """Keep *metadata* as that of *schema*, the most recently used."""
+        size = metadata_size(metadata)
+        with self._lock:
+            self._schemas[schema] = metadata
+            self._schemas.move_to_end(schema)
+            self._sizes[schema] = size
+            while len(self._schemas) > 1 and self.size > self.budget:
+                evicted, _ = self._schemas.popitem(last=False)
+                del self._sizes[evicted]
+                _logger.debug("Forgetting the completion metadata of %r", evicted)
+
+    def discard(self, schema: str) -> None:
+        with self._lock:
+            self._schemas.pop(schema, None)
+            self._sizes.pop(schema, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._schemas.clear()
+            self._sizes.clear()
+
+
+def metadata_size(metadata: dict[str, dict]) -> int:
+    """Estimate the memory taken by the object names, and column names, of
+    *metadata*, without measuring every object."""
+    size = 0
+    for objects in metadata.values():
+        for name, columns in objects.items():
+            size += _STR_SIZE + len(name) + _ENTRY_SIZE
+            for column in columns or ():
+                size += _STR_SIZE + len(column) + _ENTRY_SIZE
+    return size
@@ -1,18 +1,22 @@
 from __future__ import annotations
 
-from collections import Counter
+from collections import Counter, OrderedDict
+from functools import partial
 import logging
 import re
-from typing import Any, Collection, Generator, Iterable, Literal
+import threading
+from typing import Any, Callable, Collection, Generator, Iterable, Literal
 
 from prompt_toolkit.completion import CompleteEvent, Completer, Completion
 from prompt_toolkit.completion.base import Document
 
 from mycli.packages.completion_engine import suggest_type
+from mycli.packages.completion_index import CompletionIndex
 from mycli.packages.filepaths import complete_path, parse_path, suggest_path
 from mycli.packages.parseutils import last_word
 from mycli.packages.special import llm
 from mycli.packages.special.favoritequeries import FavoriteQueries
+from mycli.schema_metadata import KINDS, SchemaMetadata
 
 _logger = logging.getLogger(__name__)
 
@@ -904,9 +908,27 @@ class SQLCompleter(Completer):
         smart_completion: bool = True,
         supported_formats: tuple = (),
         keyword_casing: str = "auto",
+        lazy_columns: bool = False,
+        lazy_columns_limit: int = 1000,
+        schemas: SchemaMetadata | None = None,
     ) -> None:
         super(self.__class__, self).__init__()
         self.smart_completion = smart_completion
+        # Whether the columns of a table are only loaded, by column_loader,
+        # once a statement refers to it. Those of at most lazy_columns_limit
+        # tables are kept.
+        self.lazy_columns = lazy_columns
+        self.lazy_columns_limit = lazy_columns_limit
+        self.column_loader: Callable[[str, list[str]], Iterable[tuple[str, str]]] | None = None
+        # The metadata of the schemas used recently, shared by the successive
+        # completers. That of schemas other than the current one is loaded by
+        # schema_loader when a statement qualifies a name with them.
+        self.schemas = schemas
+        self.schema_loader: Callable[[str, bool], tuple[Iterable[tuple], Iterable[tuple]]] | None = None
+        # The threads loading metadata in the background, see load_columns()
+        # and load_schema(), and what to call once one is done.
+        self._loads: dict[tuple, threading.Thread] = {}
+        self.loaded_callback: Callable[[], None] | None = None
         self.reserved_words = set()
         for x in self.keywords:
             self.reserved_words.update(x.split())
@@ -917,6 +939,8 @@ class SQLCompleter(Completer):
         if keyword_casing not in ("upper", "lower", "auto"):
             keyword_casing = "auto"
         self.keyword_casing = keyword_casing
+        # Held while a refresh adds to a completer which is already in use.
+        self.lock = threading.RLock()
         self.reset_completions()
 
     def escape_name(self, name: str) -> str:
@@ -942,6 +966,7 @@ class SQLCompleter(Completer):
 
     def extend_database_names(self, databases: list[str]) -> None:
         self.databases.extend(databases)
+        self._indexes.clear()
 
     def extend_keywords(self, keywords: list[str], replace: bool = False) -> None:
         if replace:
@@ -949,21 +974,25 @@ class SQLCompleter(Completer):
         else:
             self.keywords.extend(keywords)
         self.all_completions.update(keywords)
+        self._indexes.clear()
 
     def extend_show_items(self, show_items: Iterable[tuple]) -> None:
         for show_item in show_items:
             self.show_items.extend(show_item)
             self.all_completions.update(show_item)
+        self._indexes.clear()
 
     def extend_change_items(self, change_items: Iterable[tuple]) -> None:
         for change_item in change_items:
             self.change_items.extend(change_item)
             self.all_completions.update(change_item)
+        self._indexes.clear()
 
     def extend_users(self, users: Iterable[tuple]) -> None:
         for user in users:
             self.users.extend(user)
             self.all_completions.update(user)
+        self._indexes.clear()
 
     def extend_schemata(self, schema: str | None) -> None:
         if schema is None:
@@ -975,8 +1004,9 @@ class SQLCompleter(Completer):
         for metadata in self.dbmetadata.values():
             metadata[schema] = {}
         self.all_completions.update(schema)
+        self._indexes.clear()
 
-    def extend_relations(self, data: list[tuple[str, str]], kind: Literal['tables', 'views']) -> None:
+    def extend_relations(self, data: Iterable[tuple[str, ...]], kind: Literal['tables', 'views']) -> None:
         """Extend metadata for tables or views
 
         :param data: list of (rel_name, ) tuples
@@ -994,6 +1024,7 @@ class SQLCompleter(Completer):
             except KeyError:
                 _logger.error("%r %r listed in unrecognized schema %r", kind, relname[0], self.dbname)
             self.all_completions.add(relname[0])
+        self._indexes.clear()
 
     def extend_columns(self, column_data: list[tuple[str, str]], kind: Literal['tables', 'views']) -> None:
         """Extend column metadata
@@ -1015,12 +1046,212 @@ class SQLCompleter(Completer):
                 continue
             metadata[self.dbname][relname].append(column)
             self.all_completions.add(column)
+        self._indexes.clear()
+
+    def refresh_relations(
+        self,
+        relnames: Iterable[str],
+        column_data: list[tuple[str, str]],
+        kind: Literal['tables', 'views'],
+    ) -> None:
+        """Replace the metadata of the given tables or views
+
+        Relations in *relnames* without any columns in *column_data* are
+        considered dropped and removed.
+
+        :param relnames: unescaped names of the relations to replace
+        :param column_data: list of (rel_name, column_name) tuples
+        :param kind: either 'tables' or 'views'
+        :return:
+        """
+        # Also changed by the loads in the background.
+        with self.lock:
+            metadata = self.dbmetadata[kind].get(self.dbname)
+            if metadata is None:
+                return
+
+            # Table names are case-insensitive on most servers, so the names from
+            # a statement may not have the same case as the existing ones.
+            stale = {name.lower() for name in self.escaped_names(list(relnames))}
+            removed = [relname for relname in metadata if relname.lower() in stale]
+            for relname in removed:
+                del metadata[relname]
+            self._indexes.clear()
+
+            self.extend_relations(column_data, kind)
+            self.extend_columns(column_data, kind)
+
+            # Names of dropped or renamed relations are no longer suggested,
+            # unless they are still the name of something else.
+            in_use = set(self.keywords) | set(self.functions)
+            for rel_kind in ("tables", "views"):
+                for schema, relations in self.dbmetadata[rel_kind].items():
+                    in_use.add(schema)
+                    for relname, columns in relations.items():
+                        in_use.add(relname)
+                        in_use.update(columns)
+            self.all_completions.difference_update(set(removed) - in_use)
+
+    def set_column_loader(self, loader: Callable[[str, list[str]], Iterable[tuple[str, str]]]) -> None:
+        self.column_loader = loader
+
+    def load_columns(self, scoped_tbls: list[tuple[str | None, str, str | None]]) -> None:
+        """Start loading the columns of the tables in *scoped_tbls* which are
+        not loaded yet, in the background, and forget those of the least
+        recently used tables beyond lazy_columns_limit once they are loaded."""
+        if self.column_loader is None:
+            return
+
+        # The names to query by schema, and their keys in the metadata.
+        missing: dict[str, dict[str, str]] = {}
+        for schema, relname, _alias in scoped_tbls:
+            schema = schema or self.dbname
+            metadata = self.schema_objects(schema, "tables")
+            for key in (relname, self.escape_name(relname)):
+                if key in metadata:
+                    if (schema, key) in self._loaded_columns:
+                        self._loaded_columns.move_to_end((schema, key))
+                    elif ("columns", schema, key) not in self._loads:
+                        missing.setdefault(schema, {})[relname] = key
+                    break
+
+        for schema, keys in missing.items():
+            self._load_in_background(
+                [("columns", schema, key) for key in keys.values()],
+                partial(self._load_columns, self.column_loader, schema, keys),
+            )
+
+    def _load_columns(self, loader: Callable[[str, list[str]], Iterable[tuple[str, str]]], schema: str, keys: dict[str, str]) -> None:
+        try:
+            column_data = list(loader(schema, sorted(keys)))
+        except Exception as e:
+            # The tables count as loaded all the same, rather than querying
+            # the server again on every keystroke.
+            _logger.error("Failed to load the columns of %r in %r: %r", sorted(keys), schema, e)
+            column_data = []
+        with self.lock:
+            metadata = self.schema_objects(schema, "tables", load=False)
+            for key in keys.values():
+                metadata[key] = ["*"]
+                self._loaded_columns[(schema, key)] = None
+            for relname, column in (self.escaped_names(d) for d in column_data):
+                if relname in metadata:
+                    metadata[relname].append(column)
+
+            while len(self._loaded_columns) > max(self.lazy_columns_limit, len(keys)):
+                (old_schema, old_key), _ = self._loaded_columns.popitem(last=False)
+                old_metadata = self.schema_objects(old_schema, "tables", load=False)
+                if old_key in old_metadata:
+                    old_metadata[old_key] = ["*"]
+            self._indexes.clear()
+
+    def _load_in_background(self, keys: list[tuple], load: Callable[[], None]) -> None:
+        """Call *load* on a background thread, so that the completions do not
+        wait for the server, and then loaded_callback.
+
+        Until then, *keys* are in _loads, so that the same metadata is not
+        loaded twice.
+
+        """
+
+        def run() -> None:
+            try:
+                load()
+            finally:
+                with self.lock:
+                    for key in keys:
+                        self._loads.pop(key, None)
+                if self.loaded_callback is not None:
+                    self.loaded_callback()
+
+        thread = threading.Thread(target=run, name="completion load", daemon=True)
+        for key in keys:
+            self._loads[key] = thread
+        thread.start()
+
+    def wait_for_loads(self, timeout: float | None = None) -> None:
+        """Wait for the metadata being loaded in the background."""
+        with self.lock:
+            threads = set(self._loads.values())
+        for thread in threads:
+            thread.join(timeout)
+
+    def set_schema_loader(self, loader: Callable[[str, bool], tuple[Iterable[tuple], Iterable[tuple]]]) -> None:
+        self.schema_loader = loader
+
+    def schema_objects(self, schema: str | None, kind: str, load: bool = True) -> dict:
+        """The *kind* objects of *schema*, or of the current schema.
+
+        Those of another schema are the kept ones, or else, with *load*, are
+        read by schema_loader.
+
+        """
+        objects = self.dbmetadata[kind].get(schema or self.dbname)
+        if objects is not None:
+            return objects
+        if not schema or self.schemas is None:
+            return {}
+        metadata = self.schemas.get(schema)
+        if metadata is None:
+            if load:
+                self.load_schema(schema)
+            return {}
+        return metadata[kind]
+
+    def load_schema(self, schema: str) -> None:
+        """Start reading the metadata of the database *schema* with
+        schema_loader in the background, to keep it in schemas."""
+        # Anything else before a dot, e.g. a table alias, is not a schema.
+        if self.schemas is None or self.schema_loader is None or schema not in self.databases or schema in self._failed_schemas:
+            return
+        if ("schema", schema) not in self._loads:
+            self._load_in_background([("schema", schema)], partial(self._load_schema, self.schema_loader, schema))
+
+    def _load_schema(self, loader: Callable[[str, bool], tuple[Iterable[tuple], Iterable[tuple]]], schema: str) -> None:
+        try:
+            relations, functions = loader(schema, not self.lazy_columns)
+            tables: dict[str, list[str]] = {}
+            for relname, *columns in (self.escaped_names(d) for d in relations):
+                tables.setdefault(relname, ["*"]).extend(columns)
+            functions_metadata = {func[0]: None for func in (self.escaped_names(d) for d in functions)}
+            metadata: dict[str, dict] = {"tables": tables, "views": {}, "functions": functions_metadata}
+        except Exception as e:
+            # Not tried again, rather than on every keystroke.
+            _logger.error("Failed to load the metadata of %r: %r", schema, e)
+            with self.lock:
+                self._failed_schemas.add(schema)
+            return
+        with self.lock:
+            assert self.schemas is not None
+            self.schemas.put(schema, metadata)
+            self._indexes.clear()
+
+    def save_schema(self) -> None:
+        """Keep the metadata of the current schema in schemas."""
+        if self.schemas is not None and self.dbname:
+            self.schemas.put(self.dbname, {kind: self.dbmetadata[kind].get(self.dbname, {}) for kind in KINDS})
+
+    def use_schema(self, dbname: str | None) -> bool:
+        """Make *dbname* the current schema, if its metadata is kept, instead
+        of reading it from the server. Returns whether it was."""
+        if self.schemas is None or not dbname:
+            return False
+        metadata = self.schemas.get(dbname)
+        if metadata is None:
+            return False
+        with self.lock:
+            for kind in KINDS:
+                self.dbmetadata[kind].pop(self.dbname, None)
+                self.dbmetadata[kind][dbname] = metadata[kind]
+            self.set_dbname(dbname)
+        return True
 
     def extend_functions(self, func_data: list[str] | Generator[tuple[str, str]], builtin: bool = False) -> None:
         # if 'builtin' is set this is extending the list of builtin functions
         if builtin:
             if isinstance(func_data, list):
                 self.functions.extend(func_data)
+            self._indexes.clear()
             return
 
         # 'func_data' is a generator object. It can throw an exception while
@@ -1039,22 +1270,39 @@ class SQLCompleter(Completer):
         for func in func_data_ll:
             metadata[self.dbname][func[0]] = None
             self.all_completions.add(func[0])
+        self._indexes.clear()
 
     def set_dbname(self, dbname: str | None) -> None:
         self.dbname = dbname or ''
+        self._indexes.clear()
 
     def reset_completions(self) -> None:
-        self.databases: list[str] = []
-        self.users: list[str] = []
-        self.show_items: list[Completion] = []
-        self.dbname = ""
-        self.dbmetadata: dict[str, Any] = {"tables": {}, "views": {}, "functions": {}}
-        self.all_completions = set(self.keywords + self.functions)
+        with self.lock:
+            self.databases: list[str] = []
+            self.users: list[str] = []
+            self.show_items: list[Completion] = []
+            self.dbname = ""
+            self.dbmetadata: dict[str, Any] = {"tables": {}, "views": {}, "functions": {}}
+            self.all_completions = set(self.keywords + self.functions)
+            # Indexes of the larger collections, built when first needed.
+            self._indexes: dict[str, CompletionIndex] = {}
+            # The tables whose columns have been loaded lazily, least recently
+            # used first.
+            self._loaded_columns: OrderedDict[tuple[str, str], None] = OrderedDict()
+            self._failed_schemas: set[str] = set()
+
+    def indexed(self, name: str, items: Iterable[str]) -> CompletionIndex:
+        """Return the index of the collection called *name*, building it from
+        *items* unless the completions have changed since it was last built."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = CompletionIndex(items)
+        return index
 
     @staticmethod
     def find_matches(
         text: str,
-        collection: Collection,
+        collection: Collection | CompletionIndex,
         start_only: bool = False,
         fuzzy: bool = True,
         casing: str | None = None,
@@ -1077,19 +1325,21 @@ class SQLCompleter(Completer):
 
         completions = []
 
-        if fuzzy:
+        if isinstance(collection, CompletionIndex):
+            completions = collection.matches(text, start_only=start_only, fuzzy=fuzzy)
+        elif fuzzy:
             regex = ".*?".join(map(re.escape, text))
             pat = re.compile(f'({regex})')
             for item in collection:
                 r = pat.search(item.lower())
                 if r:
-                    completions.append((len(r.group()), r.start(), item))
+                    completions.append(item)
         else:
             match_end_limit = len(text) if start_only else None
             for item in collection:
                 match_point = item.lower().find(text, 0, match_end_limit)
                 if match_point >= 0:
-                    completions.append((len(text), match_point, item))
+                    completions.append(item)
 
         if casing == "auto":
             casing = "lower" if last and last[-1].islower() else "upper"
@@ -1099,13 +1349,22 @@ class SQLCompleter(Completer):
                 return kw.upper()
             return kw.lower()
 
-        return (Completion(z if casing is None else apply_case(z), -len(text)) for x, y, z in completions)
+        return (Completion(item if casing is None else apply_case(item), -len(text)) for item in completions)
 
     def get_completions(
         self,
         document: Document,
         complete_event: CompleteEvent | None,
         smart_completion: bool | None = None,
+    ) -> Iterable[Completion]:
+        with self.lock:
+            return list(self._get_completions(document, complete_event, smart_completion))
+
+    def _get_completions(
+        self,
+        document: Document,
+        complete_event: CompleteEvent | None,
+        smart_completion: bool | None,
     ) -> Iterable[Completion]:
         word_before_cursor = document.get_word_before_cursor(WORD=True)
         if smart_completion is None:
@@ -1114,7 +1373,7 @@ class SQLCompleter(Completer):
         # If smart_completion is off then match any word that starts with
         # 'word_before_cursor'.
         if not smart_completion:
-            return self.find_matches(word_before_cursor, self.all_completions, start_only=True, fuzzy=False)
+            return self.find_matches(word_before_cursor, self.indexed("all", self.all_completions), start_only=True, fuzzy=False)
 
         completions: list[Completion] = []
         suggestions = suggest_type(document.text, document.text_before_cursor)
@@ -1138,7 +1397,7 @@ class SQLCompleter(Completer):
             elif suggestion["type"] == "function":
                 # suggest user-defined functions using substring matching
                 funcs = self.populate_schema_objects(suggestion["schema"], "functions")
-                user_funcs = self.find_matches(word_before_cursor, funcs)
+                user_funcs = self.find_matches(word_before_cursor, self.indexed(f"functions.{suggestion['schema']}", funcs))
                 completions.extend(user_funcs)
 
                 # suggest hardcoded functions using startswith matching only if
@@ -1147,18 +1406,22 @@ class SQLCompleter(Completer):
                 # eg: SELECT * FROM users u WHERE u.
                 if not suggestion["schema"]:
                     predefined_funcs = self.find_matches(
-                        word_before_cursor, self.functions, start_only=True, fuzzy=False, casing=self.keyword_casing
+                        word_before_cursor,
+                        self.indexed("builtin_functions", self.functions),
+                        start_only=True,
+                        fuzzy=False,
+                        casing=self.keyword_casing,
                     )
                     completions.extend(predefined_funcs)
 
             elif suggestion["type"] == "table":
                 tables = self.populate_schema_objects(suggestion["schema"], "tables")
-                tables_m = self.find_matches(word_before_cursor, tables)
+                tables_m = self.find_matches(word_before_cursor, self.indexed(f"tables.{suggestion['schema']}", tables))
                 completions.extend(tables_m)
 
             elif suggestion["type"] == "view":
                 views = self.populate_schema_objects(suggestion["schema"], "views")
-                views_m = self.find_matches(word_before_cursor, views)
+                views_m = self.find_matches(word_before_cursor, self.indexed(f"views.{suggestion['schema']}", views))
                 completions.extend(views_m)
 
             elif suggestion["type"] == "alias":
@@ -1167,11 +1430,11 @@ class SQLCompleter(Completer):
                 completions.extend(aliases_m)
 
             elif suggestion["type"] == "database":
-                dbs_m = self.find_matches(word_before_cursor, self.databases)
+                dbs_m = self.find_matches(word_before_cursor, self.indexed("databases", self.databases))
                 completions.extend(dbs_m)
 
             elif suggestion["type"] == "keyword":
-                keywords_m = self.find_matches(word_before_cursor, self.keywords, casing=self.keyword_casing)
+                keywords_m = self.find_matches(word_before_cursor, self.indexed("keywords", self.keywords), casing=self.keyword_casing)
                 completions.extend(keywords_m)
 
             elif suggestion["type"] == "show":
@@ -1185,7 +1448,7 @@ class SQLCompleter(Completer):
                 completions.extend(change_items_m)
 
             elif suggestion["type"] == "user":
-                users_m = self.find_matches(word_before_cursor, self.users, start_only=False, fuzzy=True)
+                users_m = self.find_matches(word_before_cursor, self.indexed("users", self.users), start_only=False, fuzzy=True)
                 completions.extend(users_m)
 
             elif suggestion["type"] == "special":
@@ -1239,48 +1502,34 @@ class SQLCompleter(Completer):
         :param scoped_tbls: list of (schema, table, alias) tuples
         :return: list of column names
         """
+        if self.lazy_columns:
+            self.load_columns(scoped_tbls)
+
         columns = []
-        meta = self.dbmetadata
 
         for tbl in scoped_tbls:
             # A fully qualified schema.relname reference or default_schema
             # DO NOT escape schema names.
-            schema = tbl[0] or self.dbname
+            schema = tbl[0]
             relname = tbl[1]
             escaped_relname = self.escape_name(tbl[1])
 
             # We don't know if schema.relname is a table or view. Since
             # tables and views cannot share the same name, we can check one
             # at a time
-            try:
-                columns.extend(meta["tables"][schema][relname])
-
+            tables = self.schema_objects(schema, "tables")
+            if relname in tables:
+                columns.extend(tables[relname])
                 # Table exists, so don't bother checking for a view
                 continue
-            except KeyError:
-                try:
-                    columns.extend(meta["tables"][schema][escaped_relname])
-                    # Table exists, so don't bother checking for a view
-                    continue
-                except KeyError:
-                    pass
+            if escaped_relname in tables:
+                columns.extend(tables[escaped_relname])
+                continue
 
-            try:
-                columns.extend(meta["views"][schema][relname])
-            except KeyError:
-                pass
+            columns.extend(self.schema_objects(schema, "views").get(relname, []))
 
         return columns
 
     def populate_schema_objects(self, schema: str | None, obj_type: str) -> list[str]:
         """Returns list of tables or functions for a (optional) schema"""
-        metadata = self.dbmetadata[obj_type]
-        schema = schema or self.dbname
-
-        try:
-            objects = metadata[schema].keys()
-        except KeyError:
-            # schema doesn't exist
-            objects = []
-
-        return objects
+        return list(self.schema_objects(schema, obj_type))
@@ -1,27 +1,31 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+import copy
 import datetime
 import enum
 import logging
+import queue
 import re
+from socket import SOCK_STREAM, getaddrinfo
+from socket import socket as Socket
 import ssl
-from typing import Any, Generator, Iterable
+import threading
+from time import perf_counter, time
+from typing import Any, Callable, Collection, Generator, Iterable, Iterator
 
 import pymysql
 from pymysql.connections import Connection
-from pymysql.constants import FIELD_TYPE
+from pymysql.constants import ER, FIELD_TYPE
 from pymysql.converters import conversions, convert_date, convert_datetime, convert_timedelta, decoders
-from pymysql.cursors import Cursor
+from pymysql.cursors import Cursor, SSCursor
 
+from mycli import ssh_tunnel
+from mycli.connection_pool import ConnectionPool
+from mycli.packages.phase_timer import PhaseTimer, startup
 from mycli.packages.special import iocommands
 from mycli.packages.special.main import CommandNotFound, execute
 
-try:
-    import paramiko  # noqa: F401
-    import sshtunnel
-except ImportError:
-    pass
-
 _logger = logging.getLogger(__name__)
 
 FIELD_TYPES = decoders.copy()
@@ -86,6 +90,238 @@ class ServerInfo:
             return self.version_str
 
 
+class PrefetchStats:
+    def __init__(self) -> None:
+        self.rows = 0
+        self.batches = 0
+        # Time the reader thread spent blocked on a full queue, i.e. waiting
+        # for output, and time the consumer spent blocked on an empty queue,
+        # i.e. waiting for the network.
+        self.fetch_stalled = 0.0
+        self.output_stalled = 0.0
+
+    def __str__(self) -> str:
+        return f"fetch stalled {self.fetch_stalled:0.03f}s, output stalled {self.output_stalled:0.03f}s"
+
+
+class PrefetchSSCursor(SSCursor):
+    """Unbuffered cursor which reads rows ahead on a background thread.
+
+    Batches of rows are pulled from the socket into a bounded queue while the
+    caller formats and prints the previous ones, so network latency and
+    output cost overlap instead of adding up.
+    """
+
+    batch_size = 1000
+    # Number of batches that may wait in the queue; 0 disables prefetching.
+    prefetch_depth = 4
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.prefetch_stats = PrefetchStats()
+        self._prefetch_queue: queue.Queue | None = None
+        self._prefetch_thread: threading.Thread | None = None
+        self._prefetch_stop = threading.Event()
+
+    def __iter__(self) -> Iterator[tuple]:
+        if self.prefetch_depth <= 0:
+            return iter(self.fetchone, None)
+        return self._iter_prefetched()
+
+    def _iter_prefetched(self) -> Generator[tuple, None, None]:
+        self._stop_prefetch()
+        self.prefetch_stats = PrefetchStats()
+        self._prefetch_stop.clear()
+        batches: queue.Queue = queue.Queue(maxsize=self.prefetch_depth)
+        self._prefetch_queue = batches
+        self._prefetch_thread = threading.Thread(target=self._prefetch, args=(batches,), name="result_prefetch", daemon=True)
+        self._prefetch_thread.start()
+        try:
+            while True:
+                start = time()
+                batch = batches.get()
+                self.prefetch_stats.output_stalled += time() - start
+                if batch is None:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield from batch
+        finally:
+            self._stop_prefetch()
+
+    def _prefetch(self, batches: queue.Queue) -> None:
+        try:
+            while not self._prefetch_stop.is_set():
+                batch = self.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                self.prefetch_stats.rows += len(batch)
+                self.prefetch_stats.batches += 1
+                start = time()
+                self._put(batches, batch)
+                self.prefetch_stats.fetch_stalled += time() - start
+        except Exception as e:
+            self._put(batches, e)
+        else:
+            self._put(batches, None)
+
+    def _put(self, batches: queue.Queue, item: Any) -> None:
+        while not self._prefetch_stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _stop_prefetch(self) -> None:
+        """Stop the reader thread, so the connection may be used again."""
+        thread, batches = self._prefetch_thread, self._prefetch_queue
+        if thread is None or batches is None:
+            return
+        self._prefetch_stop.set()
+        while thread.is_alive():
+            try:
+                batches.get_nowait()
+            except queue.Empty:
+                thread.join(0.01)
+        self._prefetch_thread = None
+        self._prefetch_queue = None
+
+    def nextset(self):
+        self._stop_prefetch()
+        return super().nextset()
+
+    def discard(self) -> None:
+        """Skip the rest of the result, once the statement sending it has
+        been killed, which ends it with an error rather than an EOF."""
+        self._stop_prefetch()
+        result = self._result
+        if result is None or not result.unbuffered_active:
+            return
+        try:
+            result._finish_unbuffered_query()
+        except pymysql.err.OperationalError as e:
+            if e.args[0] != ER.QUERY_INTERRUPTED:
+                raise
+            result.unbuffered_active = False
+
+    def close(self) -> None:
+        self._stop_prefetch()
+        super().close()
+
+
+class MeteredConnection(Connection):
+    """Connection which counts the bytes received from the server, and the
+    time spent waiting for them, and times the phases of connecting while the
+    startup is profiled."""
+
+    bytes_received = 0
+    # Whether the reads are timed, which costs two clock reads per packet.
+    timed = False
+    # Until the first byte of each reply, i.e. while the server works.
+    server_seconds = 0.0
+    # Reading the rest of the replies.
+    transfer_seconds = 0.0
+    _command_sent: float | None = None
+    _phase_started = 0.0
+
+    def _execute_command(self, command: int, sql: str | bytes) -> None:
+        super()._execute_command(command, sql)
+        self._command_sent = perf_counter() if self.timed else None
+
+    def _read_bytes(self, num_bytes: int) -> bytes:
+        if not self.timed:
+            data = super()._read_bytes(num_bytes)
+            self.bytes_received += len(data)
+            return data
+        started = perf_counter()
+        data = super()._read_bytes(num_bytes)
+        now = perf_counter()
+        if self._command_sent is not None:
+            self.server_seconds += now - self._command_sent
+            self._command_sent = None
+        else:
+            self.transfer_seconds += now - started
+        self.bytes_received += len(data)
+        return data
+
+    def connect(self, sock: Socket | None = None) -> None:
+        if not startup.recording:
+            super().connect(sock)
+            return
+        if sock is None and not self.unix_socket:
+            # Connecting looks the host up again, usually from the cache of
+            # the resolver.
+            with startup.phase("dns"):
+                try:
+                    getaddrinfo(self.host, self.port, type=SOCK_STREAM)
+                except OSError:
+                    pass
+        self._phase_started = perf_counter()
+        try:
+            super().connect(sock)
+        finally:
+            # The character set, sql_mode, init_command and autocommit.
+            self._end_phase("session setup")
+
+    def _get_server_information(self) -> None:
+        self._end_phase("socket connect")
+        super()._get_server_information()
+        self._end_phase("server greeting")
+
+    def _request_authentication(self) -> None:
+        super()._request_authentication()
+        self._end_phase("tls and authentication")
+
+    def _end_phase(self, name: str) -> None:
+        if startup.recording:
+            now = perf_counter()
+            startup.add(name, now - self._phase_started)
+            self._phase_started = now
+
+
+class QueryProgress:
+    """Progress of the statements of one SQLExecute.run_queries() call."""
+
+    def __init__(self, conn: Connection | None) -> None:
+        self.started = time()
+        self.finished: float | None = None
+        # Rows of the result sets read so far, counted by the caller.
+        self.rows = 0
+        # Whether the server is executing a statement, as opposed to the
+        # client reading or printing its result.
+        self.executing = False
+        self._conn = conn
+        self._bytes_start = self._bytes()
+
+    def __str__(self) -> str:
+        plural = '' if self.rows == 1 else 's'
+        return f"{self.elapsed:0.1f}s, {self.rows} row{plural}, {format_size(self.bytes_received)} received"
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time()) - self.started
+
+    @property
+    def bytes_received(self) -> int:
+        return self._bytes() - self._bytes_start
+
+    def finish(self) -> None:
+        if self.finished is None:
+            self.finished = time()
+
+    def _bytes(self) -> int:
+        return getattr(self._conn, "bytes_received", 0)
+
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024 or unit == "GiB":
+            break
+        size /= 1024
+    return f"{size:0.0f} {unit}" if unit == "B" else f"{size:0.1f} {unit}"
+
+
 class SQLExecute:
     databases_query = """SHOW DATABASES"""
 
@@ -95,15 +331,42 @@ class SQLExecute:
 
     users_query = """SELECT CONCAT("'", user, "'@'",host,"'") FROM mysql.user"""
 
+    schema_tables_query = """select TABLE_NAME from information_schema.tables
+                                    where table_schema = %s
+                                    order by table_name"""
+
     functions_query = '''SELECT ROUTINE_NAME FROM INFORMATION_SCHEMA.ROUTINES
-    WHERE ROUTINE_TYPE="FUNCTION" AND ROUTINE_SCHEMA = "%s"'''
+    WHERE ROUTINE_TYPE="FUNCTION" AND ROUTINE_SCHEMA = %s'''
 
     table_columns_query = """select TABLE_NAME, COLUMN_NAME from information_schema.columns
-                                    where table_schema = '%s'
+                                    where table_schema = %s
                                     order by table_name,ordinal_position"""
 
+    relation_columns_query = """select TABLE_NAME, COLUMN_NAME from information_schema.columns
+                                    where table_schema = %s and table_name in %s
+                                    order by table_name,ordinal_position"""
+
+    # Changes whenever a table, column, function or database is added,
+    # dropped or renamed, without transferring the metadata itself. The
+    # columns of views count as well, and are only read for the current
+    # schema, which the data dictionary looks up by its index.
+    schema_fingerprint_query = """select
+        (select concat(count(*), ':', coalesce(sum(crc32(concat_ws('.', table_name, column_name, ordinal_position))), 0))
+            from information_schema.columns where table_schema = %s),
+        (select concat(count(*), ':', coalesce(sum(crc32(routine_name)), 0))
+            from information_schema.routines where routine_type = 'FUNCTION' and routine_schema = %s),
+        (select concat(count(*), ':', coalesce(sum(crc32(schema_name)), 0))
+            from information_schema.schemata)"""
+
     now_query = """SELECT NOW()"""
 
+    connection_id_query = """select connection_id()"""
+
+    prefetch_depth = PrefetchSSCursor.prefetch_depth
+    # Seconds between the calls of progress_callback while a statement
+    # executes.
+    progress_interval = 0.1
+
     def __init__(
         self,
         database: str | None,
@@ -140,6 +403,26 @@ class SQLExecute:
         self.ssh_key_filename = ssh_key_filename
         self.init_command = init_command
         self.conn: Connection | None = None
+        # Spare connections with the settings of the main one, see borrow().
+        self.pool: ConnectionPool | None = None
+        self._pool_settings: tuple = ()
+        self._control_conn: Connection | None = None
+        self._control_server: tuple = ()
+        # Whether a statement is executing on the server, see kill().
+        self.query_running = False
+        # The progress of the last run_queries(). When progress_callback is
+        # set, statements execute on a worker thread, and it is called with
+        # the progress while this thread waits.
+        self.progress: QueryProgress | None = None
+        self.progress_callback: Callable[[QueryProgress], None] | None = None
+        # The phases of the result last returned by run(), see _timed(), the
+        # statement it is the result of, and whether that is a special command.
+        self.timing: PhaseTimer | None = None
+        self.statement: str | None = None
+        self.is_special_command = False
+        # Whether to time the phases of every result, besides while
+        # \timing+ is on.
+        self.measure_phases = False
         self.connect()
 
     def connect(
@@ -206,6 +489,74 @@ class SQLExecute:
             ssh_key_filename,
             init_command,
         )
+        settings = (
+            user,
+            password,
+            host,
+            port,
+            socket,
+            charset,
+            local_infile,
+            ssl,
+            ssh_host,
+            ssh_port,
+            ssh_user,
+            ssh_password,
+            ssh_key_filename,
+            init_command,
+        )
+        if self.pool is None or settings != self._pool_settings:
+            # Replaced before the old one is closed, as other threads may be
+            # borrowing from it.
+            old_pool = self.pool
+            self._pool_settings = settings
+            self.pool = ConnectionPool(lambda database: self._new_connection(database, *settings))
+            if old_pool is not None:
+                _logger.debug("Connection pool: %s", old_pool)
+                old_pool.clear()
+        # Reconnecting takes a spare connection, if there is one.
+        conn = self.pool.get(db)
+
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except pymysql.err.Error:
+                pass
+        self.conn = conn
+        # Update them after the connection is made to ensure that it was a
+        # successful connection.
+        self.dbname = db
+        self.user = user
+        self.password = password
+        self.host = host
+        self.port = port
+        self.socket = socket
+        self.charset = charset
+        self.ssl = ssl
+        self.init_command = init_command
+        # retrieve connection id
+        with startup.phase("connection id"):
+            self.reset_connection_id()
+        self.server_info = ServerInfo.from_version_string(conn.server_version)  # type: ignore[attr-defined]
+
+    def _new_connection(
+        self,
+        db: str | None,
+        user: str | None,
+        password: str | None,
+        host: str | None,
+        port: int | None,
+        socket: str | None,
+        charset: str | None,
+        local_infile: bool | None,
+        ssl: dict[str, Any] | None,
+        ssh_host: str | None,
+        ssh_port: int | None,
+        ssh_user: str | None,
+        ssh_password: str | None,
+        ssh_key_filename: str | None,
+        init_command: str | None,
+    ) -> Connection:
         conv = conversions.copy()
         conv.update({
             FIELD_TYPE.TIMESTAMP: lambda obj: (convert_datetime(obj) or obj),
@@ -227,7 +578,7 @@ class SQLExecute:
         if ssl:
             ssl_context = self._create_ssl_ctx(ssl)
 
-        conn = pymysql.connect(
+        conn = MeteredConnection(
             database=db,
             user=user,
             password=password or '',
@@ -250,42 +601,107 @@ class SQLExecute:
             ##### paramiko.Channel is a bad socket implementation overall if you want SSL through an SSH tunnel
             #####
             # instead let's open a tunnel and rewrite host:port to local bind
-            try:
-                chan = sshtunnel.SSHTunnelForwarder(
-                    (ssh_host, ssh_port),
-                    ssh_username=ssh_user,
-                    ssh_pkey=ssh_key_filename,
-                    ssh_password=ssh_password,
-                    remote_bind_address=(host, port),
-                )
-                chan.start()
-
-                conn.host = chan.local_bind_host
-                conn.port = chan.local_bind_port
-                conn.connect()
-            except Exception as e:
-                raise e
+            with startup.phase("ssh tunnel"):
+                conn.host, conn.port = ssh_tunnel.tunnels.get(ssh_host, ssh_port, ssh_user, ssh_password, ssh_key_filename, host, port)
+            conn.connect()
 
-        if self.conn is not None:
+        return conn
+
+    @contextmanager
+    def borrow(self) -> Iterator[SQLExecute]:
+        """Yield an SQLExecute for auxiliary work, e.g. the completion
+        refresh, on a spare connection from the pool instead of a new one.
+
+        The connection goes back to the pool afterwards.
+
+        """
+        # connect() may replace the pool meanwhile.
+        pool = self.pool
+        if pool is None:
+            raise pymysql.err.InterfaceError(0, "Not connected.")
+        executor = copy.copy(self)
+        executor.connection_id = None
+        executor.progress = None
+        executor.progress_callback = None
+        executor._control_conn = None
+        with pool.connection(self.dbname) as conn:
+            executor.conn = conn
+            yield executor
+
+    def close_pool(self) -> None:
+        if self.pool is not None:
+            _logger.debug("Connection pool: %s", self.pool)
+            self.pool.clear()
+            self.pool = None
+
+    def control_connection(self) -> Connection:
+        """A second connection to the server, used to cancel the statements
+        running on the main one. It is opened on first use and kept open."""
+        # It follows the main connection to another server or user.
+        server = (self.user, self.password, self.host, self.port, self.socket, self.ssl, self.ssh_host, self.ssh_port, self.ssh_user)
+        if self._control_conn is not None and (not self._control_conn.open or server != self._control_server):
+            self.close_control_connection()
+        if self._control_conn is None:
+            self._control_server = server
+            self._control_conn = self._new_connection(
+                None,
+                self.user,
+                self.password,
+                self.host,
+                self.port,
+                self.socket,
+                self.charset,
+                self.local_infile,
+                self.ssl,
+                self.ssh_host,
+                self.ssh_port,
+                self.ssh_user,
+                self.ssh_password,
+                self.ssh_key_filename,
+                None,
+            )
+        return self._control_conn
+
+    def close_control_connection(self) -> None:
+        if self._control_conn is not None:
             try:
-                self.conn.close()
+                self._control_conn.close()
             except pymysql.err.Error:
                 pass
-        self.conn = conn
-        # Update them after the connection is made to ensure that it was a
-        # successful connection.
-        self.dbname = db
-        self.user = user
-        self.password = password
-        self.host = host
-        self.port = port
-        self.socket = socket
-        self.charset = charset
-        self.ssl = ssl
-        self.init_command = init_command
-        # retrieve connection id
-        self.reset_connection_id()
-        self.server_info = ServerInfo.from_version_string(conn.server_version)  # type: ignore[attr-defined]
+            self._control_conn = None
+
+    def kill(self, connection_id: int, query_only: bool = True) -> None:
+        """Kill the statement running on the connection *connection_id*, or
+        the whole connection, through the control connection.
+
+        KILL QUERY leaves the connection, and its session state, usable.
+
+        """
+        statement = f"KILL QUERY {int(connection_id)}" if query_only else f"KILL {int(connection_id)}"
+        try:
+            self._execute_on_control_connection(statement)
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            # The control connection has been idle for long; it may have
+            # timed out. Try again on a new one.
+            self.close_control_connection()
+            self._execute_on_control_connection(statement)
+
+    def stop_result(self, cur: PrefetchSSCursor) -> None:
+        """Stop the unbuffered result of *cur* before its end, by killing the
+        statement sending it, instead of reading every row left."""
+        connection_id = self.connection_id
+        if connection_id and connection_id > 0:
+            try:
+                self.kill(connection_id)
+            except Exception as e:
+                # The rest of the rows are then read and skipped.
+                _logger.error("Unable to stop the result: %r", e)
+        cur.discard()
+
+    def _execute_on_control_connection(self, statement: str) -> None:
+        with self.control_connection().cursor() as cur:
+            _logger.debug("Control connection: %s", statement)
+            cur.execute(statement)
 
     def run(self, statement: str) -> Generator[tuple, None, None]:
         """Execute the sql in the database and return the results. The results
@@ -293,6 +709,7 @@ class SQLExecute:
         (title, rows, headers, status).
         """
 
+        self.timing = self.statement = None
         # Remove spaces and EOL
         statement = statement.strip()
         if not statement:  # Empty string
@@ -306,7 +723,22 @@ class SQLExecute:
         else:
             components = iocommands.split_queries(statement)
 
-        for sql in components:
+        yield from self.run_queries(components)
+
+    def run_queries(self, queries: Iterable[str]) -> Generator[tuple, None, None]:
+        """Execute each of *queries*, which have already been split into
+        separate statements, as they are iterated over, and return their
+        results like run()."""
+        progress = self.progress = QueryProgress(self.conn)
+        if isinstance(self.conn, MeteredConnection):
+            self.conn.timed = self.measure_phases or iocommands.is_timing_verbose()
+        try:
+            yield from self._run_queries(queries)
+        finally:
+            progress.finish()
+
+    def _run_queries(self, queries: Iterable[str]) -> Generator[tuple, None, None]:
+        for sql in queries:
             # \G is treated specially since we have to set the expanded output.
             if sql.endswith("\\G"):
                 iocommands.set_expanded_output(True)
@@ -319,23 +751,113 @@ class SQLExecute:
                 sql = sql[:-2].strip()
 
             assert isinstance(self.conn, Connection)
+            self.statement = sql
+            self.is_special_command = True
             cur = self.conn.cursor()
             try:  # Special command
                 _logger.debug("Trying a dbspecial command. sql: %r", sql)
-                for result in execute(cur, sql):
+                for result in self._timed(execute, cur, sql):
                     yield result
             except CommandNotFound:  # Regular SQL
                 _logger.debug("Regular sql statement. sql: %r", sql)
-                cur.execute(sql)
+                self.is_special_command = False
+                if iocommands.is_streaming_enabled():
+                    # Read rows from the socket as they are consumed instead
+                    # of buffering the whole result set on the client.
+                    cur = self.conn.cursor(PrefetchSSCursor)
+                    cur.prefetch_depth = self.prefetch_depth
+                self._timed(self._execute, cur.execute, sql)
                 while True:
                     yield self.get_result(cur)
 
                     # PyMySQL returns an extra, empty result set with stored
                     # procedures. We skip it (rowcount is zero and no
                     # description).
-                    if not cur.nextset() or (not cur.rowcount and cur.description is None):
+                    if not self._timed(self._execute, cur.nextset) or (not cur.rowcount and cur.description is None):
                         break
 
+    def _timed(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Call *method*, which reads a result, and keep in self.timing the
+        time spent waiting for the server, reading the result from the
+        network, and on the client, mostly converting the values, while the
+        reads are timed, see run_queries()."""
+        if not getattr(self.conn, "timed", False):
+            self.timing = None
+            return method(*args)
+        server, transfer = self.network_seconds()
+        started = perf_counter()
+        try:
+            return method(*args)
+        finally:
+            elapsed = perf_counter() - started
+            server_end, transfer_end = self.network_seconds()
+            timing = self.timing = PhaseTimer()
+            timing.add("server", server_end - server)
+            timing.add("transfer", transfer_end - transfer)
+            timing.add("convert", max(elapsed - (server_end - server) - (transfer_end - transfer), 0.0))
+
+    def network_seconds(self) -> tuple[float, float]:
+        """The seconds the current connection has waited for the server, and
+        spent reading from the network, so far."""
+        return getattr(self.conn, "server_seconds", 0.0), getattr(self.conn, "transfer_seconds", 0.0)
+
+    def bytes_received(self) -> int:
+        """The bytes the current connection has received so far."""
+        return getattr(self.conn, "bytes_received", 0)
+
+    def _execute(self, method: Callable[..., Any], *args: Any) -> Any:
+        self.query_running = True
+        try:
+            progress, callback = self.progress, self.progress_callback
+            if progress is None or callback is None or threading.current_thread() is not threading.main_thread():
+                return method(*args)
+            return self._execute_in_background(method, args, progress, callback)
+        finally:
+            self.query_running = False
+
+    def _execute_in_background(
+        self,
+        method: Callable[..., Any],
+        args: tuple,
+        progress: QueryProgress,
+        callback: Callable[[QueryProgress], None],
+    ) -> Any:
+        """Call *method* on a worker thread, and *callback* with the progress
+        every progress_interval seconds meanwhile, and once done.
+
+        This thread only waits, so it stays free to handle Ctrl-C, see kill().
+
+        """
+        outcome: list[tuple[Any, BaseException | None]] = []
+
+        def call() -> None:
+            try:
+                outcome.append((method(*args), None))
+            except BaseException as e:
+                outcome.append((None, e))
+
+        conn = self.conn
+        worker = threading.Thread(target=call, name="query", daemon=True)
+        progress.executing = True
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(self.progress_interval)
+                callback(progress)
+        except BaseException:
+            # Like a read interrupted on this thread would, drop the
+            # connection, which stops the worker too.
+            if conn is not None:
+                conn._force_close()
+            raise
+        finally:
+            progress.executing = False
+            callback(progress)
+        result, error = outcome[0]
+        if error is not None:
+            raise error
+        return result
+
     def get_result(self, cursor: Cursor) -> tuple:
         """Get the current result's data from the cursor."""
         title = headers = None
@@ -344,8 +866,12 @@ class SQLExecute:
         # e.g. SELECT or SHOW.
         if cursor.description:
             headers = [x[0] for x in cursor.description]
-            plural = '' if cursor.rowcount == 1 else 's'
-            status = f'{cursor.rowcount} row{plural} in set'
+            if isinstance(cursor, SSCursor):
+                # The row count of an unbuffered result is only known once
+                # every row has been read, see rows_in_set_status().
+                status = None
+            else:
+                status = self.rows_in_set_status(cursor.rowcount)
         else:
             _logger.debug("No rows in result.")
             plural = '' if cursor.rowcount == 1 else 's'
@@ -353,22 +879,43 @@ class SQLExecute:
 
         return (title, cursor if cursor.description else None, headers, status)
 
-    def tables(self) -> Generator[tuple[str], None, None]:
-        """Yields table names"""
+    @staticmethod
+    def rows_in_set_status(rowcount: int) -> str:
+        plural = '' if rowcount == 1 else 's'
+        return f'{rowcount} row{plural} in set'
+
+    def tables(self, schema: str | None = None) -> Generator[tuple[str], None, None]:
+        """Yields table names, of *schema* if given"""
 
         assert isinstance(self.conn, Connection)
         with self.conn.cursor() as cur:
-            _logger.debug("Tables Query. sql: %r", self.tables_query)
-            cur.execute(self.tables_query)
+            if schema is None:
+                _logger.debug("Tables Query. sql: %r", self.tables_query)
+                cur.execute(self.tables_query)
+            else:
+                _logger.debug("Schema Tables Query. sql: %r", self.schema_tables_query)
+                cur.execute(self.schema_tables_query, (schema,))
             for row in cur:
                 yield row
 
-    def table_columns(self) -> Generator[tuple[str, str], None, None]:
-        """Yields (table name, column name) pairs"""
+    def table_columns(self, schema: str | None = None) -> Generator[tuple[str, str], None, None]:
+        """Yields (table name, column name) pairs, of *schema* if given"""
         assert isinstance(self.conn, Connection)
         with self.conn.cursor() as cur:
             _logger.debug("Columns Query. sql: %r", self.table_columns_query)
-            cur.execute(self.table_columns_query % self.dbname)
+            cur.execute(self.table_columns_query, (schema or self.dbname,))
+            for row in cur:
+                yield row
+
+    def relation_columns(self, relnames: Collection[str], schema: str | None = None) -> Generator[tuple[str, str], None, None]:
+        """Yields (table name, column name) pairs for the tables or views in
+        *relnames* only, of *schema* if given"""
+        assert isinstance(self.conn, Connection)
+        if not relnames:
+            return
+        with self.conn.cursor() as cur:
+            _logger.debug("Relation Columns Query. sql: %r", self.relation_columns_query)
+            cur.execute(self.relation_columns_query, (schema or self.dbname, list(relnames)))
             for row in cur:
                 yield row
 
@@ -379,13 +926,13 @@ class SQLExecute:
             cur.execute(self.databases_query)
             return [x[0] for x in cur.fetchall()]
 
-    def functions(self) -> Generator[tuple[str, str], None, None]:
-        """Yields tuples of (schema_name, function_name)"""
+    def functions(self, schema: str | None = None) -> Generator[tuple[str, str], None, None]:
+        """Yields tuples of (schema_name, function_name), of *schema* if given"""
 
         assert isinstance(self.conn, Connection)
         with self.conn.cursor() as cur:
             _logger.debug("Functions Query. sql: %r", self.functions_query)
-            cur.execute(self.functions_query % self.dbname)
+            cur.execute(self.functions_query, (schema or self.dbname,))
             for row in cur:
                 yield row
 
@@ -415,6 +962,15 @@ class SQLExecute:
                 for row in cur:
                     yield row
 
+    def schema_fingerprint(self) -> str:
+        """Returns a value that changes when the completion metadata of the
+        current database changes"""
+        assert isinstance(self.conn, Connection)
+        with self.conn.cursor() as cur:
+            _logger.debug("Schema Fingerprint Query. sql: %r", self.schema_fingerprint_query)
+            cur.execute(self.schema_fingerprint_query, (self.dbname, self.dbname))
+            return "/".join(str(x) for x in cur.fetchone())
+
     def now(self) -> datetime.datetime:
         assert isinstance(self.conn, Connection)
         with self.conn.cursor() as cur:
@@ -434,8 +990,11 @@ class SQLExecute:
         # Remember current connection id
         _logger.debug("Get current connection id")
         try:
-            res = self.run("select connection_id()")
-            for _title, cur, _headers, _status in res:
+            # Not through run(), which keeps the progress, timing and
+            # statement of the user's last query.
+            assert isinstance(self.conn, Connection)
+            with self.conn.cursor() as cur:
+                cur.execute(self.connection_id_query)
                 self.connection_id = cur.fetchone()[0]
         except Exception as e:
             # See #1054
@@ -0,0 +1,88 @@
+"""SSH tunnels to the database server, shared by all the connections which go
+through the same SSH server to the same address."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from typing import Any
+
+_logger = logging.getLogger(__name__)
+
+
+class SSHTunnels:
+    """The forwarders started so far, keyed by the SSH server, the SSH user
+    and the remote address. A forwarder is reused while its SSH transport is
+    up, restarted once it is not, and stopped on exit."""
+
+    def __init__(self) -> None:
+        self._forwarders: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._close_at_exit = False
+        self.started = 0
+        self.reused = 0
+
+    def __str__(self) -> str:
+        return f"{len(self._forwarders)} open, {self.started} started, {self.reused} reused"
+
+    def get(
+        self,
+        ssh_host: str,
+        ssh_port: int | None,
+        ssh_user: str | None,
+        ssh_password: str | None,
+        ssh_key_filename: str | None,
+        remote_host: str | None,
+        remote_port: int | None,
+    ) -> tuple[str, int]:
+        """Return the local address of a tunnel to *remote_host* and
+        *remote_port*, starting one if needed."""
+        key = (ssh_host, ssh_port, ssh_user, remote_host, remote_port)
+        # Held while a tunnel starts, so that it is only started once.
+        with self._lock:
+            forwarder = self._forwarders.get(key)
+            if forwarder is not None and forwarder.is_active:
+                self.reused += 1
+            else:
+                if forwarder is not None:
+                    _logger.debug("Restarting the SSH tunnel through %s:%s", ssh_host, ssh_port)
+                    self._stop(forwarder)
+                    del self._forwarders[key]
+                # Slow to import, and only needed with SSH.
+                import sshtunnel
+
+                forwarder = sshtunnel.SSHTunnelForwarder(
+                    (ssh_host, ssh_port),
+                    ssh_username=ssh_user,
+                    ssh_pkey=ssh_key_filename,
+                    ssh_password=ssh_password,
+                    remote_bind_address=(remote_host, remote_port),
+                )
+                forwarder.start()
+                self._forwarders[key] = forwarder
+                self.started += 1
+                if not self._close_at_exit:
+                    atexit.register(self.close)
+                    self._close_at_exit = True
+            return forwarder.local_bind_host, forwarder.local_bind_port
+
+    def close(self) -> None:
+        """Stop all the tunnels."""
+        with self._lock:
+            forwarders = list(self._forwarders.values())
+            self._forwarders.clear()
+        if forwarders:
+            _logger.debug("SSH tunnels: %s", self)
+        for forwarder in forwarders:
+            self._stop(forwarder)
+
+    @staticmethod
+    def _stop(forwarder: Any) -> None:
+        try:
+            forwarder.stop()
+        except Exception as e:
+            _logger.debug("Failed to stop an SSH tunnel: %r", e)
+
+
+tunnels = SSHTunnels()
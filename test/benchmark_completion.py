@@ -0,0 +1,148 @@
+"""Measure how SQLCompleter.get_completions() scales with the size of the
+completion metadata.
+
+Each scenario types a word into a statement one keystroke at a time, like a
+user would, and the latency of every keystroke is recorded:
+
+    $ python -m test.benchmark_completion --schemas 4 --tables 2000 --columns 25
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import NamedTuple
+
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+
+from mycli.packages import completion_engine
+from mycli.packages.special.main import COMMANDS
+from mycli.sqlcompleter import SQLCompleter
+
+
+class Scenario(NamedTuple):
+    name: str
+    before: str
+    word: str
+    after: str = ""
+
+
+SCENARIOS = [
+    Scenario("select list", "SELECT ", "col_12", " FROM table_1 JOIN table_2 ON table_1.col_0 = table_2.col_0"),
+    Scenario("from", "SELECT * FROM ", "table_123"),
+    Scenario("join on", "SELECT * FROM table_1 t1 JOIN table_2 t2 ON ", "t2.col_3"),
+    Scenario("qualified name", "SELECT * FROM ", "schema_1.table_42"),
+    Scenario("where", "SELECT * FROM table_1 WHERE col_1 = 1 AND ", "col_19"),
+    Scenario("function", "SELECT ", "func_7"),
+    Scenario("user", "GRANT ALL ON *.* TO ", "user_3"),
+    Scenario("special command", "", "\\dt"),
+]
+
+
+class Result(NamedTuple):
+    scenario: str
+    keystrokes: int
+    p50: float
+    p99: float
+    max: float
+    peak_kib: float
+
+
+def build_completer(schemas: int, tables: int, columns: int, functions: int, users: int) -> SQLCompleter:
+    """Return a completer with synthetic metadata: *tables* tables of
+    *columns* columns in each of *schemas* schemas."""
+    completer = SQLCompleter(smart_completion=True)
+    schema_names = [f"schema_{i}" for i in range(schemas)]
+    for schema in schema_names:
+        completer.extend_schemata(schema)
+        completer.set_dbname(schema)
+        column_data = [(f"table_{t}", f"col_{c}") for t in range(tables) for c in range(columns)]
+        completer.extend_relations(column_data, kind="tables")
+        completer.extend_columns(column_data, kind="tables")
+        completer.extend_functions((f"func_{f}", "") for f in range(functions))
+    completer.set_dbname(schema_names[0])
+    completer.extend_database_names(schema_names)
+    completer.extend_users([(f"'user_{u}'@'%'",) for u in range(users)])
+    completer.extend_special_commands(list(COMMANDS.keys()))
+    return completer
+
+
+def keystrokes(scenario: Scenario) -> list[Document]:
+    """The documents seen while typing the scenario's word."""
+    documents = []
+    for n in range(len(scenario.word) + 1):
+        before = scenario.before + scenario.word[:n]
+        documents.append(Document(text=before + scenario.after, cursor_position=len(before)))
+    return documents
+
+
+def measure(completer: SQLCompleter, scenario: Scenario, rounds: int) -> Result:
+    documents = keystrokes(scenario)
+
+    # Warm up the indexes built on first use.
+    for document in documents:
+        completer.get_completions(document, CompleteEvent())
+
+    timings = []
+    for _ in range(rounds):
+        # Every round types the word from scratch.
+        completion_engine._suggestions.clear()
+        for document in documents:
+            start = time.perf_counter()
+            list(completer.get_completions(document, CompleteEvent()))
+            timings.append(time.perf_counter() - start)
+
+    # Memory is measured separately, tracing slows everything down.
+    completion_engine._suggestions.clear()
+    peaks = []
+    tracemalloc.start()
+    for document in documents:
+        tracemalloc.reset_peak()
+        list(completer.get_completions(document, CompleteEvent()))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+    return Result(
+        scenario.name,
+        len(documents),
+        percentiles[49] * 1000,
+        percentiles[98] * 1000,
+        max(timings) * 1000,
+        statistics.median(peaks) / 1024,
+    )
+
+
+def run(schemas: int, tables: int, columns: int, functions: int, users: int, rounds: int) -> list[Result]:
+    completer = build_completer(schemas, tables, columns, functions, users)
+    return [measure(completer, scenario, rounds) for scenario in SCENARIOS]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the latency of completions on synthetic metadata.")
+    parser.add_argument("--schemas", type=int, default=2)
+    parser.add_argument("--tables", type=int, default=1000, help="tables per schema")
+    parser.add_argument("--columns", type=int, default=20, help="columns per table")
+    parser.add_argument("--functions", type=int, default=200, help="functions per schema")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=10, help="times each word is typed")
+    args = parser.parse_args(argv)
+
+    results = run(args.schemas, args.tables, args.columns, args.functions, args.users, args.rounds)
+
+    print(f"{args.schemas} schemas x {args.tables} tables x {args.columns} columns, {args.functions} functions, {args.users} users")
+    print(f"{'scenario':<16} {'keys':>5} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9} {'peak KiB':>9}")
+    for result in results:
+        print(
+            f"{result.scenario:<16} {result.keystrokes:>5} {result.p50:>9.2f} {result.p99:>9.2f} {result.max:>9.2f} {result.peak_kib:>9.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+# type: ignore
+
+from test import benchmark_completion
+
+
+def test_benchmark_runs(capsys):
+    assert benchmark_completion.main(["--schemas", "2", "--tables", "5", "--columns", "3", "--rounds", "2"]) == 0
+
+    output = capsys.readouterr().out.splitlines()
+    assert output[0] == "2 schemas x 5 tables x 3 columns, 200 functions, 100 users"
+    assert [line.split()[0] for line in output[2:]] == ["select", "from", "join", "qualified", "where", "function", "user", "special"]
+
+
+def test_keystrokes():
+    scenario = benchmark_completion.Scenario("from", "SELECT * FROM ", "ab", " WHERE 1")
+    documents = benchmark_completion.keystrokes(scenario)
+
+    assert [d.text_before_cursor for d in documents] == ["SELECT * FROM ", "SELECT * FROM a", "SELECT * FROM ab"]
+    assert {d.text_after_cursor for d in documents} == {" WHERE 1"}
@@ -1,7 +1,10 @@
 # type: ignore
 
+from unittest.mock import patch
+
 import pytest
 
+from mycli.packages import completion_engine
 from mycli.packages.completion_engine import suggest_type
 
 
@@ -559,3 +562,38 @@ def test_quoted_where():
     text = "'where i=';"
     suggestions = suggest_type(text, text)
     assert suggestions == [{"type": "keyword"}]
+
+
+def test_suggestions_reused_while_typing_identifier():
+    completion_engine._suggestions.clear()
+    with patch.object(completion_engine, "_suggest_type", wraps=completion_engine._suggest_type) as parse:
+        for text in ("SELECT * FROM tabl t WHERE ", "SELECT * FROM tabl t WHERE t.", "SELECT * FROM tabl t WHERE t.i"):
+            suggest_type(text, text)
+        assert parse.call_count == 3
+
+        for text in ("SELECT * FROM tabl t WHERE t.id", "SELECT * FROM tabl t WHERE t.id_1"):
+            suggestions = suggest_type(text, text)
+        assert parse.call_count == 3
+
+        # Typing an operator changes what comes next.
+        suggest_type("SELECT * FROM tabl t WHERE t.id=", "SELECT * FROM tabl t WHERE t.id=")
+        assert parse.call_count == 4
+
+        # Going back to a recent text needs no parsing either.
+        suggest_type("SELECT * FROM tabl t WHERE t.i", "SELECT * FROM tabl t WHERE t.i")
+        assert parse.call_count == 4
+
+    assert sorted_dicts(suggestions) == sorted_dicts(completion_engine._suggest_type(text, text))
+
+
+def test_suggestions_not_reused_across_statements():
+    completion_engine._suggestions.clear()
+    suggest_type("SELECT * FROM ", "SELECT * FROM ")
+    suggestions = suggest_type("SELECT * FROM tabl WHERE ", "SELECT * FROM tabl WHERE ")
+    assert {"type": "column", "tables": [(None, "tabl", None)]} in suggestions
+
+    # The text after the cursor is part of the scope.
+    suggestions = suggest_type("SELECT  FROM other", "SELECT ")
+    assert {"type": "column", "tables": [(None, "other", None)]} in suggestions
+    suggestions = suggest_type("SELECT  FROM tabl", "SELECT ")
+    assert {"type": "column", "tables": [(None, "tabl", None)]} in suggestions
@@ -0,0 +1,58 @@
+# type: ignore
+
+import random
+import string
+
+import pytest
+
+from mycli.packages.completion_index import CompletionIndex
+from mycli.sqlcompleter import SQLCompleter
+
+
+def make_names():
+    rnd = random.Random(1)
+    alphabet = string.ascii_letters + "_$é"
+    return ["".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, 12))) for _ in range(2000)] + [
+        "users",
+        "user_id",
+        "Users",
+        "orders",
+        "ORDER_ITEMS",
+        "réveillé",
+        "`select`",
+    ]
+
+
+NAMES = make_names()
+
+
+@pytest.mark.parametrize(
+    "text", ["", "u", "us", "USE", "user", "ord_it", "or", "rdr", "éi", "`s", "zzzzz", "a$", "d\x00n", "i̇s", "abc", "ol", "t\nl"]
+)
+@pytest.mark.parametrize(("start_only", "fuzzy"), [(False, True), (True, True), (False, False), (True, False)])
+def test_index_matches_linear_scan(text, start_only, fuzzy):
+    collection = NAMES
+    index = CompletionIndex(collection)
+
+    expected = list(SQLCompleter.find_matches(text, collection, start_only=start_only, fuzzy=fuzzy))
+    actual = list(SQLCompleter.find_matches(text, index, start_only=start_only, fuzzy=fuzzy))
+
+    assert actual == expected
+
+
+def test_index_prefix():
+    index = CompletionIndex(["orders", "users", "user_id", "Users", "us", "xus"])
+    assert index.matches("us", start_only=True, fuzzy=False) == ["users", "user_id", "Users", "us"]
+    assert index.matches("user", start_only=True, fuzzy=False) == ["users", "user_id", "Users"]
+    assert index.matches("x", start_only=True, fuzzy=False) == ["xus"]
+    assert index.matches("z", start_only=True, fuzzy=False) == []
+
+
+def test_indexed_rebuilt_after_changes():
+    completer = SQLCompleter()
+    completer.extend_database_names(["foo"])
+    assert completer.indexed("databases", completer.databases).items == ["foo"]
+    assert completer.indexed("databases", []).items == ["foo"]
+
+    completer.extend_database_names(["bar"])
+    assert completer.indexed("databases", completer.databases).items == ["foo", "bar"]
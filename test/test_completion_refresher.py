@@ -1,8 +1,10 @@
 # type: ignore
 
+from contextlib import nullcontext
 import time
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
+import pymysql
 import pytest
 
 
@@ -80,12 +82,159 @@ def test_refresh_with_callbacks(refresher):
 
     """
     callbacks = [Mock()]
-    sqlexecute_class = Mock()
+    sqlexecute = MagicMock()
+
+    # Set refreshers to 0: we're not testing refresh logic here
+    refresher.refreshers = {}
+    refresher.refresh(sqlexecute, callbacks)
+    time.sleep(1)  # Wait for the thread to work.
+    assert callbacks[0].call_count == 1
+    sqlexecute.borrow.assert_called_once_with()
+
+
+def test_refresh_without_a_connection(refresher):
     sqlexecute = Mock()
+    sqlexecute.borrow.side_effect = pymysql.err.InterfaceError(0, "The connection pool is closed.")
+    callback = Mock()
+    refresher._bg_refresh(sqlexecute, callback, {})
+    callback.assert_not_called()
+
+
+def cache_executor(fingerprint="f1"):
+    executor = Mock(dbname="test", host="localhost", port=3306, socket=None, user="root", ssh_host=None, ssh_port=22, server_info=None)
+    executor.databases.return_value = ["test"]
+    executor.table_columns.return_value = iter([("users", "id"), ("users", "email")])
+    executor.users.return_value = iter([("'root'@'localhost'",)])
+    executor.functions.return_value = iter([("f",)])
+    executor.show_candidates.return_value = iter([("TABLES",)])
+    executor.schema_fingerprint.return_value = fingerprint
+    executor.borrow.side_effect = lambda: nullcontext(executor)
+    return executor
+
+
+def test_refresh_saves_and_loads_cache(tmp_path):
+    from mycli.completion_cache import CompletionCache
+    from mycli.completion_refresher import CompletionRefresher
 
-    with patch("mycli.completion_refresher.SQLExecute", sqlexecute_class):
-        # Set refreshers to 0: we're not testing refresh logic here
-        refresher.refreshers = {}
-        refresher.refresh(sqlexecute, callbacks)
-        time.sleep(1)  # Wait for the thread to work.
-        assert callbacks[0].call_count == 1
+    refresher = CompletionRefresher(CompletionCache(str(tmp_path)))
+    executor = cache_executor()
+    callback = Mock()
+    refresher._bg_refresh(executor, callback, {})
+    refreshed = callback.call_args[0][0]
+
+    loaded = CompletionRefresher(CompletionCache(str(tmp_path))).load_cache(cache_executor())
+
+    assert loaded is not None
+    assert loaded.dbmetadata == refreshed.dbmetadata
+    assert loaded.dbmetadata["tables"]["test"] == {"users": ["*", "id", "email"]}
+    assert loaded.users == refreshed.users
+    assert loaded.databases == ["test"]
+
+
+def test_refresh_skipped_for_valid_cache(tmp_path):
+    from mycli.completion_cache import CompletionCache
+    from mycli.completion_refresher import CompletionRefresher
+
+    CompletionCache(str(tmp_path)).save(
+        cache_executor(),
+        "f1",
+        {"databases": ["test"], "table_columns": [["users", "id"]], "users": [], "functions": [], "show_candidates": []},
+    )
+    refresher = CompletionRefresher(CompletionCache(str(tmp_path)))
+    loaded = refresher.load_cache(cache_executor())
+
+    executor = cache_executor()
+    callback = Mock()
+    refresher._bg_refresh(executor, callback, {})
+    callback.assert_called_once_with(loaded)
+    executor.table_columns.assert_not_called()
+
+    # Only the first refresh may be skipped.
+    refresher._bg_refresh(executor, callback, {})
+    executor.table_columns.assert_called_once()
+
+
+def test_refresh_with_stale_cache(tmp_path):
+    from mycli.completion_cache import CompletionCache
+    from mycli.completion_refresher import CompletionRefresher
+
+    cache = CompletionCache(str(tmp_path))
+    cache.save(
+        cache_executor(),
+        "f0",
+        {"databases": [], "table_columns": [], "users": [], "functions": [], "show_candidates": []},
+    )
+    refresher = CompletionRefresher(cache)
+    refresher.load_cache(cache_executor())
+
+    executor = cache_executor("f1")
+    callback = Mock()
+    refresher._bg_refresh(executor, callback, {})
+    executor.table_columns.assert_called_once()
+    assert cache.load(executor)[0] == "f1"
+
+
+def test_load_cache_missing_or_corrupt(tmp_path):
+    from mycli.completion_cache import CompletionCache
+    from mycli.completion_refresher import CompletionRefresher
+
+    cache = CompletionCache(str(tmp_path))
+    refresher = CompletionRefresher(cache)
+    assert refresher.load_cache(cache_executor()) is None
+
+    with open(cache.path(cache_executor()), "w") as f:
+        f.write("{not json")
+    assert refresher.load_cache(cache_executor()) is None
+    assert CompletionRefresher().load_cache(cache_executor()) is None
+
+
+def test_refresh_publishes_partial_results():
+    from mycli.completion_refresher import CompletionRefresher
+
+    executor = cache_executor()
+
+    def slow_users():
+        time.sleep(0.2)
+        return iter([("'root'@'localhost'",)])
+
+    executor.users.side_effect = slow_users
+    published = []
+
+    def callback(completer):
+        published.append((bool(completer.dbmetadata["tables"].get("test")), list(completer.users)))
+
+    CompletionRefresher()._bg_refresh(executor, callback, {})
+
+    # The tables were published before the users had been read.
+    assert (True, []) in published
+    assert published[-1] == (True, ["'root'@'localhost'"])
+
+
+def test_refresh_survives_a_failed_query():
+    from mycli.completion_refresher import CompletionRefresher
+
+    executor = cache_executor()
+    executor.functions.side_effect = RuntimeError("no functions")
+    callback = Mock()
+    CompletionRefresher()._bg_refresh(executor, callback, {})
+    completer = callback.call_args[0][0]
+    assert completer.dbmetadata["tables"]["test"] == {"users": ["*", "id", "email"]}
+    assert completer.dbmetadata["functions"].get("test", {}) == {}
+
+
+def test_refresh_with_lazy_columns():
+    from mycli.completion_refresher import CompletionRefresher
+
+    executor = cache_executor()
+    executor.tables.return_value = iter([("users",)])
+    executor.relation_columns.return_value = iter([("users", "id")])
+    callback = Mock()
+    CompletionRefresher()._bg_refresh(executor, callback, {"lazy_columns": True})
+    executor.table_columns.assert_not_called()
+
+    completer = callback.call_args[0][0]
+    assert completer.dbmetadata["tables"]["test"] == {"users": ["*"]}
+    completer.load_columns([(None, "users", None)])
+    completer.wait_for_loads()
+    executor.relation_columns.assert_called_once_with(["users"], "test")
+    assert completer.dbmetadata["tables"]["test"] == {"users": ["*", "id"]}
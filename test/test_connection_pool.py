@@ -0,0 +1,86 @@
+# type: ignore
+
+from unittest.mock import Mock
+
+import pymysql
+import pytest
+
+from mycli.connection_pool import ConnectionPool
+
+
+def new_pool():
+    def connect(database):
+        return Mock(open=True, database=database)
+
+    return ConnectionPool(Mock(side_effect=connect))
+
+
+def test_connections_are_reused():
+    pool = new_pool()
+    with pool.connection("test") as conn:
+        pass
+    assert len(pool) == 1
+
+    with pool.connection("test") as reused:
+        assert reused is conn
+    reused.ping.assert_called_once_with()
+    reused.select_db.assert_not_called()
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+def test_reused_connection_switches_database():
+    pool = new_pool()
+    pool.put(pool.get("one"), "one")
+    conn = pool.get("two")
+    conn.select_db.assert_called_once_with("two")
+    assert pool.reused == 1
+
+    # A connection cannot go back to no database at all.
+    pool.put(conn, "two")
+    assert pool.get(None) is not conn
+    assert len(pool) == 1
+
+
+def test_dead_connections_are_dropped():
+    pool = new_pool()
+    conn = pool.get("test")
+    pool.put(conn, "test")
+    conn.ping.side_effect = pymysql.err.OperationalError(2006, "MySQL server has gone away")
+    assert pool.get("test") is not conn
+    conn.close.assert_called_once_with()
+    assert (pool.created, pool.reused) == (2, 0)
+
+
+def test_idle_connections_expire():
+    pool = new_pool()
+    pool.idle_timeout = -1
+    conn = pool.get("test")
+    pool.put(conn, "test")
+    assert pool.get("test") is not conn
+    conn.close.assert_called_once_with()
+
+
+def test_failed_and_surplus_connections_are_closed():
+    pool = new_pool()
+    pool.max_idle = 1
+    with pytest.raises(RuntimeError):
+        with pool.connection("test") as failed:
+            raise RuntimeError
+    failed.close.assert_called_once_with()
+    assert len(pool) == 0
+
+    # The third is still borrowed when the pool is cleared.
+    first, second, third = pool.get("test"), pool.get("test"), pool.get("test")
+    pool.put(first, "test")
+    pool.put(second, "test")
+    second.close.assert_called_once_with()
+
+    pool.clear()
+    first.close.assert_called_once_with()
+    pool.put(third, "test")
+    third.close.assert_called_once_with()
+    assert len(pool) == 0
+
+    # No connections are made once it is closed.
+    with pytest.raises(pymysql.err.InterfaceError):
+        pool.get("test")
@@ -1,17 +1,27 @@
 # type: ignore
 
 from collections import namedtuple
+from io import TextIOWrapper
+import json
 import os
 import shutil
+import signal
+import subprocess
+import sys
 from tempfile import NamedTemporaryFile
 from textwrap import dedent
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
 import click
 from click.testing import CliRunner
+import pytest
 
 from mycli.main import MyCli, cli, thanks_picker
+from mycli.packages.phase_timer import PhaseTimer
 from mycli.packages.special.main import COMMANDS as SPECIAL_COMMANDS
-from mycli.sqlexecute import ServerInfo
+from mycli.query_stats import QueryStats
+from mycli.sqlexecute import ServerInfo, SQLExecute
 from test.utils import HOST, PASSWORD, PORT, USER, dbtest, run
 
 test_dir = os.path.abspath(os.path.dirname(__file__))
@@ -225,6 +235,133 @@ def test_conditional_pager(monkeypatch):
     SPECIAL_COMMANDS["pager"].handler("")
 
 
+def test_pager_streams_output(monkeypatch):
+    m = MyCli(myclirc=default_config_file)
+    m.explicit_pager = False
+    produced = []
+
+    def lines():
+        for i in range(1000):
+            produced.append(i)
+            yield str(i)
+
+    def echo_via_pager(generator):
+        # The pager opens once the output is known not to fit the screen,
+        # and quits after reading the first screen.
+        assert len(produced) < 1000
+        for _ in range(30):
+            next(generator)
+        assert len(produced) < 1000
+
+    monkeypatch.setattr(click, "echo_via_pager", echo_via_pager)
+    monkeypatch.setattr(m, "get_output_margin", lambda status: 1)
+    with NamedTemporaryFile(mode="w+") as logfile:
+        m.logfile = TextIOWrapper(logfile.buffer)
+        assert m.output(lines())
+        # The rest of the output is still written to the log.
+        logfile.seek(0)
+        assert logfile.read() == "".join(f"{i}\n" for i in range(1000))
+
+    # Otherwise it is not produced at all.
+    m.logfile = None
+    produced.clear()
+    assert not m.output(lines())
+    assert len(produced) < 1000
+
+    # Nor is the pager started without any output.
+    m.explicit_pager = True
+    monkeypatch.setattr(click, "echo_via_pager", Mock(side_effect=AssertionError))
+    assert m.output(iter([]))
+
+
+def test_output_times_formatting_and_rendering(monkeypatch):
+    m = MyCli(myclirc=default_config_file)
+    m.explicit_pager = False
+    timing = PhaseTimer()
+    timing.add("format", 1.0)
+    # Every reading of the clock takes a second.
+    clock = iter(range(100))
+    monkeypatch.setattr("mycli.main.perf_counter", lambda: next(clock))
+    monkeypatch.setattr("mycli.packages.phase_timer.perf_counter", lambda: next(clock))
+    monkeypatch.setattr(click, "secho", Mock())
+    monkeypatch.setattr(m, "get_output_margin", lambda status: 1)
+
+    m.output(iter(["a", "b", "c"]), "3 rows in set", timing)
+    # One second for each line, and one to find there are no more.
+    assert timing.phases["format"] == 1.0 + 4
+    # The rest of the nine seconds the output took.
+    assert timing.phases["render"] == 9 - 4
+
+
+def test_log_metrics():
+    m = MyCli(myclirc=default_config_file)
+    m.metrics_log = Mock()
+    m.sqlexecute = Mock(socket=None, host="db", port=3306, connection_id=7, dbname="test", statement="select a, b from t")
+    m.main_formatter.format_name = "ascii"
+    timing = PhaseTimer()
+    timing.add("server", 0.002)
+    timing.add("format", 0.001)
+
+    m.log_metrics([(1, 2), (3, 4)], ["a", "b"], timing, 512)
+    record, statement = m.metrics_log.write.call_args.args
+    assert statement == "select a, b from t"
+    del record["time"]
+    assert record == {
+        "duration_ms": 3.0,
+        "phases": {"server": 2.0, "format": 1.0},
+        "rows": 2,
+        "bytes": 512,
+        "columns": 2,
+        "format": "ascii",
+        "redirect": [],
+        "server": "db:3306",
+        "connection_id": 7,
+        "database": "test",
+    }
+
+
+def test_query_stats(tmp_path):
+    m = MyCli(myclirc=default_config_file)
+    m.query_stats = QueryStats(str(tmp_path / "query_stats.db"))
+    m.sqlexecute = Mock(statement="select * from t where id = 1", is_special_command=False)
+    m.metrics_log = None
+    timing = PhaseTimer()
+    timing.add("server", 0.002)
+    timing.add("render", 5.0)
+    m.log_metrics([(1,)], ["id"], timing, 0)
+    m.sqlexecute.is_special_command = True
+    m.log_metrics([(1,)], ["id"], timing, 0)
+
+    (slowest, most_frequent) = m.show_query_stats("")
+    assert slowest[0] == "Slowest queries, on average:"
+    assert [row[:3] for row in slowest[1]] == [("select * from t where id = ?", 1, 2.0)]
+    assert slowest[2] == QueryStats.headers
+    assert most_frequent[0] == "Most frequent queries:"
+    assert m.show_query_stats("frequent 0") == [("Most frequent queries:", [], QueryStats.headers, None)]
+    assert m.show_query_stats("fast") == [(None, None, None, "Usage: \\stats [slow|frequent] [n]")]
+
+    m.query_stats = None
+    assert "disabled" in m.show_query_stats("")[0][3]
+
+
+def test_interrupt_kills_the_running_query(monkeypatch):
+    m = MyCli(myclirc=default_config_file)
+    m.sqlexecute = Mock(connection_id=42, query_running=True)
+    monkeypatch.setattr(m, "echo", Mock())
+    with m.cancel_on_interrupt():
+        signal.raise_signal(signal.SIGINT)
+    m.sqlexecute.kill.assert_called_once_with(42)
+    assert m.query_cancelled
+
+    # Between statements Ctrl-C interrupts mycli itself.
+    m.sqlexecute = Mock(connection_id=42, query_running=False)
+    with pytest.raises(KeyboardInterrupt):
+        with m.cancel_on_interrupt():
+            signal.raise_signal(signal.SIGINT)
+    m.sqlexecute.kill.assert_not_called()
+    assert signal.getsignal(signal.SIGINT) is signal.default_int_handler
+
+
 def test_reserved_space_is_integer(monkeypatch):
     """Make sure that reserved space is returned as an integer."""
 
@@ -262,6 +399,35 @@ def test_list_dsn():
         print(f"An error occurred while attempting to delete the file: {e}")
 
 
+def test_batch_mode_imports():
+    # Batch mode should not pay for the modules which only the interactive
+    # session, or some commands, need.
+    code = "import sys; from mycli.main import MyCli; MyCli(myclirc=sys.argv[1])"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code, default_config_file],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=project_dir,
+        # Reading a login path file needs Cryptodome.
+        env=dict(os.environ, MYSQL_TEST_LOGIN_FILE=os.path.join(test_dir, "missing.cnf")),
+    )
+    imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+    deferred = {
+        "Cryptodome",
+        "llm",
+        "mycli.completion_refresher",
+        "mycli.sqlcompleter",
+        "paramiko",
+        "prompt_toolkit",
+        "pyfzf",
+        "pyperclip",
+        "sqlglot",
+        "sshtunnel",
+    }
+    assert imported & deferred == set()
+
+
 def test_prettify_statement():
     statement = "SELECT 1"
     m = MyCli()
@@ -276,6 +442,61 @@ def test_unprettify_statement():
     assert unpretty_statement == "SELECT 1;"
 
 
+def test_refresh_table_completions():
+    m = MyCli(myclirc=default_config_file)
+    m.sqlexecute = Mock(dbname="test")
+    m.sqlexecute.relation_columns.return_value = iter([("orders", "id")])
+    m.completer.set_dbname("test")
+    m.completer.extend_schemata("test")
+    m.completer.extend_relations([("users",)], kind="tables")
+
+    m.refresh_table_completions([(None, "orders"), ("other", "users")])
+
+    m.sqlexecute.relation_columns.assert_called_once_with(["orders"])
+    assert m.completer.dbmetadata["tables"]["test"] == {"users": ["*"], "orders": ["*", "id"]}
+
+
+def test_use_reuses_the_metadata_of_a_recent_database():
+    m = MyCli(myclirc=default_config_file)
+    m.sqlexecute = Mock(dbname="other")
+    m.completion_refresher = Mock()
+    m.completion_refresher.is_refreshing.return_value = False
+    m.schema_metadata.put("other", {"tables": {"accounts": ["*", "id"]}, "views": {}, "functions": {}})
+
+    m.refresh_completions(reset=True)
+
+    m.completion_refresher.refresh.assert_not_called()
+    assert m.completer.dbname == "other"
+    assert m.completer.dbmetadata["tables"]["other"] == {"accounts": ["*", "id"]}
+
+    # Any other refresh forgets them.
+    m.refresh_completions()
+    m.completion_refresher.refresh.assert_called_once()
+    assert len(m.schema_metadata) == 0
+
+
+def test_execute_from_file_confirms_before_destructive_statement():
+    m = MyCli(myclirc=default_config_file)
+    m.destructive_warning = True
+    m.sqlexecute = Mock(spec=SQLExecute)
+    m.sqlexecute.run_queries.side_effect = lambda queries: [(None, None, None, query) for query in queries]
+    with NamedTemporaryFile(mode="w", suffix=".sql", delete=False) as f:
+        f.write("select 1;\ndrop table t;\nselect 2;\n")
+
+    try:
+        with patch("mycli.main.confirm_destructive_query", return_value=False) as confirm:
+            results = list(m.execute_from_file(f.name))
+        confirm.assert_called_once_with("drop table t")
+        # Nothing is run before the confirmation.
+        assert [status for *_, status in results] == ["Wise choice. Command execution stopped."]
+
+        with patch("mycli.main.confirm_destructive_query", return_value=True):
+            results = list(m.execute_from_file(f.name))
+        assert [status for *_, status in results] == ["select 1", "drop table t", "select 2"]
+    finally:
+        os.remove(f.name)
+
+
 def test_list_ssh_config():
     runner = CliRunner()
     # keep Windows from locking the file with delete=False
@@ -331,6 +552,9 @@ def test_dsn(monkeypatch):
         def run_query(self, query, new_line=True):
             pass
 
+        def run_queries(self, queries, new_line=True):
+            pass
+
     import mycli.main
 
     monkeypatch.setattr(mycli.main, "MyCli", MockMyCli)
@@ -468,6 +692,49 @@ def test_dsn(monkeypatch):
     )
 
 
+def test_profile_startup(monkeypatch):
+    import mycli.main
+    from mycli.packages.phase_timer import startup
+
+    class MockMyCli:
+        config = {"alias_dsn": {}}
+        destructive_warning = False
+        main_formatter = SimpleNamespace(format_name=None)
+
+        def __init__(self, **args):
+            self.logger = Mock()
+
+        def connect(self, **args):
+            startup.add("dns", 0.002)
+
+        def run_query(self, query, new_line=True):
+            # Not part of the startup.
+            startup.add("query", 1.0)
+
+    monkeypatch.setattr(mycli.main, "MyCli", MockMyCli)
+    runner = CliRunner(mix_stderr=False)
+
+    result = runner.invoke(mycli.main.cli, args=["--profile-startup", "--profile-startup-format", "json", "-e", "select 1"])
+    assert result.exit_code == 0, result.output
+    profile = json.loads(result.stderr)
+    assert list(profile["phases"]) == ["init", "connect", "connect/dns"]
+    assert profile["phases"]["connect/dns"] == 2.0
+    assert not startup.enabled
+
+    result = runner.invoke(mycli.main.cli, args=["--profile-startup", "-e", "select 1"])
+    assert result.exit_code == 0, result.output
+    assert result.stderr.startswith("Startup phases:\ninit ")
+    assert "\n  dns " in result.stderr
+
+    result = runner.invoke(mycli.main.cli, args=["-e", "select 1"])
+    assert result.stderr == ""
+
+    # A flag, which leaves the database argument alone.
+    result = runner.invoke(mycli.main.cli, args=["--profile-startup", "mydb", "-e", "select 1"])
+    assert result.exit_code == 0, result.output
+    assert result.stderr.startswith("Startup phases:")
+
+
 def test_ssh_config(monkeypatch):
     # Setup classes to mock mycli.main.MyCli
     class Formatter:
@@ -495,6 +762,9 @@ def test_ssh_config(monkeypatch):
         def run_query(self, query, new_line=True):
             pass
 
+        def run_queries(self, queries, new_line=True):
+            pass
+
     import mycli.main
 
     monkeypatch.setattr(mycli.main, "MyCli", MockMyCli)
@@ -0,0 +1,63 @@
+# type: ignore
+
+import json
+import time
+
+from mycli.packages.metrics_log import MetricsLog
+
+
+def test_records_are_written_in_batches(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    log = MetricsLog(str(path))
+    log.flush_interval = 60
+    log.write({"rows": 1}, "select * from t where id = 1")
+    log.write({"rows": 0}, "select * from t where id = 2")
+    log.write({"rows": None})
+    # Still gathered into the first batch.
+    assert not path.exists() or path.read_text() == ""
+
+    log.close()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records == [
+        {"rows": 1, "fingerprint": "select * from t where id = ?"},
+        {"rows": 0, "fingerprint": "select * from t where id = ?"},
+        {"rows": None},
+    ]
+    assert (log.written, log.dropped) == (3, 0)
+
+    # Written again once closed, after the existing records.
+    log.write({"rows": 2}, "select 2")
+    log.close()
+    assert len(path.read_text().splitlines()) == 4
+
+
+def test_records_are_dropped_rather_than_waited_for(monkeypatch, tmp_path):
+    monkeypatch.setattr(MetricsLog, "max_queued", 1)
+    # Without a writer to take them.
+    monkeypatch.setattr(MetricsLog, "_start", lambda self: None)
+    log = MetricsLog(str(tmp_path / "metrics.jsonl"))
+    log.write({"rows": 1})
+    log.write({"rows": 2})
+    assert log.dropped == 1
+
+
+def test_unwritable_log_is_disabled(tmp_path):
+    log = MetricsLog(str(tmp_path / "missing" / "metrics.jsonl"))
+    log.write({"rows": 1})
+    log.close()
+    assert log.broken
+    log.write({"rows": 2})
+    assert log.written == 0
+
+
+def test_close_does_not_wait_for_a_broken_writer(monkeypatch, tmp_path):
+    monkeypatch.setattr(MetricsLog, "max_queued", 1)
+    log = MetricsLog(str(tmp_path / "missing" / "metrics.jsonl"))
+    # Fills the queue, which the writer leaves as it cannot open the file.
+    log.write({"rows": 1})
+    log._writer.join()
+    assert log.broken and log._queue.full()
+
+    started = time.monotonic()
+    log.close(timeout=60)
+    assert time.monotonic() - started < 5
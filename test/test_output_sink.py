@@ -0,0 +1,48 @@
+# type: ignore
+
+from io import StringIO
+
+import pytest
+
+from mycli.packages.output_sink import OutputSink
+
+
+def test_lines_are_written_in_blocks():
+    file = StringIO()
+    sink = OutputSink("test", file)
+    sink.buffer_size = 10
+    sink.write_line("abc")
+    sink.write_line("")
+    assert file.getvalue() == ""
+    sink.write_line("defgh")
+    assert file.getvalue() == "abc\n\ndefgh\n"
+    sink.write_line("ij")
+    sink.flush()
+    assert file.getvalue() == "abc\n\ndefgh\nij\n"
+    assert (sink.lines, sink.chars) == (4, 14)
+
+
+def test_write_line_like_click_echo():
+    file = StringIO()
+    sink = OutputSink("test", file, skip_empty=True)
+    sink.write_line("\x1b[31mred\x1b[0m")
+    sink.write_line("")
+    sink.flush()
+    assert file.getvalue() == "red\n"
+    assert sink.lines == 1
+
+
+def test_ignored_errors_stop_writes():
+    class ClosedPipe(StringIO):
+        def write(self, text):
+            raise BrokenPipeError
+
+    sink = OutputSink("test", ClosedPipe(), ignored_errors=(BrokenPipeError,))
+    sink.write_line("abc")
+    sink.flush()
+    assert sink.broken
+
+    sink = OutputSink("test", ClosedPipe())
+    sink.write_line("abc")
+    with pytest.raises(BrokenPipeError):
+        sink.flush()
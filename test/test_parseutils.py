@@ -3,11 +3,13 @@
 import pytest
 
 from mycli.packages.parseutils import (
+    extract_altered_tables,
     extract_tables,
     extract_tables_from_complete_statements,
     is_destructive,
     is_dropping_database,
     queries_start_with,
+    query_fingerprint,
     query_has_where_clause,
     query_starts_with,
 )
@@ -191,3 +193,48 @@ def test_query_has_where_clause(sql, has_where_clause):
 )
 def test_is_dropping_database(sql, dbname, is_dropping):
     assert is_dropping_database(sql, dbname) == is_dropping
+
+
+@pytest.mark.parametrize(
+    ("sql", "tables"),
+    [
+        ("select * from foo", []),
+        ("alter table foo add column bar int", [(None, "foo")]),
+        ("alter table foo rename column a to b", [(None, "foo")]),
+        ("alter table foo rename to db.bar", [(None, "foo"), ("db", "bar")]),
+        ("create table if not exists db.foo (id int)", [("db", "foo")]),
+        ("create temporary table foo like bar", [(None, "foo")]),
+        ("create or replace view v as select 1", [(None, "v")]),
+        ("create unique index i on foo (a)", [(None, "foo")]),
+        ("drop table if exists a, `b c`, db.d", [(None, "a"), (None, "b c"), ("db", "d")]),
+        ("rename table a to b, c to d", [(None, "a"), (None, "b"), (None, "c"), (None, "d")]),
+        ("select 1; -- comment\n alter table foo add x int;", [(None, "foo")]),
+        ("use foo", None),
+        ("create database foo", None),
+        ("drop schema foo", None),
+        ("create function f() returns int return 1", None),
+        ("create user 'u'@'%'", None),
+        ("alter table foo add x int; \\r", None),
+    ],
+)
+def test_extract_altered_tables(sql, tables):
+    assert extract_altered_tables(sql) == tables
+
+
+@pytest.mark.parametrize(
+    ("sql", "fingerprint"),
+    [
+        ("SELECT * FROM t WHERE id = 42", "select * from t where id = ?"),
+        ("select *\n  from t  where id=7;", "select * from t where id = ?"),
+        ("select * from t where a>=1 and b<>2 and c <=> null", "select * from t where a >= ? and b <> ? and c <=> ?"),
+        ("select f( a ,b ), j->>'$.x' from t", "select f(a, b), j ->> ? from t"),
+        ("select * from t1 where a in (1, 2, 3) and b = 'x'", "select * from t1 where a in (?+) and b = ?"),
+        ("insert into t (a, b) values (1, 'it''s'), (2, NULL)", "insert into t (a, b) values (?+)"),
+        ("select 1.5e3, -2, 0xFF, .5, \"a\\\"b\"", "select ?, -?, ?, ?, ?"),
+        ("select /* hint */ c -- why\nfrom t # done", "select c from t"),
+        ("select sleep(1), concat(a, 'b') from t", "select sleep(?), concat(a, ?) from t"),
+        ("select '-- not a comment' from t", "select ? from t"),
+    ],
+)
+def test_query_fingerprint(sql, fingerprint):
+    assert query_fingerprint(sql) == fingerprint
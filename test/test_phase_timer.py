@@ -0,0 +1,62 @@
+# type: ignore
+
+import threading
+
+from mycli.packages.phase_timer import PhaseTimer
+
+
+def test_phases_are_recorded_in_order_and_nested():
+    timer = PhaseTimer()
+    with timer.phase("connect"):
+        timer.add("dns", 0.25)
+        with timer.phase("connection id"):
+            pass
+    with timer.phase("prompt"):
+        pass
+    timer.add("dns", 0.5)
+
+    assert list(timer.phases) == ["connect", "connect/dns", "connect/connection id", "prompt", "dns"]
+    assert timer.phases["connect/dns"] == 0.25
+    assert timer.phases["connect"] >= timer.phases["connect/connection id"]
+
+    report = timer.report().splitlines()
+    assert [line.split()[0] for line in report] == ["connect", "dns", "connection", "prompt", "dns", "other", "total"]
+    assert report[1].startswith("  dns ")
+
+    profile = timer.as_dict()
+    assert profile["phases"]["connect/dns"] == 250.0
+    assert set(profile) == {"phases", "other_ms", "total_ms"}
+
+
+def test_only_the_enabling_thread_is_recorded():
+    timer = PhaseTimer(enabled=False)
+    with timer.phase("init"):
+        pass
+    assert timer.phases == {}
+
+    timer.enable()
+
+    def refresh():
+        with timer.phase("refresh"):
+            pass
+
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    thread.join()
+    with timer.phase("init"):
+        pass
+    assert list(timer.phases) == ["init"]
+
+    timer.disable()
+    timer.add("later", 1.0)
+    assert list(timer.phases) == ["init"]
+
+
+def test_iterate_times_producing_the_items():
+    timer = PhaseTimer()
+    produced = timer.iterate("format", ["a", "b"])
+    assert list(timer.phases) == []
+    assert list(produced) == ["a", "b"]
+    assert list(timer.phases) == ["format"]
+    timer.add("render", 0.001)
+    assert timer.summary().startswith("format 0.0 ms, render 1.0 ms")
@@ -0,0 +1,72 @@
+# type: ignore
+
+from datetime import datetime
+
+from mycli.query_stats import QueryStats, bucket, percentile, upper_bound
+
+
+def test_durations_are_kept_by_fingerprint(tmp_path):
+    path = tmp_path / "stats" / "query_stats.db"
+    stats = QueryStats(str(path))
+    for i in range(20):
+        stats.record(f"select * from t where id = {i}", 10.0, 1)
+    stats.record("select * from t where id = 0", 200.0, 1)
+    stats.record("select sleep(1)", 1000.0, None)
+    # Kept in memory until flushed.
+    assert not path.exists()
+
+    # Another session adds to the same fingerprints.
+    other = QueryStats(str(path))
+    other.record("select sleep(2)", 2000.0, 1)
+    other.flush()
+
+    slowest = stats.top("slow", 10)
+    assert [row[:3] for row in slowest] == [
+        ("select sleep(?)", 2, 1500.0),
+        ("select * from t where id = ?", 21, 19.0),
+    ]
+    assert slowest[0][3:7] == (2000.0, 2000.0, 3000.0, 0.5)
+    # The 95th percentile of 21 durations is the 20th.
+    assert slowest[1][3] == round(upper_bound(bucket(10.0)), 1)
+    assert slowest[1][4] == 200.0
+
+    most_frequent = stats.top("frequent", 1)
+    assert [row[:2] for row in most_frequent] == [("select * from t where id = ?", 21)]
+
+
+def test_durations_are_written_in_batches(tmp_path):
+    stats = QueryStats(str(tmp_path / "query_stats.db"))
+    stats.flush_size = 2
+    stats.record("select 1", 1.0, 1)
+    assert stats._pending
+    stats.record("select 2", 1.0, 1)
+    # Written by a background thread.
+    stats._flusher.join()
+    assert not stats._pending
+    assert QueryStats(str(tmp_path / "query_stats.db")).top("frequent", 10)[0][:2] == ("select ?", 2)
+
+
+def test_last_run_is_the_time_of_the_run(monkeypatch, tmp_path):
+    import mycli.query_stats
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2024, 5, 1, 12, 0, 0)
+
+    stats = QueryStats(str(tmp_path / "query_stats.db"))
+    monkeypatch.setattr(mycli.query_stats, "datetime", FakeDatetime)
+    stats.record("select 1", 1.0, 1)
+    monkeypatch.undo()
+    stats.flush()
+    assert stats.top("frequent", 1)[0][7] == "2024-05-01T12:00:00"
+
+
+def test_percentile():
+    assert bucket(10.0) == 10
+    assert bucket(11.0) == 11
+    assert bucket(0) == bucket(0.0001) == -30
+    histogram = {str(bucket(1.0)): 90, str(bucket(100.0)): 10}
+    assert percentile(histogram, 0.9) == 1.0
+    assert percentile(histogram, 0.95) == 100.0
+    assert percentile({}, 0.95) == 0.0
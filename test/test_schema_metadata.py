@@ -0,0 +1,32 @@
+# type: ignore
+
+from mycli.schema_metadata import SchemaMetadata, metadata_size
+
+
+def schema(*tables):
+    return {"tables": {table: ["*", "id"] for table in tables}, "views": {}, "functions": {}}
+
+
+def test_least_recently_used_schemas_are_forgotten():
+    one, two, three = schema("a"), schema("b"), schema("c")
+    schemas = SchemaMetadata(2 * metadata_size(one))
+    schemas.put("one", one)
+    schemas.put("two", two)
+    assert schemas.get("one") is one
+
+    schemas.put("three", three)
+    assert "two" not in schemas
+    assert (schemas.get("one"), schemas.get("three")) == (one, three)
+    assert schemas.get("two") is None
+    assert (schemas.hits, schemas.misses) == (3, 1)
+
+
+def test_the_last_schema_is_kept_beyond_the_budget():
+    schemas = SchemaMetadata(0)
+    schemas.put("one", schema("a"))
+    schemas.put("two", schema("b"))
+    assert len(schemas) == 1
+    assert "two" in schemas
+
+    schemas.discard("two")
+    assert schemas.size == 0
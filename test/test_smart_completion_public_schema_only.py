@@ -1,6 +1,7 @@
 # type: ignore
 
-from unittest.mock import patch
+import threading
+from unittest.mock import Mock, patch
 
 from prompt_toolkit.completion import Completion
 from prompt_toolkit.document import Document
@@ -44,6 +45,61 @@ def complete_event():
     return Mock()
 
 
+def test_refresh_relations(completer):
+    completer.refresh_relations(["Orders", "missing", "carts"], [("carts", "id"), ("orders", "id"), ("orders", "total")], kind="tables")
+
+    tables = completer.dbmetadata["tables"]["test"]
+    assert tables["orders"] == ["*", "id", "total"]
+    assert tables["carts"] == ["*", "id"]
+    assert tables["users"] == ["*", "id", "email", "first_name", "last_name"]
+    assert "missing" not in tables
+
+    completer.refresh_relations(["carts"], [], kind="tables")
+    assert "carts" not in completer.dbmetadata["tables"]["test"]
+    assert "carts" not in completer.all_completions
+    # Still the name of a column.
+    assert "id" in completer.all_completions
+
+
+def test_lazy_columns(complete_event):
+    import mycli.sqlcompleter as sqlcompleter
+
+    comp = sqlcompleter.SQLCompleter(smart_completion=True, lazy_columns=True, lazy_columns_limit=1)
+    comp.set_dbname("test")
+    comp.extend_schemata("test")
+    comp.extend_relations([(table,) for table in metadata], kind="tables")
+    loader = Mock(side_effect=lambda schema, relnames: [(table, col) for table in relnames for col in metadata[table]])
+    comp.set_column_loader(loader)
+
+    loaded = threading.Event()
+    comp.loaded_callback = loaded.set
+
+    text = "SELECT  FROM users"
+    # Loaded in the background, without waiting for it.
+    result = comp.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    assert Completion(text="first_name", start_position=0) not in result
+    comp.wait_for_loads()
+    assert loaded.is_set()
+    result = comp.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    assert Completion(text="first_name", start_position=0) in result
+    loader.assert_called_once_with("test", ["users"])
+    assert comp.dbmetadata["tables"]["test"]["orders"] == ["*"]
+
+    # Loaded once, then kept.
+    comp.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    comp.wait_for_loads()
+    assert loader.call_count == 1
+
+    # Beyond the limit, the least recently used columns are dropped.
+    text = "SELECT  FROM orders"
+    comp.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    comp.wait_for_loads()
+    result = comp.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    assert Completion(text="ordered_date", start_position=0) in result
+    loader.assert_called_with("test", ["orders"])
+    assert comp.dbmetadata["tables"]["test"]["users"] == ["*"]
+
+
 def test_special_name_completion(completer, complete_event):
     text = "\\d"
     position = len("\\d")
@@ -375,3 +431,37 @@ def test_file_name_completion(completer, complete_event, text, expected):
     result = list(completer.get_completions(Document(text=text, cursor_position=position), complete_event))
     expected = [Completion(txt, pos) for txt, pos in expected]
     assert result == expected
+
+
+def test_qualified_names_of_another_schema(completer, complete_event):
+    from mycli.schema_metadata import SchemaMetadata
+
+    completer.schemas = SchemaMetadata(1024 * 1024)
+    completer.extend_database_names(["test", "other"])
+    loader = Mock(return_value=([("accounts", "id"), ("accounts", "balance")], [("transfer",)]))
+    completer.set_schema_loader(loader)
+
+    text = "SELECT * FROM other."
+    completer.get_completions(Document(text=text, cursor_position=len(text)), complete_event)
+    completer.wait_for_loads()
+    result = completer.get_completions(Document(text=text, cursor_position=len(text)), complete_event)
+    assert Completion(text="accounts", start_position=0) in result
+    loader.assert_called_once_with("other", True)
+
+    text = "SELECT  FROM other.accounts"
+    result = completer.get_completions(Document(text=text, cursor_position=len("SELECT ")), complete_event)
+    assert Completion(text="balance", start_position=0) in result
+    assert loader.call_count == 1
+
+    # Aliases are not databases.
+    text = "SELECT * FROM users u WHERE u."
+    completer.get_completions(Document(text=text, cursor_position=len(text)), complete_event)
+    completer.wait_for_loads()
+    assert loader.call_count == 1
+
+    completer.save_schema()
+    assert completer.use_schema("other")
+    assert completer.dbname == "other"
+    assert completer.populate_schema_objects(None, "functions") == ["transfer"]
+    assert "users" in completer.populate_schema_objects("test", "tables")
+    assert not completer.use_schema("missing")
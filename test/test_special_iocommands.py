@@ -35,6 +35,35 @@ def test_set_get_timing():
     assert not mycli.packages.special.is_timing_enabled()
 
 
+def test_toggle_timing():
+    mycli.packages.special.set_timing_enabled(False)
+    assert mycli.packages.special.execute(None, "\\timing") == [(None, None, None, "Timing is on.")]
+    assert not mycli.packages.special.is_timing_verbose()
+    assert mycli.packages.special.execute(None, "\\t+") == [(None, None, None, "Timing is on, with the phases of each query.")]
+    assert mycli.packages.special.is_timing_enabled()
+    assert mycli.packages.special.is_timing_verbose()
+    assert mycli.packages.special.execute(None, "\\timing") == [(None, None, None, "Timing is off.")]
+    assert not mycli.packages.special.is_timing_enabled()
+    assert not mycli.packages.special.is_timing_verbose()
+    assert mycli.packages.special.execute(None, "\\timing bogus") == [(None, None, None, "Syntax: \\timing[+].")]
+    assert not mycli.packages.special.is_timing_enabled()
+
+
+def test_set_get_streaming():
+    mycli.packages.special.set_streaming_enabled(True)
+    assert mycli.packages.special.is_streaming_enabled()
+    mycli.packages.special.set_streaming_enabled(False)
+    assert not mycli.packages.special.is_streaming_enabled()
+
+
+def test_toggle_streaming():
+    mycli.packages.special.set_streaming_enabled(False)
+    assert mycli.packages.special.execute(None, "\\streaming") == [(None, None, None, "Streaming is on.")]
+    assert mycli.packages.special.is_streaming_enabled()
+    assert mycli.packages.special.execute(None, "\\streaming") == [(None, None, None, "Streaming is off.")]
+    assert not mycli.packages.special.is_streaming_enabled()
+
+
 def test_set_get_expanded_output():
     mycli.packages.special.set_expanded_output(True)
     assert mycli.packages.special.is_expanded_output()
@@ -167,6 +196,27 @@ def test_pipe_once_command():
             assert f.read() == b"hello world\n"
 
 
+@pytest.mark.skipif(os.name == "nt", reason="requires a POSIX shell")
+def test_pipe_once_streams_lines(capsys):
+    with tempfile.NamedTemporaryFile() as f:
+        # More output than a pipe can hold, both ways, to a command that
+        # stops reading early.
+        mycli.packages.special.execute(None, f"\\pipe_once cat; echo done > {f.name}")
+        for i in range(100000):
+            mycli.packages.special.write_pipe_once(f"line {i}")
+        assert mycli.packages.special.iocommands.PIPE_ONCE["process"].poll() is None
+        mycli.packages.special.flush_pipe_once_if_written(None)
+        assert f.read() == b"done\n"
+        assert capsys.readouterr().out.endswith("line 99998\nline 99999\n")
+
+        mycli.packages.special.execute(None, f"\\pipe_once head -n 2 > {f.name}")
+        for i in range(100000):
+            mycli.packages.special.write_pipe_once(f"line {i}")
+        mycli.packages.special.flush_pipe_once_if_written(None)
+        f.seek(0)
+        assert f.read() == b"line 0\nline 1\n"
+
+
 def test_parseargfile():
     """Test that parseargfile expands the user directory."""
     expected = (os.path.join(os.path.expanduser("~"), "filename"), "a")
@@ -303,6 +353,46 @@ def test_switch_delimiter_within_query():
         assert query == parsed_query
 
 
+def test_split_queries_from_lines():
+    mycli.packages.special.set_delimiter(";")
+    lines = [
+        "-- MySQL dump\n",
+        "/*!40101 SET NAMES utf8 */;\n",
+        "insert into t values (1, 'a;b'), (2, \"c\\\";d\");\n",
+        "/* comment; */ select 1; select\n",
+        "2 # comment;\n",
+        ";\n",
+        "DELIMITER $$\n",
+        "create procedure p() begin select 1; end $$\n",
+        "delimiter ;\n",
+        "select `a;b` from t",
+    ]
+    assert list(mycli.packages.special.split_queries_from_lines(lines)) == [
+        "-- MySQL dump\n/*!40101 SET NAMES utf8 */",
+        "insert into t values (1, 'a;b'), (2, \"c\\\";d\")",
+        "/* comment; */ select 1",
+        "select\n2 # comment;",
+        "DELIMITER $$",
+        "create procedure p() begin select 1; end",
+        "delimiter ;",
+        "select `a;b` from t",
+    ]
+
+
+def test_split_queries_from_lines_is_lazy():
+    mycli.packages.special.set_delimiter(";")
+    read = []
+
+    def lines():
+        for line in ("select 1;\n", "select 2;\n"):
+            read.append(line)
+            yield line
+
+    queries = mycli.packages.special.split_queries_from_lines(lines())
+    assert next(queries) == "select 1"
+    assert read == ["select 1;\n"]
+
+
 def test_set_delimiter():
     for delim in ("foo", "bar"):
         mycli.packages.special.set_delimiter(delim)
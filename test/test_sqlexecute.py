@@ -1,11 +1,15 @@
 # type: ignore
 
 import os
+import threading
+import time
+from unittest.mock import Mock
 
 import pymysql
 import pytest
 
-from mycli.sqlexecute import ServerInfo, ServerSpecies
+from mycli.packages import special
+from mycli.sqlexecute import PrefetchSSCursor, QueryProgress, ServerInfo, ServerSpecies, SQLExecute, format_size
 from test.utils import dbtest, is_expanded_output, run, set_expanded_output
 
 
@@ -67,6 +71,15 @@ def test_table_and_columns_query(executor):
     assert set(executor.table_columns()) == {("a", "x"), ("a", "y"), ("b", "z")}
 
 
+@dbtest
+def test_relation_columns_query(executor):
+    run(executor, "create table a(x text, y text)")
+    run(executor, "create table b(z text)")
+
+    assert list(executor.relation_columns(["a", "missing"])) == [("a", "x"), ("a", "y")]
+    assert list(executor.relation_columns([])) == []
+
+
 @dbtest
 def test_database_list(executor):
     databases = executor.databases()
@@ -274,6 +287,100 @@ def test_multiple_results(executor):
     assert results == expected
 
 
+@dbtest
+def test_streaming_results(executor):
+    run(executor, """create table test(a text)""")
+    run(executor, """insert into test values('abc'), ('def')""")
+    special.set_streaming_enabled(True)
+    try:
+        results = run(executor, """select * from test""")
+    finally:
+        special.set_streaming_enabled(False)
+
+    # The row count of an unbuffered result is not known up front.
+    assert_result_equal(results, headers=["a"], rows=[("abc",), ("def",)], status=None, auto_status=False)
+
+
+@dbtest
+def test_kill_query_keeps_the_session(executor):
+    run(executor, "set @kept = 1")
+    timer = threading.Timer(0.5, executor.kill, (executor.connection_id,))
+    timer.start()
+    try:
+        with pytest.raises(pymysql.OperationalError) as e:
+            run(executor, "select 1 from dual where sleep(10)")
+    finally:
+        timer.join()
+    assert e.value.args[0] == pymysql.constants.ER.QUERY_INTERRUPTED
+    results = run(executor, "select @kept")
+    assert_result_equal(results, headers=["@kept"], rows=[(1,)])
+    executor.close_control_connection()
+
+
+@dbtest
+def test_query_progress_in_background(executor):
+    seen = []
+    executor.progress_callback = seen.append
+    try:
+        results = run(executor, "select sleep(0.3)")
+    finally:
+        executor.progress_callback = None
+    assert_result_equal(results, headers=["sleep(0.3)"], rows=[(0,)])
+    assert seen and seen[-1].executing is False
+    assert executor.progress.finished
+    assert executor.progress.bytes_received > 0
+
+
+@dbtest
+def test_schema_fingerprint_changes_with_the_columns(executor):
+    run(executor, "create table fp(a int)")
+    run(executor, "create view fp_view as select a from fp")
+    fingerprints = {executor.schema_fingerprint()}
+
+    # Neither of these changes the create_time of the table or view.
+    for statement in (
+        "alter table fp add column b int",
+        "alter table fp rename column b to c",
+        "create or replace view fp_view as select a, c from fp",
+    ):
+        run(executor, statement)
+        fingerprint = executor.schema_fingerprint()
+        assert fingerprint not in fingerprints, statement
+        fingerprints.add(fingerprint)
+
+
+@dbtest
+def test_internal_queries_keep_the_progress(executor):
+    run(executor, "select 1")
+    progress = executor.progress
+    executor.reset_connection_id()
+    assert executor.progress is progress
+    assert executor.connection_id > 0
+
+
+@dbtest
+def test_timing_of_the_last_result(executor):
+    run(executor, "select 1")
+    assert executor.timing is None
+
+    executor.measure_phases = True
+    run(executor, "select sleep(0.2)")
+    assert list(executor.timing.phases) == ["server", "transfer", "convert"]
+    assert executor.timing.phases["server"] >= 0.2
+
+
+@dbtest
+def test_borrow_reuses_a_spare_connection(executor):
+    with executor.borrow() as borrowed:
+        assert borrowed.conn is not executor.conn
+        assert borrowed.dbname == executor.dbname
+        assert list(borrowed.databases())
+        conn = borrowed.conn
+    with executor.borrow() as borrowed:
+        assert borrowed.conn is conn
+    assert executor.pool.reused == 1
+
+
 @pytest.mark.parametrize(
     "version_string, species, parsed_version_string, version",
     (
@@ -295,3 +402,90 @@ def test_version_parsing(version_string, species, parsed_version_string, version
     assert (server_info.species and server_info.species.name) == species or ServerSpecies.MySQL
     assert server_info.version_str == parsed_version_string
     assert server_info.version == version
+
+
+def prefetch_cursor(rows, depth=2, batch_size=10):
+    """A PrefetchSSCursor reading *rows* instead of a socket."""
+    cur = PrefetchSSCursor(Mock())
+    cur.prefetch_depth = depth
+    cur.batch_size = batch_size
+    pending = list(rows)
+
+    def fetchmany(size):
+        batch = pending[:size]
+        del pending[:size]
+        for row in batch:
+            if isinstance(row, Exception):
+                raise row
+        return batch
+
+    cur.fetchmany = fetchmany
+    return cur
+
+
+def test_prefetch_cursor_reads_all_rows():
+    rows = [(i,) for i in range(25)]
+    cur = prefetch_cursor(rows)
+    assert list(cur) == rows
+    assert cur.prefetch_stats.rows == 25
+    assert cur.prefetch_stats.batches == 3
+    assert cur._prefetch_thread is None
+
+
+def test_prefetch_cursor_disabled():
+    cur = prefetch_cursor([], depth=0)
+    cur.fetchone = Mock(side_effect=[(1,), (2,), None])
+    assert list(cur) == [(1,), (2,)]
+    assert cur.prefetch_stats.batches == 0
+
+
+def test_prefetch_cursor_raises_reader_errors():
+    cur = prefetch_cursor([(1,), pymysql.OperationalError(2013, "Lost connection")], batch_size=1)
+    with pytest.raises(pymysql.OperationalError):
+        list(cur)
+
+
+def test_prefetch_cursor_stops_reader_when_abandoned():
+    cur = prefetch_cursor([(i,) for i in range(1000)], depth=1, batch_size=1)
+    rows = iter(cur)
+    assert next(rows) == (0,)
+    rows.close()
+    assert cur._prefetch_thread is None
+    assert cur.prefetch_stats.rows < 1000
+
+
+def test_query_progress():
+    conn = Mock(bytes_received=100)
+    progress = QueryProgress(conn)
+    conn.bytes_received += 3 * 1024
+    progress.rows = 1
+    progress.finish()
+    assert progress.bytes_received == 3 * 1024
+    assert str(progress) == f"{progress.elapsed:0.1f}s, 1 row, 3.0 KiB received"
+    assert format_size(10) == "10 B"
+    assert format_size(5 * 1024**4) == "5120.0 GiB"
+
+
+def test_borrow_without_a_pool():
+    executor = Mock(pool=None)
+    with pytest.raises(pymysql.err.InterfaceError):
+        with SQLExecute.borrow(executor):
+            pass
+
+
+def test_execute_in_background_reports_progress():
+    executor = Mock(progress_interval=0.01, conn=None)
+    progress = QueryProgress(None)
+    seen = []
+
+    def slow(value):
+        time.sleep(0.05)
+        return value
+
+    assert SQLExecute._execute_in_background(executor, slow, (42,), progress, lambda p: seen.append(p.executing)) == 42
+    # Called while waiting, then once more when done.
+    assert seen[0] is True
+    assert seen[-1] is False
+
+    with pytest.raises(ZeroDivisionError):
+        SQLExecute._execute_in_background(executor, lambda: 1 / 0, (), progress, lambda p: None)
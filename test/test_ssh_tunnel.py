@@ -0,0 +1,43 @@
+# type: ignore
+
+import sys
+from unittest.mock import Mock
+
+from mycli.ssh_tunnel import SSHTunnels
+
+
+def test_tunnels_are_reused_until_dead(monkeypatch):
+    started = []
+
+    def forwarder(*args, **kwargs):
+        started.append(Mock(is_active=True, local_bind_host="127.0.0.1", local_bind_port=10000 + len(started)))
+        return started[-1]
+
+    forwarder_class = Mock(side_effect=forwarder)
+    monkeypatch.setitem(sys.modules, "sshtunnel", Mock(SSHTunnelForwarder=forwarder_class))
+    tunnels = SSHTunnels()
+
+    address = tunnels.get("bastion", 22, "me", None, "~/.ssh/id_rsa", "db", 3306)
+    assert address == ("127.0.0.1", 10000)
+    assert tunnels.get("bastion", 22, "me", None, "~/.ssh/id_rsa", "db", 3306) == address
+    forwarder_class.assert_called_once_with(
+        ("bastion", 22),
+        ssh_username="me",
+        ssh_pkey="~/.ssh/id_rsa",
+        ssh_password=None,
+        remote_bind_address=("db", 3306),
+    )
+    started[0].start.assert_called_once_with()
+
+    # Another database server gets its own tunnel.
+    assert tunnels.get("bastion", 22, "me", None, None, "db2", 3306) == ("127.0.0.1", 10001)
+
+    started[0].is_active = False
+    assert tunnels.get("bastion", 22, "me", None, "~/.ssh/id_rsa", "db", 3306) == ("127.0.0.1", 10002)
+    started[0].stop.assert_called_once_with()
+    assert (tunnels.started, tunnels.reused) == (3, 1)
+
+    tunnels.close()
+    started[1].stop.assert_called_once_with()
+    started[2].stop.assert_called_once_with()
+    assert started[0].stop.call_count == 1
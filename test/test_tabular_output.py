@@ -2,12 +2,16 @@
 
 """Test the sql output adapter."""
 
+from decimal import Decimal
 from textwrap import dedent
 
+from cli_helpers.tabular_output import preprocessors
+from cli_helpers.utils import strip_ansi
 from pymysql.constants import FIELD_TYPE
 import pytest
 
-from mycli.main import MyCli
+from mycli.main import MyCli, unsampled_width
+from mycli.packages.tabular_output import batch, streaming
 from test.utils import HOST, PASSWORD, PORT, USER, dbtest
 
 
@@ -111,3 +115,106 @@ def test_sql_output(mycli):
               ('abc', 1, NULL, 10.0e0, X'aa')
             , ('d', 456, '1', 0.5e0, X'aabb')
             ;""")
+
+
+@pytest.mark.parametrize("format_name", ["csv", "tsv", "jsonl", "vertical"])
+def test_streaming_output_matches_buffered(format_name):
+    """Row-by-row formatting must produce the same lines as the regular formatter."""
+    formatter = MyCli().main_formatter
+    headers = ["letters", "number", "optional"]
+    rows = [("abc", 1, None), ("d", 456, "1"), ("e\tf", 7, "x")]
+    column_types = [str, int, int]
+    kwargs = {"dialect": "unix", "disable_numparse": True, "preserve_whitespace": True}
+
+    expected = formatter.format_output(rows, headers, format_name=format_name, column_types=column_types, **kwargs)
+    actual = streaming.format_output(formatter, iter(rows), headers, format_name=format_name, column_types=column_types, **kwargs)
+    assert list(actual) == list(expected)
+
+
+def test_streaming_output_is_lazy():
+    """Rows must be pulled from the source only as output lines are consumed."""
+    formatter = MyCli().main_formatter
+    consumed = []
+
+    def rows():
+        for i in range(3):
+            consumed.append(i)
+            yield (i,)
+
+    output = streaming.format_output(formatter, rows(), ["n"], format_name="csv", column_types=[int])
+    assert next(output) == '"n"'
+    assert next(output) == '"0"'
+    assert consumed == [0]
+
+
+@pytest.mark.parametrize("format_name", batch.supported_formats)
+def test_batch_output_matches_formatter(format_name):
+    """Block formatting must produce the same text as the regular formatter."""
+    mycli = MyCli()
+    formatter = mycli.main_formatter
+    headers = ["letters", "number", "optional", "float", "binary"]
+    rows = [
+        ("a\tb\nc", 1, None, 10.25, b"\xaa"),
+        ("d,\"e\"", 456, "1", None, b"ok"),
+        ("", -7, None, Decimal("-1000.5"), None),
+    ]
+    column_types = [str, int, str, float, str]
+    kwargs = {"dialect": "unix", "disable_numparse": True, "preserve_whitespace": True, "style": mycli.output_style}
+
+    expected = formatter.format_output(
+        rows, headers, format_name=format_name, preprocessors=(preprocessors.align_decimals,), column_types=column_types, **kwargs
+    )
+    actual = batch.format_output(formatter, iter(rows), headers, column_types, format_name=format_name, align_decimals=True, **kwargs)
+    assert "".join(actual) == "".join(line + "\n" for line in expected)
+
+
+def test_batch_output_is_chunked():
+    formatter = MyCli().main_formatter
+    consumed = []
+
+    def rows():
+        for i in range(5):
+            consumed.append(i)
+            yield (i,)
+
+    output = batch.format_output(formatter, rows(), ["n"], [int], format_name="tsv", chunk_size=2)
+    assert next(output) == "n\n"
+    assert next(output) == "0\n1\n"
+    assert consumed == [0, 1]
+    assert list(output) == ["2\n3\n", "4\n"]
+
+
+def test_auto_vertical_output():
+    mycli = MyCli()
+    mycli.main_formatter.format_name = "ascii"
+    headers = ["a", "b"]
+
+    narrow = list(mycli.format_output(None, [(1, "x")], headers, max_width=40))
+    assert narrow[0] == "+---+---+"
+
+    wide = strip_ansi("\n".join(mycli.format_output(None, [(1, "x" * 50)], headers, max_width=40))).splitlines()
+    assert wide[0].startswith("***")
+    assert wide[2] == "b | " + "x" * 50
+
+
+def test_auto_vertical_output_decides_on_sample():
+    """Only the leading rows decide the layout, the rest is rendered as chosen."""
+    mycli = MyCli()
+    mycli.main_formatter.format_name = "ascii"
+    mycli.auto_vertical_sample_size = 2
+    rows = [(1, "x"), (2, "y"), (3, "z" * 50)]
+
+    output = list(mycli.format_output(None, rows, ["a", "b"], max_width=40))
+    assert output[0].startswith("+---+")
+    assert len(output) == 7
+
+
+def test_unsampled_width():
+    description = [
+        ("id", FIELD_TYPE.LONG, None, 11, 11, 0, False),
+        ("name", FIELD_TYPE.VAR_STRING, None, 1020, 1020, 0, True),
+        ("created", FIELD_TYPE.DATETIME, None, 19, 19, 0, True),
+    ]
+    sample = [(1, "abc", None), (22, "abcdef", None)]
+    # id may grow to 11 digits, created to 19 characters; name is left alone.
+    assert unsampled_width(description, ["id", "name", "created"], sample) == (11 - 2) + (19 - 7)